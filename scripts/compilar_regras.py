@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+════════════════════════════════════════════════════════════════════
+GuardinIA — Compilador do Pacote de Regras
+Valida o pacote JSON de regras e gera o artefato compilado (automato
+de termos) que o Lambda carrega no cold start em vez de recompilar.
+
+Uso (antes do deploy, com o mesmo Python do runtime do Lambda):
+  python3 scripts/compilar_regras.py
+  python3 scripts/compilar_regras.py --regras src/regras/guardinia_br.json
+  python3 scripts/compilar_regras.py --saida src/regras/compilado
+════════════════════════════════════════════════════════════════════
+"""
+
+import argparse
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GuardinIA Compilador de Regras")
+    parser.add_argument("--regras", default=None, help="Caminho do pacote JSON")
+    parser.add_argument("--saida", default=None, help="Diretório do artefato")
+    args = parser.parse_args()
+
+    # Configuração lida no import do handler
+    if args.regras:
+        os.environ["REGRAS_PATH"] = os.path.abspath(args.regras)
+    if args.saida:
+        os.environ["REGRAS_ARTEFATO_DIR"] = os.path.abspath(args.saida)
+    os.environ.setdefault("BEDROCK_ENABLED", "false")
+
+    sys.path.insert(0, os.path.join(RAIZ, "src"))
+    import lambda_handler as handler
+
+    termos = sorted(handler.VOCABULARIO_TERMOS, key=handler.VOCABULARIO_TERMOS.get)
+    chave = handler.chave_artefato_automato(termos)
+    automato = handler.compilar_automato_termos(usar_artefato=False)
+
+    caminho = handler.salvar_artefato_automato(
+        automato,
+        termos,
+        chave,
+        diretorio=handler.REGRAS_ARTEFATO_DIR
+    )
+
+    if not caminho:
+        print("❌ Falha ao gravar o artefato compilado")
+        sys.exit(1)
+
+    print(f"✅ Pacote:   {handler.REGRAS_PATH}")
+    print(f"   Hash:     {handler.HASH_REGRAS[:12]}")
+    print(f"   Termos:   {automato.total_termos}")
+    print(f"   Estados:  {automato.total_estados}")
+    print(f"   Artefato: {caminho}")
+
+
+if __name__ == "__main__":
+    main()
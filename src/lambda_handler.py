@@ -21,6 +21,7 @@ import re
 import math
 import base64
 import boto3
+import contextvars
 import logging
 import traceback
 import urllib.request
@@ -29,17 +30,35 @@ import time
 import urllib.error
 import urllib.parse
 import hmac
+import marshal
+import zlib
+import sys
 import threading
+import unicodedata
 from datetime import datetime, timezone
-from typing import List, Dict, Tuple, Optional, Union, Any, Callable
+from typing import List, Dict, Tuple, Optional, Union, Any, Callable, FrozenSet, Iterable, NamedTuple
 from dataclasses import dataclass
 from urllib.parse import urlparse
-from collections import Counter, defaultdict
+from collections import Counter, OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FuturoTimeout
 from boto3.dynamodb.conditions import Key, Attr
-from botocore.exceptions import ClientError
+from botocore.exceptions import (
+    ClientError,
+    ConnectTimeoutError,
+    ConnectionClosedError,
+    EndpointConnectionError,
+    ReadTimeoutError
+)
 from decimal import Decimal
+from array import array
 from datetime import datetime, timezone, timedelta
 
+try:
+    import numpy as np  # Optional: batch re-scoring, faster MinHash
+except ImportError:
+    np = None
+
 # ======================================================================
 # GLOBAL CONFIGURATION
 # ======================================================================
@@ -101,7 +120,10 @@ BOT_WA_ID = os.environ.get("BOT_WA_ID")
 
 from botocore.config import Config
 
-textract = boto3.client("textract")
+textract = boto3.client(
+    "textract",
+    config=Config(connect_timeout=3, read_timeout=10, retries={"max_attempts": 1})
+)
 dynamodb = boto3.resource("dynamodb")
 
 _bedrock_config = Config(
@@ -116,6 +138,46 @@ bedrock_runtime = boto3.client(
     config=_bedrock_config
 )
 
+# Circuit breaker: opens when DISJUNTOR_TAXA_FALHA of the last
+# DISJUNTOR_JANELA calls failed or exceeded DISJUNTOR_LATENCIA_MS, then
+# keeps the pipeline heuristic-only for DISJUNTOR_ABERTO_SEGUNDOS before
+# letting one probe call through. Shared across containers via the cache
+# table when DISJUNTOR_COMPARTILHADO is set
+DISJUNTOR_ENABLED = os.environ.get("DISJUNTOR_ENABLED", "true").lower() == "true"
+DISJUNTOR_JANELA = int(os.environ.get("DISJUNTOR_JANELA", "20"))
+DISJUNTOR_MIN_CHAMADAS = int(os.environ.get("DISJUNTOR_MIN_CHAMADAS", "5"))
+DISJUNTOR_TAXA_FALHA = float(os.environ.get("DISJUNTOR_TAXA_FALHA", "0.5"))
+DISJUNTOR_LATENCIA_MS = int(os.environ.get("DISJUNTOR_LATENCIA_MS", "4000"))
+DISJUNTOR_ABERTO_SEGUNDOS = int(os.environ.get("DISJUNTOR_ABERTO_SEGUNDOS", "30"))
+DISJUNTOR_COMPARTILHADO = os.environ.get("DISJUNTOR_COMPARTILHADO", "false").lower() == "true"
+DISJUNTOR_SYNC_SEGUNDOS = int(os.environ.get("DISJUNTOR_SYNC_SEGUNDOS", "5"))
+
+# Shorter read timeouts for calls near the deadline (whole seconds)
+_CLIENTES_BEDROCK: Dict[int, Any] = {}
+
+
+def obter_cliente_bedrock(read_timeout: float):
+    """
+    Bedrock client whose read timeout fits the remaining time budget.
+    """
+
+    segundos = max(1, math.ceil(read_timeout))
+
+    if segundos >= _bedrock_config.read_timeout:
+        return bedrock_runtime
+
+    cliente = _CLIENTES_BEDROCK.get(segundos)
+
+    if cliente is None:
+        cliente = boto3.client(
+            "bedrock-runtime",
+            region_name=os.environ.get("AWS_REGION", "us-east-1"),
+            config=_bedrock_config.merge(Config(read_timeout=segundos))
+        )
+        _CLIENTES_BEDROCK[segundos] = cliente
+
+    return cliente
+
 # ----------------------------------------------------------------------
 # DynamoDB Tables
 # ----------------------------------------------------------------------
@@ -125,8 +187,13 @@ CACHE_TABLE_NAME = os.environ.get("CACHE_TABLE_NAME", "guardinia_cache")
 METRICS_TABLE_NAME = os.environ.get("METRICS_TABLE_NAME", "guardinia_metrics")
 
 audit_table = dynamodb.Table(DYNAMODB_TABLE)
+cache_table = dynamodb.Table(CACHE_TABLE_NAME)
 metrics_table = dynamodb.Table(METRICS_TABLE_NAME)
 
+# Metrics counters are spread over METRICS_SHARDS partition keys (one
+# per container, picked at cold start) and summed on read
+METRICS_SHARDS = max(1, int(os.environ.get("METRICS_SHARDS", "10")))
+
 # ----------------------------------------------------------------------
 # Cache Configuration
 # ----------------------------------------------------------------------
@@ -135,12 +202,37 @@ TTL_DAYS = 7
 TTL_SECONDS = TTL_DAYS * 24 * 60 * 60
 CACHE_TTL_SECONDS = int(os.environ.get("CACHE_TTL_SECONDS", "3600"))
 
+# Bump when the stored verdict format changes (older items are ignored)
+CACHE_VERSAO = 2
+
+# In-process verdict cache (per warm container, in front of DynamoDB)
+CACHE_MEMORIA_MAX_ITENS = int(os.environ.get("CACHE_MEMORIA_MAX_ITENS", "512"))
+CACHE_MEMORIA_TTL_SECONDS = int(os.environ.get("CACHE_MEMORIA_TTL_SECONDS", "300"))
+
+# Near-duplicate variant index (MinHash/LSH over recent risk verdicts)
+VARIANTES_ENABLED = os.environ.get("VARIANTES_ENABLED", "true").lower() == "true"
+VARIANTES_SIMILARIDADE_MIN = float(os.environ.get("VARIANTES_SIMILARIDADE_MIN", "0.8"))
+VARIANTES_SCORE_MIN = int(os.environ.get("VARIANTES_SCORE_MIN", "80"))
+VARIANTES_MAX_ITENS = int(os.environ.get("VARIANTES_MAX_ITENS", "2048"))
+VARIANTES_PERSISTIR = os.environ.get("VARIANTES_PERSISTIR", "false").lower() == "true"
+
+# Write-behind queue for cache, audit and metric writes (flushed before
+# the handler returns, leaving FILA_ESCRITA_MARGEM_MS of invocation time)
+FILA_ESCRITA_MAX_ITENS = int(os.environ.get("FILA_ESCRITA_MAX_ITENS", "500"))
+FILA_ESCRITA_WORKERS = int(os.environ.get("FILA_ESCRITA_WORKERS", "4"))
+FILA_ESCRITA_MARGEM_MS = int(os.environ.get("FILA_ESCRITA_MARGEM_MS", "500"))
+# Bound of an inline flush (buffer full, on the request path) and number
+# of flushes a retryable write may be requeued for before it is dropped
+FILA_ESCRITA_PRAZO_INLINE_MS = int(os.environ.get("FILA_ESCRITA_PRAZO_INLINE_MS", "200"))
+FILA_ESCRITA_TENTATIVAS_ITEM = int(os.environ.get("FILA_ESCRITA_TENTATIVAS_ITEM", "5"))
+
 # ----------------------------------------------------------------------
 # Heuristic Weights (Configurable)
 # ----------------------------------------------------------------------
 
 PESO_SIGNATURE_MATCH = int(os.environ.get("PESO_SIGNATURE_MATCH", "40"))
 PESO_PROGRESSAO_FINANCEIRA = int(os.environ.get("PESO_PROGRESSAO_FINANCEIRA", "35"))
+PESO_VALOR_EM_JOGO = int(os.environ.get("PESO_VALOR_EM_JOGO", "35"))
 THRESHOLD_SCAM = int(os.environ.get("THRESHOLD_SCAM", "120"))
 THRESHOLD_SUSPEITO = int(os.environ.get("THRESHOLD_SUSPEITO", "60"))
 MULTIPLICADOR_SEMANTICO = int(os.environ.get("MULTIPLICADOR_SEMANTICO", "20"))
@@ -160,9 +252,23 @@ BEDROCK_MODEL_SONNET = os.environ.get(
     "BEDROCK_MODEL_SONNET",
     "anthropic.claude-3-5-sonnet-20241022-v2:0"
 )
-BEDROCK_TIMEOUT = int(os.environ.get("BEDROCK_TIMEOUT", "5"))
+BEDROCK_TIMEOUT = int(os.environ.get("BEDROCK_TIMEOUT", "5"))  # per call, capped by the deadline
 BEDROCK_MAX_TOKENS = int(os.environ.get("BEDROCK_MAX_TOKENS", "180"))
 
+# Static instructions/few-shot go in a system block that can be marked
+# for prompt caching. Off by default: today's prefixes are below the
+# models' minimum cacheable length (see PROMPT_CACHE_MIN_TOKENS), so
+# the mark would be a no-op
+BEDROCK_PROMPT_CACHE_ENABLED = os.environ.get(
+    "BEDROCK_PROMPT_CACHE_ENABLED", "false"
+).lower() == "true"
+
+# Memo of validated Bedrock answers per (model, prompt): in-process LRU
+# plus cache table items, both expiring after BEDROCK_MEMO_TTL_SECONDS
+BEDROCK_MEMO_ENABLED = os.environ.get("BEDROCK_MEMO_ENABLED", "true").lower() == "true"
+BEDROCK_MEMO_TTL_SECONDS = int(os.environ.get("BEDROCK_MEMO_TTL_SECONDS", "3600"))
+BEDROCK_MEMO_MAX_ITENS = int(os.environ.get("BEDROCK_MEMO_MAX_ITENS", "256"))
+
 # ----------------------------------------------------------------------
 # Cognitive Zone Configuration
 # ----------------------------------------------------------------------
@@ -190,6 +296,35 @@ SONNET_REPASS_PROB_MIN = int(os.environ.get("SONNET_REPASS_PROB_MIN", "40"))
 SONNET_REPASS_PROB_MAX = int(os.environ.get("SONNET_REPASS_PROB_MAX", "60"))
 SONNET_REPASS_MANIPULACAO = int(os.environ.get("SONNET_REPASS_MANIPULACAO", "8"))
 
+# Opt-in: launch Sonnet alongside Haiku when a repass looks likely.
+# Discarded Sonnet calls are capped at BEDROCK_ESPECULATIVO_ORCAMENTO_USD
+# per container per UTC day
+BEDROCK_ESPECULATIVO_ENABLED = os.environ.get(
+    "BEDROCK_ESPECULATIVO_ENABLED", "false"
+).lower() == "true"
+BEDROCK_ESPECULATIVO_PROB_MIN = float(os.environ.get("BEDROCK_ESPECULATIVO_PROB_MIN", "0.5"))
+BEDROCK_ESPECULATIVO_ORCAMENTO_USD = float(os.environ.get("BEDROCK_ESPECULATIVO_ORCAMENTO_USD", "1.0"))
+
+# Per-message deadline: at most SLA_MENSAGEM_MS, and never past the
+# invocation's remaining time minus PRAZO_RESERVA_MS (reply + flush)
+SLA_MENSAGEM_MS = int(os.environ.get("SLA_MENSAGEM_MS", "8000"))
+PRAZO_RESERVA_MS = int(os.environ.get("PRAZO_RESERVA_MS", "1500"))
+
+# Opt-in: stop evaluating once the verdict can no longer change
+SAIDA_ANTECIPADA_ENABLED = os.environ.get(
+    "SAIDA_ANTECIPADA_ENABLED", "false"
+).lower() == "true"
+
+# Lowest score of the top classification band (see classificar)
+SCORE_GOLPE_CONFIRMADO = 120
+
+# Long texts (OCR screenshots, chain messages) are read in overlapping
+# windows, up to MAX_JANELAS_ANALISE windows per message
+TEXTO_LONGO_CHARS = int(os.environ.get("TEXTO_LONGO_CHARS", "3000"))
+JANELA_ANALISE_CHARS = int(os.environ.get("JANELA_ANALISE_CHARS", "1500"))
+SOBREPOSICAO_JANELA_CHARS = int(os.environ.get("SOBREPOSICAO_JANELA_CHARS", "200"))
+MAX_JANELAS_ANALISE = int(os.environ.get("MAX_JANELAS_ANALISE", "8"))
+
 # ----------------------------------------------------------------------
 # Cost Configuration (USD per 1M tokens)
 # ----------------------------------------------------------------------
@@ -199,6 +334,37 @@ CUSTO_HAIKU_OUTPUT_1M = 1.25
 CUSTO_SONNET_INPUT_1M = 3.00
 CUSTO_SONNET_OUTPUT_1M = 15.00
 
+# Prompt caching, relative to the input price: cache reads and writes
+FATOR_CACHE_LEITURA = 0.1
+FATOR_CACHE_ESCRITA = 1.25
+
+# ----------------------------------------------------------------------
+# Rule Pack Configuration
+# ----------------------------------------------------------------------
+
+REGRAS_PATH = os.environ.get(
+    "REGRAS_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "regras", "guardinia_br.json")
+)
+REGRAS_ARTEFATO_DIR = os.environ.get(
+    "REGRAS_ARTEFATO_DIR",
+    os.path.join(os.path.dirname(REGRAS_PATH), "compilado")
+)
+REGRAS_ARTEFATO_TMP_DIR = "/tmp/guardinia_regras"
+
+# ----------------------------------------------------------------------
+# Regex Profiling
+# ----------------------------------------------------------------------
+
+REGEX_PROFILING = os.environ.get("REGEX_PROFILING", "false").lower() == "true"
+
+# ----------------------------------------------------------------------
+# Analysis Trace Configuration
+# ----------------------------------------------------------------------
+
+TRACE_LEVEL = os.environ.get("TRACE_LEVEL", "basic").lower()  # off | basic | verbose
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", "0.1"))
+
 # ======================================================================
 # Webhook Signature Validation (Meta / WhatsApp)
 # ======================================================================
@@ -296,24 +462,339 @@ class RespostaBedrock:
 
     modelo_usado: str  # "haiku" or "sonnet"
 
-    tokens_input: int
+    tokens_input: int  # Uncached input tokens
     tokens_output: int
     custo_usd: float
     tempo_ms: float
 
+    tokens_cache_leitura: int = 0  # Input tokens read from prompt cache
+    tokens_cache_escrita: int = 0  # Input tokens written to prompt cache
+
+# ======================================================================
+# Compiled Pattern Registry
+# ======================================================================
+
+class PadraoPerfilado:
+    """
+    Compiled pattern wrapper that accumulates call count and match time.
+
+    Only used when REGEX_PROFILING is enabled; otherwise the registry
+    hands out the raw compiled pattern (zero overhead).
+    """
+
+    __slots__ = ("nome", "padrao", "chamadas", "tempo_total")
+
+    def __init__(self, nome: str, padrao: "re.Pattern"):
+        self.nome = nome
+        self.padrao = padrao
+        self.chamadas = 0
+        self.tempo_total = 0.0
+
+    def _medir(self, funcao: Callable, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return funcao(*args, **kwargs)
+        finally:
+            self.chamadas += 1
+            self.tempo_total += time.perf_counter() - inicio
+
+    def search(self, *args, **kwargs):
+        return self._medir(self.padrao.search, *args, **kwargs)
+
+    def findall(self, *args, **kwargs):
+        return self._medir(self.padrao.findall, *args, **kwargs)
+
+    def finditer(self, *args, **kwargs):
+        # Materialized so the timing covers the whole scan
+        return iter(self._medir(
+            lambda *a, **k: list(self.padrao.finditer(*a, **k)),
+            *args, **kwargs
+        ))
+
+    def sub(self, *args, **kwargs):
+        return self._medir(self.padrao.sub, *args, **kwargs)
+
+
+PADROES_REGISTRADOS: Dict[str, Any] = {}
+
+
+def registrar_padrao(nome: str, padrao: str, flags: int = 0):
+    """
+    Compiles a pattern once at import time and registers it by name.
+    """
+
+    if nome in PADROES_REGISTRADOS:
+        raise ValueError(f"Padrão duplicado: {nome}")
+
+    compilado = re.compile(padrao, flags)
+    if REGEX_PROFILING:
+        compilado = PadraoPerfilado(nome, compilado)
+
+    PADROES_REGISTRADOS[nome] = compilado
+    return compilado
+
+
+def obter_estatisticas_regex() -> Dict[str, Dict[str, float]]:
+    """
+    Per-pattern call count and cumulative match time (ms).
+
+    Empty unless REGEX_PROFILING is enabled.
+    """
+
+    return {
+        nome: {
+            "chamadas": padrao.chamadas,
+            "tempo_total_ms": round(padrao.tempo_total * 1000, 3),
+            "tempo_medio_us": round(
+                padrao.tempo_total * 1e6 / padrao.chamadas, 2
+            ) if padrao.chamadas else 0.0
+        }
+        for nome, padrao in PADROES_REGISTRADOS.items()
+        if isinstance(padrao, PadraoPerfilado)
+    }
+
+
+RE_ESPACOS = registrar_padrao("espacos", r'\s+')
+RE_LETRA = registrar_padrao("letra", r'[A-Za-zÀ-ÿ]')
+RE_CARACTERE_ESPECIAL = registrar_padrao(
+    "caractere_especial", r'[^A-Za-z0-9À-ÿ\s.,!?;:()-]'
+)
+RE_DIGITO = registrar_padrao("digito", r'\d')
+
+# Brazilian number: "3.500", "1.234,56" (thousands) or "3,5" / "10.50"
+_NUMERO_BR = r'\d{1,3}(?:\.\d{3})+(?:,\d+)?|\d+(?:[.,]\d+)?'
+
+# Typed numeric tokenizer: one left-to-right scan yields BRL amounts,
+# contract references, multipliers, dates, long identifiers and plain
+# numbers (optionally suffixed by %, x, a time unit or "reais").
+# The leading class lets the engine skip positions that cannot match.
+RE_TOKENS_NUMERICOS = registrar_padrao(
+    "tokens_numericos",
+    r'(?=[rpnqdt\d])(?:'
+    r'(?P<brl>r\$\s?(?P<brl_num>' + _NUMERO_BR + r')(?P<brl_mil>\s?mil\b)?)'
+    r'|(?P<referencia>(?:parcela|n[úu]mero)\s?(?P<ref_num>\d+))'
+    r'|(?P<mult_palavra>\b(?:dobr|tripl|quadrupl|quádrupl)\w*)'
+    r'|(?P<data>\b\d{1,2}/\d{1,2}(?:/\d{2,4})?\b)'
+    r'|(?P<identificador>\b\d{8,}\b)'
+    r'|(?P<num>\b(?:' + _NUMERO_BR + r'))(?:'
+    r'\s?(?P<pct>%)'
+    r'|\s?(?P<mult>x)\b'
+    r'|\s?(?P<unid>horas?|hrs?|h|minutos?|min|dias?|semanas?|meses|mês)\b'
+    r'|(?P<mil>\s?mil)?\s?(?P<reais>reais)\b'
+    r')?'
+    r')'
+)
+
+RE_PEDIDO_DINHEIRO = registrar_padrao(
+    "pedido_dinheiro", r'\b(preciso|necessito).*?(dinheiro|grana|pix|valor)'
+)
+RE_RELACAO_PESSOAL = registrar_padrao(
+    "relacao_pessoal", r'\b(meu|minha) (amor|anjo|filho|filha|mãe|pai|familia)'
+)
+
+# The bare-domain alternative only starts at the beginning of a
+# [a-zA-Z0-9-] run: retrying from every inner position made long
+# unbroken runs (OCR noise) quadratic, with the same result.
+_PADRAO_URL_CANDIDATA = (
+    r"https?://[^\s<>'\"]+|www\.[^\s<>'\"]+"
+    r"|(?<![a-zA-Z0-9-])[a-zA-Z0-9-]+\.[a-zA-Z]{2,}"
+)
+RE_URL_CANDIDATA = registrar_padrao("url_candidata", _PADRAO_URL_CANDIDATA)
+
+RE_CONTAGEM_REGRESSIVA = registrar_padrao(
+    "contagem_regressiva", r"\b(expira|vence|última chance|último dia)\b"
+)
+
+# Campaign template variables (see canonicalizar_texto)
+RE_CPF = registrar_padrao("cpf", r'\b\d{3}\.\d{3}\.\d{3}-\d{2}\b')
+RE_TELEFONE = registrar_padrao(
+    "telefone", r'(?:\+?55\s?)?(?:\(\d{2}\)|\b\d{2})\s?9?\d{4}-?\d{4}\b'
+)
+RE_URL_TEMPLATE = registrar_padrao(
+    "url_template", _PADRAO_URL_CANDIDATA + r"(?:/[^\s<>'\"]*)?"
+)
+RE_NOME_APRESENTACAO = registrar_padrao(
+    "nome_apresentacao",
+    r"\b(?:[Mm]e chamo|[Ss]ou (?:a|o)|[Éé] (?:a|o)|[Aa]qui é (?:a|o)|"
+    r"[Oo]i|[Oo]lá|[Pp]rezad[ao]|[Ss]r\.?|[Ss]ra\.?|[Dd]r\.?|[Dd]ra\.?)"
+    r"\s+(?P<nome>[A-ZÀ-Ý][a-zà-ÿ]+(?:\s+[A-ZÀ-Ý][a-zà-ÿ]+)*)"
+)
+
+RE_NAO_PALAVRA = registrar_padrao("nao_palavra", r'[^\w<>]+')
+
+RE_JSON_OBJETO = registrar_padrao("json_objeto", r'\{.*\}', re.DOTALL)
+RE_PONTUACAO_LEVE = registrar_padrao("pontuacao_leve", r'[!?.]+')
+
+# ======================================================================
+# Per-Message Trace Collector
+# ======================================================================
+
+class TraceAnalise:
+    """
+    Reason codes collected while one message is analyzed.
+
+    Events are stored as raw tuples and only formatted once, in the
+    final `analysis_complete_v5_1` log line.
+    """
+
+    __slots__ = ("eventos", "detalhado")
+
+    def __init__(self, detalhado: bool = False):
+        self.eventos: List[Tuple[str, tuple]] = []
+        self.detalhado = detalhado
+
+
+_TRACE_ATUAL: contextvars.ContextVar = contextvars.ContextVar(
+    "guardinia_trace",
+    default=None
+)
+
+
+def iniciar_trace() -> contextvars.Token:
+    """
+    Opens the trace of the current message.
+
+    - TRACE_LEVEL=off: nothing is collected
+    - TRACE_LEVEL=basic: reason codes only
+    - TRACE_LEVEL=verbose: codes + details for a TRACE_SAMPLE_RATE sample
+    """
+
+    if TRACE_LEVEL == "off":
+        return _TRACE_ATUAL.set(None)
+
+    detalhado = (
+        TRACE_LEVEL == "verbose" and
+        random.random() < TRACE_SAMPLE_RATE
+    )
+
+    return _TRACE_ATUAL.set(TraceAnalise(detalhado))
+
+
+def encerrar_trace(token: contextvars.Token):
+    _TRACE_ATUAL.reset(token)
+
+
+def rastrear(codigo: str, *detalhes):
+    """
+    Records a reason code (and optional detail values) on the active
+    trace. Outside an analysis it only logs at DEBUG level.
+    """
+
+    trace = _TRACE_ATUAL.get()
+
+    if trace is not None:
+        trace.eventos.append((codigo, detalhes))
+    elif logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"{codigo} | {detalhes}")
+
+
+def resumir_trace() -> Dict[str, Any]:
+    """
+    Trace fields for the final structured log line.
+    """
+
+    trace = _TRACE_ATUAL.get()
+
+    if trace is None:
+        return {}
+
+    resumo: Dict[str, Any] = {
+        "reasons": [codigo for codigo, _ in trace.eventos]
+    }
+
+    if trace.detalhado:
+        resumo["trace"] = [
+            [codigo, *detalhes] for codigo, detalhes in trace.eventos
+        ]
+
+    return resumo
+
 # ======================================================================
 # Input Sanitization & Normalization Utilities
 # ======================================================================
 
+# ----------------------------------------------------------------------
+# Precomputed Translate Tables
+# ----------------------------------------------------------------------
+
+# Zero-width / invisible characters used to split keywords ("p\u200bix")
+_CARACTERES_INVISIVEIS = '\u200b\u200c\u200d\u2060\ufeff\u00ad'
+
+_TABELA_INVISIVEIS = str.maketrans('', '', _CARACTERES_INVISIVEIS + '\u00a0')
+
+# Common digit/symbol obfuscations ("p1x", "s3nha", "b@nco")
+_SUBSTITUICOES_LEET = {
+    '0': 'o', '1': 'i', '3': 'e', '4': 'a', '5': 's', '7': 't', '@': 'a'
+}
+
+
+class _TabelaNaoImprimiveis(dict):
+    """
+    Translate table dropping non-printable characters (whitespace kept).
+
+    Filled lazily: each code point is classified once per container
+    and then handled by `str.translate` at C speed.
+    """
+
+    def __missing__(self, codigo: int) -> Optional[int]:
+        c = chr(codigo)
+        valor = codigo if (c.isprintable() or c.isspace()) else None
+        self[codigo] = valor
+        return valor
+
+
+def _construir_tabela_dobra() -> Dict[int, Optional[str]]:
+    """
+    Builds the folding table used for keyword matching:
+    invisibles removed, Latin letters lowered and stripped of
+    diacritics, leetspeak digits mapped back to letters.
+    """
+
+    tabela: Dict[int, Optional[str]] = {}
+
+    for codigo in range(0x41, 0x250):
+        c = chr(codigo)
+        base = ''.join(
+            b for b in unicodedata.normalize('NFD', c)
+            if not unicodedata.combining(b)
+        ).lower()
+
+        if base != c and base.isascii() and base.isalpha():
+            tabela[codigo] = base
+
+    for c in _CARACTERES_INVISIVEIS:
+        tabela[ord(c)] = None
+
+    tabela[0xa0] = ' '
+
+    for c, letra in _SUBSTITUICOES_LEET.items():
+        tabela[ord(c)] = letra
+
+    return tabela
+
+
+_TABELA_NAO_IMPRIMIVEIS = _TabelaNaoImprimiveis()
+_TABELA_DOBRA = _construir_tabela_dobra()
+
+
+def dobrar_texto(texto: str) -> str:
+    """
+    Folds text into the form used for keyword matching.
+
+    Case, diacritics ("código" -> "codigo"), zero-width splits and
+    common leetspeak ("p1x" -> "pix") collapse in one translate pass.
+    Only used for term lookup: numbers and URLs are read from the
+    original text.
+    """
+    return texto.translate(_TABELA_DOBRA)
+
+
 def remover_caracteres_invisiveis(texto: str) -> str:
     """
     Remove common invisible or zero-width Unicode characters
     often used for obfuscation in scam messages.
     """
-    invisiveis = ['\u200b', '\u200c', '\u200d', '\ufeff', '\u00a0']
-    for c in invisiveis:
-        texto = texto.replace(c, '')
-    return texto
+    return texto.translate(_TABELA_INVISIVEIS)
 
 
 def sanitizar_entrada(texto: str) -> str:
@@ -327,7 +808,7 @@ def sanitizar_entrada(texto: str) -> str:
         return ""
 
     texto = remover_caracteres_invisiveis(texto)
-    texto = re.sub(r'\s+', ' ', texto)
+    texto = RE_ESPACOS.sub(' ', texto)
     return texto.strip()
 
 
@@ -343,10 +824,10 @@ def validar_entrada(texto: str) -> Tuple[bool, str]:
     if not texto or len(texto.strip()) < 3:
         return False, "Texto muito curto"
 
-    if not re.search(r'[A-Za-zÀ-ÿ]', texto):
+    if not RE_LETRA.search(texto):
         return False, "Texto sem letras válidas"
 
-    especiais = len(re.findall(r'[^A-Za-z0-9À-ÿ\s.,!?;:()-]', texto))
+    especiais = len(RE_CARACTERE_ESPECIAL.findall(texto))
     if len(texto) > 0 and (especiais / len(texto)) > 0.4:
         return False, "Texto excessivamente ofuscado"
 
@@ -361,7 +842,11 @@ def normalizar_texto(texto: str) -> str:
     - Final trimming
     """
     texto = sanitizar_entrada(texto)
-    texto = ''.join(c for c in texto if c.isprintable() or c.isspace())
+
+    # Fast path: almost every message is already printable
+    if not texto.isprintable():
+        texto = texto.translate(_TABELA_NAO_IMPRIMIVEIS)
+
     return texto.strip()
 
 
@@ -381,6 +866,72 @@ def truncar_seguro(texto: str, max_chars: int = 4096) -> str:
 
     return truncado + "..."
 
+# ======================================================================
+# Per-Message Deadline
+# ======================================================================
+
+class Prazo:
+    """
+    Time budget of one message. Each stage sizes its network timeout
+    from what is left and is skipped (heuristic-only degradation) when
+    too little remains, so a slow dependency cannot push the
+    invocation past its timeout.
+    """
+
+    def __init__(self, segundos: float):
+        self.fim = time.monotonic() + segundos
+
+    @classmethod
+    def da_invocacao(cls, context, sla_ms: int = SLA_MENSAGEM_MS) -> "Prazo":
+        """
+        Deadline of a message starting now: the SLA, bounded by the
+        invocation's remaining time minus PRAZO_RESERVA_MS.
+        """
+
+        limite_ms = sla_ms
+
+        if context is not None and hasattr(context, "get_remaining_time_in_millis"):
+            limite_ms = min(
+                limite_ms,
+                context.get_remaining_time_in_millis() - PRAZO_RESERVA_MS
+            )
+
+        return cls(max(limite_ms, 0) / 1000)
+
+    def restante(self) -> float:
+        return max(0.0, self.fim - time.monotonic())
+
+    def esgotado(self) -> bool:
+        return self.restante() <= 0
+
+    def timeout(self, maximo: float, minimo: float = 0.3) -> Optional[float]:
+        """
+        Timeout for the next stage: `maximo` capped by the remaining
+        time, or None when less than `minimo` seconds are left.
+        """
+
+        restante = self.restante()
+
+        if restante < minimo:
+            return None
+
+        return min(maximo, restante)
+
+
+def timeout_etapa(
+    prazo: Optional[Prazo],
+    maximo: float,
+    minimo: float = 0.3
+) -> Optional[float]:
+    """
+    Stage timeout with or without a deadline (None: skip the stage).
+    """
+
+    if prazo is None:
+        return maximo
+
+    return prazo.timeout(maximo, minimo)
+
 # ======================================================================
 # External API Retry Utility
 # ======================================================================
@@ -388,7 +939,8 @@ def truncar_seguro(texto: str, max_chars: int = 4096) -> str:
 def executar_com_retry(
     func: Callable,
     max_tentativas: int = 2,
-    descricao: str = "external_operation"
+    descricao: str = "external_operation",
+    prazo: Optional[Prazo] = None
 ):
     """
     Executes a callable with basic retry logic for transient network failures.
@@ -396,6 +948,8 @@ def executar_com_retry(
     - Retries on URLError
     - Applies incremental backoff
     - Fails fast on non-recoverable exceptions
+    - Gives up instead of retrying when the backoff would exceed the
+      deadline
     """
 
     for tentativa in range(max_tentativas):
@@ -410,12 +964,21 @@ def executar_com_retry(
                 )
                 return None
 
+            espera = 0.5 * (tentativa + 1)
+
+            if prazo is not None and prazo.restante() < espera + 0.3:
+                logger.warning(
+                    f"retry_skipped_deadline | operation={descricao} "
+                    f"| attempt={tentativa + 1}"
+                )
+                return None
+
             logger.warning(
                 f"retry_attempt_failed | operation={descricao} "
                 f"| attempt={tentativa + 1}"
             )
 
-            time.sleep(0.5 * (tentativa + 1))
+            time.sleep(espera)
 
         except Exception as e:
             logger.error(
@@ -463,7 +1026,7 @@ def densidade_numerica(texto: str) -> float:
     if not texto:
         return 0.0
 
-    nums = len(re.findall(r'\d', texto))
+    nums = len(RE_DIGITO.findall(texto))
     return nums / len(texto)
 
 
@@ -476,7 +1039,7 @@ def proporcao_maiusculas(texto: str) -> float:
     - Emotional manipulation
     - Aggressive formatting
     """
-    letras = re.findall(r'[A-Za-zÀ-ÿ]', texto)
+    letras = RE_LETRA.findall(texto)
     if not letras:
         return 0.0
 
@@ -484,124 +1047,810 @@ def proporcao_maiusculas(texto: str) -> float:
     return maius / len(letras)
 
 # ======================================================================
-# Semantic Signal Extraction Layer
+# Multi-Pattern Term Matcher (Aho-Corasick)
 # ======================================================================
 
-def extrair_sinais_semanticos(texto: str) -> Dict[str, float]:
+class AutomatoTermos:
     """
-    Extracts high-level semantic indicators commonly found in scam patterns.
+    Aho-Corasick automaton over the engine keyword vocabulary.
 
-    Each signal represents a behavioral or linguistic pattern such as:
-    - Financial requests
-    - Authority impersonation
-    - Urgency pressure
-    - Emotional manipulation
-    - Threat escalation
-    - Victim investigative awareness
+    Reports every registered term occurring in the text as a substring
+    (same semantics as `termo in texto`) in a single left-to-right scan,
+    so the cost is linear in text length regardless of vocabulary size.
+
+    Failure links are folded into the transition table at build time,
+    leaving one dict lookup per scanned character.
     """
 
-    t = texto.lower()
-    sinais: Dict[str, float] = {}
+    def __init__(self, termos: List[str]):
+        transicoes: List[Dict[str, int]] = [{}]
+        saidas: List[List[int]] = [[]]
 
-    # ------------------------------------------------------------------
-    # Direct Financial Request
-    # ------------------------------------------------------------------
-    sinais['pedido_dinheiro'] = 1.0 if any([
-        'faz um pix' in t, 'me manda' in t, 'me passa' in t,
-        'transfere' in t, 'me envia' in t, 'deposita' in t,
-        re.search(r'\b(preciso|necessito).*(dinheiro|grana|pix|valor)', t)
-    ]) else 0.0
+        # --------------------------------------------------------------
+        # Trie construction
+        # --------------------------------------------------------------
+        for termo_id, termo in enumerate(termos):
+            estado = 0
+            for c in termo:
+                proximo = transicoes[estado].get(c)
+                if proximo is None:
+                    proximo = len(transicoes)
+                    transicoes[estado][c] = proximo
+                    transicoes.append({})
+                    saidas.append([])
+                estado = proximo
+            saidas[estado].append(termo_id)
 
-    # ------------------------------------------------------------------
-    # Promise of Financial Return
-    # ------------------------------------------------------------------
-    sinais['promessa_retorno'] = 1.0 if any([
-        'te devolvo' in t, 'te pago' in t, 'depois eu pago' in t,
-        'te retorno' in t, 'retorno garantido' in t, 'lucro garantido' in t,
-        'lucro certo' in t, 'sem risco' in t
-    ]) else 0.0
+        # --------------------------------------------------------------
+        # Failure links (BFS) merged into a deterministic automaton
+        # --------------------------------------------------------------
+        falhas = [0] * len(transicoes)
+        delta: List[Dict[str, int]] = [dict(t) for t in transicoes]
+        fila = list(transicoes[0].values())
+        posicao = 0
+
+        while posicao < len(fila):
+            estado = fila[posicao]
+            posicao += 1
+
+            saidas[estado].extend(saidas[falhas[estado]])
+
+            for c, destino in delta[falhas[estado]].items():
+                if c not in transicoes[estado]:
+                    delta[estado][c] = destino
+
+            for c, proximo in transicoes[estado].items():
+                falhas[proximo] = delta[falhas[estado]].get(c, 0) if estado else 0
+                fila.append(proximo)
+
+        self.total_termos = len(termos)
+        self.total_estados = len(transicoes)
+        self.delta = delta
+        self.saidas: List[Tuple[int, ...]] = [tuple(s) for s in saidas]
+
+    @classmethod
+    def de_tabelas(
+        cls,
+        total_termos: int,
+        delta: List[Dict[str, int]],
+        saidas: List[Tuple[int, ...]]
+    ) -> "AutomatoTermos":
+        """
+        Rebuilds an automaton from previously compiled tables.
+        """
 
-    # ------------------------------------------------------------------
-    # Authority Impersonation
-    # ------------------------------------------------------------------
-    sinais['autoridade'] = 1.0 if any([
-        'sou do banco' in t, 'sou da receita' in t, 'setor de fraude' in t,
-        'central de segurança' in t,
-        'departamento' in t and any(x in t for x in ['fraude', 'segurança', 'bloqueio']),
-        'suporte oficial' in t
-    ]) else 0.0
+        automato = cls.__new__(cls)
+        automato.total_termos = total_termos
+        automato.total_estados = len(delta)
+        automato.delta = delta
+        automato.saidas = saidas
+        return automato
 
-    # ------------------------------------------------------------------
-    # Urgency Pressure
-    # ------------------------------------------------------------------
-    termos_urgencia = [
-        'urgente', 'agora', 'imediato', 'imediatamente',
-        'último aviso', 'hoje mesmo'
-    ]
-    count_urgencia = sum(1 for termo in termos_urgencia if termo in t)
-    sinais['urgencia'] = min(count_urgencia * 0.8, 2.4)
+    def varrer(self, texto: str) -> FrozenSet[int]:
+        """
+        Returns the IDs of every term found in the text.
+        """
 
-    # ------------------------------------------------------------------
-    # Isolation / Secrecy Attempt
-    # ------------------------------------------------------------------
-    sinais['proibicao'] = 1.2 if any([
-        'não conta' in t, 'não liga' in t, 'não fala' in t,
-        'não chama' in t, 'segredo nosso' in t,
-        'confidencial' in t, 'entre nós' in t
-    ]) else 0.0
+        delta = self.delta
+        saidas = self.saidas
+        estado = 0
+        encontrados = set()
 
-    # ------------------------------------------------------------------
-    # Emotional / Personal Bond Manipulation
-    # ------------------------------------------------------------------
-    sinais['relacao_pessoal'] = 0.7 if any([
-        re.search(r'\b(meu|minha) (amor|anjo|filho|filha|mãe|pai|familia)', t),
-        'você é especial' in t, 'te amo' in t, 'meu querido' in t
-    ]) else 0.0
+        for c in texto:
+            estado = delta[estado].get(c, 0)
+            if saidas[estado]:
+                encontrados.update(saidas[estado])
 
-    # ------------------------------------------------------------------
-    # Threat Escalation
-    # ------------------------------------------------------------------
-    sinais['ameaca'] = 1.1 if any([
-        'bloqueio' in t, 'cancelamento' in t, 'prisão' in t,
-        'será bloqueado' in t, 'será cancelado' in t,
-        'será suspenso' in t, 'perderá acesso' in t,
-        'consequências' in t
-    ]) else 0.0
+        return frozenset(encontrados)
 
-    # ------------------------------------------------------------------
-    # Victim Investigative Awareness (negative signal)
-    # ------------------------------------------------------------------
-    sinais['investigativo'] = -1.5 if any([
-        'isso é golpe' in t, 'é golpe' in t, 'é seguro' in t,
-        'é confiável' in t, 'é fraude' in t,
-        '?' in texto and any(
-            x in t for x in ['golpe', 'seguro', 'confiável', 'fraude']
-        )
-    ]) else 0.0
 
-    return sinais
+# ----------------------------------------------------------------------
+# Term Vocabulary Registry
+# ----------------------------------------------------------------------
 
-# ======================================================================
-# Psychological Pressure Index (IPP) 
-# ======================================================================
+VOCABULARIO_TERMOS: Dict[str, int] = {}
+
+_AUTOMATO_TERMOS: Optional[AutomatoTermos] = None
 
-def calcular_indice_pressao(texto: str, sinais: Dict[str, float]) -> float:
+
+def registrar_termos(termos: Iterable[str]) -> FrozenSet[int]:
     """
-    Calculates the Psychological Pressure Index (IPP).
+    Registers keyword terms in the shared vocabulary.
 
-    The IPP aggregates linguistic and behavioral indicators that
-    reflect coercion tactics commonly used in scam attempts.
+    Terms are stored in folded form (see `dobrar_texto`), so accented
+    and unaccented spellings share one ID and one automaton path.
 
-    Components:
-    - Urgency escalation
-    - Threat signals
-    - Isolation / secrecy attempts
+    Returns the term IDs so detectors can test a whole keyword
+    group against the precomputed hit set of a message.
+    """
+
+    global _AUTOMATO_TERMOS
+
+    ids = set()
+
+    for termo in termos:
+        termo = dobrar_texto(termo.lower())
+
+        if termo not in VOCABULARIO_TERMOS:
+            VOCABULARIO_TERMOS[termo] = len(VOCABULARIO_TERMOS)
+            _AUTOMATO_TERMOS = None  # Rebuilt on next scan
+
+        ids.add(VOCABULARIO_TERMOS[termo])
+
+    return frozenset(ids)
+
+
+# ----------------------------------------------------------------------
+# Compiled Matcher Artifact (cold start cache)
+# ----------------------------------------------------------------------
+
+FORMATO_ARTEFATO = 1
+
+
+def chave_artefato_automato(termos: List[str]) -> str:
+    """
+    Identifies a compiled automaton by rule pack hash, ordered vocabulary
+    (which includes terms registered in code), artifact format and
+    Python version (marshal is version specific).
+    """
+
+    conteudo = json.dumps(
+        {
+            "formato": FORMATO_ARTEFATO,
+            "python": list(sys.version_info[:2]),
+            "regras": HASH_REGRAS,
+            "termos": termos
+        },
+        ensure_ascii=False
+    )
+
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+def _caminho_artefato(diretorio: str, chave: str) -> str:
+    return os.path.join(diretorio, f"automato_{chave[:16]}.bin")
+
+
+def carregar_artefato_automato(
+    termos: List[str],
+    chave: str
+) -> Optional[AutomatoTermos]:
+    """
+    Loads a prebuilt automaton (deployment artifact first, then /tmp).
+    """
+
+    for diretorio in (REGRAS_ARTEFATO_DIR, REGRAS_ARTEFATO_TMP_DIR):
+        caminho = _caminho_artefato(diretorio, chave)
+
+        if not os.path.exists(caminho):
+            continue
+
+        try:
+            with open(caminho, "rb") as f:
+                artefato = marshal.loads(f.read())
+
+            if artefato.get("chave") != chave or artefato.get("termos") != termos:
+                continue
+
+            return AutomatoTermos.de_tabelas(
+                len(termos),
+                artefato["delta"],
+                artefato["saidas"]
+            )
+
+        except Exception as e:
+            logger.warning(
+                f"rule_artifact_load_failed | path={caminho} | error={e}"
+            )
+
+    return None
+
+
+def salvar_artefato_automato(
+    automato: AutomatoTermos,
+    termos: List[str],
+    chave: str,
+    diretorio: str = REGRAS_ARTEFATO_TMP_DIR
+) -> Optional[str]:
+    """
+    Serializes the compiled automaton (atomic write, best-effort).
+    """
+
+    caminho = _caminho_artefato(diretorio, chave)
+
+    try:
+        os.makedirs(diretorio, exist_ok=True)
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+
+        with open(temporario, "wb") as f:
+            marshal.dump(
+                {
+                    "chave": chave,
+                    "termos": termos,
+                    "delta": automato.delta,
+                    "saidas": automato.saidas
+                },
+                f
+            )
+
+        os.replace(temporario, caminho)
+        return caminho
+
+    except Exception as e:
+        logger.warning(
+            f"rule_artifact_save_failed | path={caminho} | error={e}"
+        )
+        return None
+
+
+def compilar_automato_termos(usar_artefato: bool = True) -> AutomatoTermos:
+    """
+    Compiles the registered vocabulary into the shared automaton.
+
+    Called once at cold start; later registrations only invalidate it.
+    A prebuilt artifact with the same key is loaded instead of
+    recompiling; on a miss the compiled tables are written to /tmp.
+    """
+
+    global _AUTOMATO_TERMOS
+
+    inicio = time.time()
+    termos = sorted(VOCABULARIO_TERMOS, key=VOCABULARIO_TERMOS.get)
+    chave = chave_artefato_automato(termos)
+
+    automato = carregar_artefato_automato(termos, chave) if usar_artefato else None
+    origem = "artifact"
+
+    if automato is None:
+        automato = AutomatoTermos(termos)
+        origem = "compiled"
+
+        if usar_artefato:
+            salvar_artefato_automato(automato, termos, chave)
+
+    _AUTOMATO_TERMOS = automato
+
+    logger.info(
+        f"term_automaton_ready "
+        f"| source={origem} "
+        f"| ruleset={HASH_REGRAS[:12]} "
+        f"| terms={_AUTOMATO_TERMOS.total_termos} "
+        f"| states={_AUTOMATO_TERMOS.total_estados} "
+        f"| build_ms={(time.time() - inicio) * 1000:.1f}"
+    )
+
+    return _AUTOMATO_TERMOS
+
+
+def varrer_termos(texto_lower: str) -> FrozenSet[int]:
+    """
+    Folds already-lowered text and scans it with the shared automaton.
+    """
+
+    automato = _AUTOMATO_TERMOS or compilar_automato_termos(usar_artefato=False)
+    return automato.varrer(dobrar_texto(texto_lower))
+
+
+def _tem_algum(termos: FrozenSet[int], grupo: FrozenSet[int]) -> bool:
+    """
+    True when at least one term of the group was found in the text.
+    """
+    return not grupo.isdisjoint(termos)
+
+
+def _contar_termos(termos: FrozenSet[int], grupo: FrozenSet[int]) -> int:
+    """
+    Number of distinct group terms found in the text.
+    """
+    return len(grupo & termos)
+
+# ======================================================================
+# Per-Message Analysis Context
+# ======================================================================
+
+# ----------------------------------------------------------------------
+# Typed Numeric Tokenizer
+# ----------------------------------------------------------------------
+
+class TokenNumerico(NamedTuple):
+    """
+    Typed numeric value found in a message.
+
+    tipo: BRL | NUMERO | PERCENTUAL | MULTIPLICADOR | PRAZO |
+          DATA | IDENTIFICADOR | REFERENCIA
+    """
+
+    tipo: str
+    valor: float
+    inicio: int
+    fim: int
+    unidade: str = ""
+
+
+_MULTIPLICADORES_PALAVRA = {
+    "dobr": 2.0, "tripl": 3.0, "quadrupl": 4.0, "quádrupl": 4.0
+}
+
+_UNIDADES_PRAZO = {
+    "h": "h", "hr": "h", "hrs": "h", "hora": "h", "horas": "h",
+    "min": "min", "minuto": "min", "minutos": "min",
+    "dia": "dia", "dias": "dia",
+    "semana": "semana", "semanas": "semana",
+    "mês": "mes", "meses": "mes"
+}
+
+
+def converter_numero_br(numero: str) -> float:
+    """
+    Parses a number written the Brazilian way.
+
+    - "3.500" / "1.234,56": '.' groups thousands, ',' is decimal
+    - "3,5": ',' is decimal
+    - "10.50": '.' followed by other than 3-digit groups is decimal
+    """
+
+    if "," in numero:
+        return float(numero.replace(".", "").replace(",", "."))
+
+    if "." in numero:
+        partes = numero.split(".")
+        if all(len(p) == 3 for p in partes[1:]):
+            return float("".join(partes))
+
+    return float(numero)
+
+
+def tokenizar_numeros(texto_lower: str) -> Tuple[TokenNumerico, ...]:
+    """
+    Extracts every typed numeric value of an already-lowered text,
+    with positions, in a single scan.
+    """
+
+    tokens = []
+
+    for m in RE_TOKENS_NUMERICOS.finditer(texto_lower):
+        inicio, fim = m.span()
+
+        if m.group("brl") is not None:
+            valor = converter_numero_br(m.group("brl_num"))
+            if m.group("brl_mil"):
+                valor *= 1000
+            tokens.append(TokenNumerico("BRL", valor, inicio, fim))
+
+        elif m.group("referencia") is not None:
+            tokens.append(TokenNumerico(
+                "REFERENCIA", float(m.group("ref_num")), inicio, fim
+            ))
+
+        elif m.group("mult_palavra") is not None:
+            palavra = m.group("mult_palavra")
+            for raiz, fator in _MULTIPLICADORES_PALAVRA.items():
+                if palavra.startswith(raiz):
+                    tokens.append(TokenNumerico(
+                        "MULTIPLICADOR", fator, inicio, fim
+                    ))
+                    break
+
+        elif m.group("data") is not None:
+            dia = m.group("data").split("/")[0]
+            tokens.append(TokenNumerico(
+                "DATA", float(dia), inicio, fim, m.group("data")
+            ))
+
+        elif m.group("identificador") is not None:
+            tokens.append(TokenNumerico(
+                "IDENTIFICADOR", float(m.group("identificador")), inicio, fim
+            ))
+
+        else:
+            valor = converter_numero_br(m.group("num"))
+
+            if m.group("pct"):
+                tokens.append(TokenNumerico("PERCENTUAL", valor, inicio, fim))
+            elif m.group("mult"):
+                tokens.append(TokenNumerico("MULTIPLICADOR", valor, inicio, fim))
+            elif m.group("unid"):
+                tokens.append(TokenNumerico(
+                    "PRAZO", valor, inicio, fim,
+                    _UNIDADES_PRAZO[m.group("unid")]
+                ))
+            elif m.group("reais"):
+                if m.group("mil"):
+                    valor *= 1000
+                tokens.append(TokenNumerico("BRL", valor, inicio, fim))
+            else:
+                tokens.append(TokenNumerico("NUMERO", valor, inicio, fim))
+
+    return tuple(tokens)
+
+
+@dataclass(frozen=True)
+class ContextoAnalise:
+    """
+    Immutable view of a message, built once and shared by every stage.
+
+    Holds the text features previously re-derived by each detector:
+    - Lowered text and keyword hits
+    - Extracted URLs
+    - Typed numeric tokens and the amounts derived from them
+      (valores_monetarios: BRL + plain numbers in text order;
+      numeros: the same amounts restricted to 0 < n < 1,000,000)
+    - Uppercase ratio and punctuation counts
+    """
+
+    texto: str
+    texto_lower: str
+    termos: FrozenSet[int]
+    urls: Tuple[str, ...]
+    tokens_numericos: Tuple[TokenNumerico, ...]
+    valores_monetarios: Tuple[float, ...]
+    numeros: Tuple[float, ...]
+    possui_valor_monetario: bool
+    possui_referencia_contrato: bool
+    proporcao_maiusculas: float
+    exclamacoes: int
+    interrogacoes: int
+
+    @property
+    def tem_link(self) -> bool:
+        return _tem_algum(self.termos, TERMOS_LINK)
+
+
+_ULTIMO_CONTEXTO: Optional[ContextoAnalise] = None
+
+
+def construir_contexto(texto: str) -> ContextoAnalise:
+    """
+    Derives every shared text feature of a message in one place.
+    """
+
+    global _ULTIMO_CONTEXTO
+
+    t = texto.lower()
+    tokens = tokenizar_numeros(t)
+
+    valores = tuple(
+        token.valor for token in tokens
+        if token.tipo in ("BRL", "NUMERO")
+    )
+
+    tipos = {token.tipo for token in tokens}
+
+    contexto = ContextoAnalise(
+        texto=texto,
+        texto_lower=t,
+        termos=varrer_termos(t),
+        urls=tuple(extrair_urls_validas(texto)),
+        tokens_numericos=tokens,
+        valores_monetarios=valores,
+        numeros=tuple(v for v in valores if 0 < v < 1_000_000),
+        possui_valor_monetario="BRL" in tipos,
+        possui_referencia_contrato=bool(
+            tipos & {"REFERENCIA", "IDENTIFICADOR"}
+        ),
+        proporcao_maiusculas=proporcao_maiusculas(texto),
+        exclamacoes=texto.count('!'),
+        interrogacoes=texto.count('?')
+    )
+
+    _ULTIMO_CONTEXTO = contexto
+    return contexto
+
+
+def obter_contexto(
+    texto: Union[str, ContextoAnalise]
+) -> ContextoAnalise:
+    """
+    Compatibility shim for stages that still receive raw text.
+
+    Returns the given context unchanged, or builds one for the text,
+    reusing the last context when the same message is evaluated again.
+    """
+
+    if isinstance(texto, ContextoAnalise):
+        return texto
+
+    ultimo = _ULTIMO_CONTEXTO
+    if ultimo is not None and (ultimo.texto is texto or ultimo.texto == texto):
+        return ultimo
+
+    return construir_contexto(texto)
+
+
+# ----------------------------------------------------------------------
+# Windowed Context (long texts)
+# ----------------------------------------------------------------------
+
+def dividir_em_janelas(
+    texto: str,
+    tamanho: int = JANELA_ANALISE_CHARS
+) -> List[Tuple[int, int]]:
+    """
+    Splits text into consecutive [inicio, fim) segments of about
+    `tamanho` chars, cut after a space so words are not split.
+    """
+
+    cortes = []
+    inicio = 0
+    total = len(texto)
+
+    while inicio < total:
+        fim = min(inicio + tamanho, total)
+
+        if fim < total:
+            espaco = texto.rfind(' ', inicio + tamanho // 2, fim)
+            if espaco != -1:
+                fim = espaco + 1
+
+        cortes.append((inicio, fim))
+        inicio = fim
+
+    return cortes
+
+
+def contextos_por_janela(
+    texto: str
+) -> Iterable[Tuple[ContextoAnalise, int, int]]:
+    """
+    Streams the analysis context of a long text, one window at a time.
+
+    Each window is a segment extended by SOBREPOSICAO_JANELA_CHARS, so
+    keywords, amounts and URLs crossing a cut are still seen whole.
+    Every yielded context merges all windows read so far, letting the
+    caller stop once its verdict is fixed.
+
+    Yields (context, windows read, windows available). At most
+    MAX_JANELAS_ANALISE windows are read: the leading ones plus the
+    last one, since chain messages often end with the link or the ask.
+    The merged `texto` holds only the segments actually read.
+    """
+
+    global _ULTIMO_CONTEXTO
+
+    cortes = dividir_em_janelas(texto)
+    total_janelas = len(cortes)
+
+    if total_janelas > MAX_JANELAS_ANALISE:
+        cortes = cortes[:MAX_JANELAS_ANALISE - 1] + cortes[-1:]
+
+    termos = set()
+    urls: Dict[str, None] = {}
+    tokens: List[TokenNumerico] = []
+    letras = 0
+    maiusculas = 0
+    exclamacoes = 0
+    interrogacoes = 0
+    segmentos: List[str] = []
+
+    for lidas, (inicio, fim) in enumerate(cortes, start=1):
+        janela = texto[inicio:fim + SOBREPOSICAO_JANELA_CHARS]
+        janela_lower = janela.lower()
+
+        termos |= varrer_termos(janela_lower)
+        urls.update(dict.fromkeys(extrair_urls_validas(janela)))
+
+        # Keep tokens starting in this segment, skipping the tail of
+        # an amount already read by the previous window
+        fim_anterior = tokens[-1].fim if tokens else 0
+
+        for token in tokenizar_numeros(janela_lower):
+            token = token._replace(
+                inicio=token.inicio + inicio,
+                fim=token.fim + inicio
+            )
+            if fim_anterior <= token.inicio < fim:
+                tokens.append(token)
+                fim_anterior = token.fim
+
+        segmento_letras = RE_LETRA.findall(texto, inicio, fim)
+        letras += len(segmento_letras)
+        maiusculas += sum(1 for c in segmento_letras if c.isupper())
+        exclamacoes += texto.count('!', inicio, fim)
+        interrogacoes += texto.count('?', inicio, fim)
+
+        segmentos.append(texto[inicio:fim])
+        lido = ''.join(segmentos)
+        valores = tuple(
+            token.valor for token in tokens
+            if token.tipo in ("BRL", "NUMERO")
+        )
+        tipos = {token.tipo for token in tokens}
+
+        contexto = ContextoAnalise(
+            texto=lido,
+            texto_lower=lido.lower(),
+            termos=frozenset(termos),
+            urls=tuple(urls),
+            tokens_numericos=tuple(tokens),
+            valores_monetarios=valores,
+            numeros=tuple(v for v in valores if 0 < v < 1_000_000),
+            possui_valor_monetario="BRL" in tipos,
+            possui_referencia_contrato=bool(
+                tipos & {"REFERENCIA", "IDENTIFICADOR"}
+            ),
+            proporcao_maiusculas=maiusculas / letras if letras else 0.0,
+            exclamacoes=exclamacoes,
+            interrogacoes=interrogacoes
+        )
+
+        _ULTIMO_CONTEXTO = contexto
+        yield contexto, lidas, total_janelas
+
+# ======================================================================
+# Semantic Signal Extraction Layer
+# ======================================================================
+
+_SINAL_PEDIDO_DINHEIRO = registrar_termos([
+    'faz um pix', 'me manda', 'me passa',
+    'me transfere', 'transfere pra', 'transfere para',
+    'me envia', 'deposita'
+])
+
+_SINAL_PROMESSA_RETORNO = registrar_termos([
+    'te devolvo', 'te pago', 'depois eu pago',
+    'te retorno', 'retorno garantido', 'lucro garantido',
+    'lucro certo', 'sem risco'
+])
+
+_SINAL_AUTORIDADE = registrar_termos([
+    'sou do banco', 'sou da receita', 'setor de fraude',
+    'central de segurança', 'suporte oficial'
+])
+_SINAL_DEPARTAMENTO = registrar_termos(['departamento'])
+_SINAL_DEPARTAMENTO_CONTEXTO = registrar_termos(['fraude', 'segurança', 'bloqueio'])
+
+_SINAL_URGENCIA = registrar_termos([
+    'urgente', 'agora', 'imediato', 'imediatamente',
+    'último aviso', 'hoje mesmo'
+])
+
+_SINAL_PROIBICAO = registrar_termos([
+    'não conta', 'não liga', 'não fala',
+    'não chama', 'segredo nosso',
+    'confidencial', 'entre nós'
+])
+
+_SINAL_RELACAO_PESSOAL = registrar_termos([
+    'você é especial', 'te amo', 'meu querido'
+])
+
+_SINAL_AMEACA = registrar_termos([
+    'bloqueio', 'cancelamento', 'prisão',
+    'será bloqueado', 'será cancelado',
+    'será suspenso', 'perderá acesso',
+    'consequências'
+])
+
+# Matched on folded text, where a bare "é golpe" would also hit
+# "e golpe" / "de fraude": only unambiguous phrasings are listed here,
+# questions are covered by the "?" rule below.
+_SINAL_INVESTIGATIVO = registrar_termos([
+    'isso é golpe', 'isso é fraude', 'será golpe'
+])
+_SINAL_INVESTIGATIVO_PERGUNTA = registrar_termos([
+    'golpe', 'seguro', 'confiável', 'fraude'
+])
+
+
+def detectar_postura_investigativa(ctx: ContextoAnalise) -> bool:
+    """
+    True when the sender is questioning the message (e.g., "isso é golpe?").
+    """
+
+    termos = ctx.termos
+
+    return _tem_algum(termos, _SINAL_INVESTIGATIVO) or (
+        ctx.interrogacoes > 0 and
+        _tem_algum(termos, _SINAL_INVESTIGATIVO_PERGUNTA)
+    )
+
+
+def extrair_sinais_semanticos(
+    texto: Union[str, ContextoAnalise]
+) -> Dict[str, float]:
+    """
+    Extracts high-level semantic indicators commonly found in scam patterns.
+
+    Each signal represents a behavioral or linguistic pattern such as:
+    - Financial requests
+    - Authority impersonation
+    - Urgency pressure
+    - Emotional manipulation
+    - Threat escalation
+    - Victim investigative awareness
+    """
+
+    ctx = obter_contexto(texto)
+    termos = ctx.termos
+    sinais: Dict[str, float] = {}
+
+    # ------------------------------------------------------------------
+    # Direct Financial Request
+    # ------------------------------------------------------------------
+    sinais['pedido_dinheiro'] = 1.0 if (
+        _tem_algum(termos, _SINAL_PEDIDO_DINHEIRO) or
+        RE_PEDIDO_DINHEIRO.search(ctx.texto_lower)
+    ) else 0.0
+
+    # ------------------------------------------------------------------
+    # Promise of Financial Return
+    # ------------------------------------------------------------------
+    sinais['promessa_retorno'] = 1.0 if (
+        _tem_algum(termos, _SINAL_PROMESSA_RETORNO)
+    ) else 0.0
+
+    # ------------------------------------------------------------------
+    # Authority Impersonation
+    # ------------------------------------------------------------------
+    sinais['autoridade'] = 1.0 if (
+        _tem_algum(termos, _SINAL_AUTORIDADE) or (
+            _tem_algum(termos, _SINAL_DEPARTAMENTO) and
+            _tem_algum(termos, _SINAL_DEPARTAMENTO_CONTEXTO)
+        )
+    ) else 0.0
+
+    # ------------------------------------------------------------------
+    # Urgency Pressure
+    # ------------------------------------------------------------------
+    count_urgencia = _contar_termos(termos, _SINAL_URGENCIA)
+    sinais['urgencia'] = min(count_urgencia * 0.8, 2.4)
+
+    # ------------------------------------------------------------------
+    # Isolation / Secrecy Attempt
+    # ------------------------------------------------------------------
+    sinais['proibicao'] = 1.2 if (
+        _tem_algum(termos, _SINAL_PROIBICAO)
+    ) else 0.0
+
+    # ------------------------------------------------------------------
+    # Emotional / Personal Bond Manipulation
+    # ------------------------------------------------------------------
+    sinais['relacao_pessoal'] = 0.7 if (
+        _tem_algum(termos, _SINAL_RELACAO_PESSOAL) or
+        RE_RELACAO_PESSOAL.search(ctx.texto_lower)
+    ) else 0.0
+
+    # ------------------------------------------------------------------
+    # Threat Escalation
+    # ------------------------------------------------------------------
+    sinais['ameaca'] = 1.1 if (
+        _tem_algum(termos, _SINAL_AMEACA)
+    ) else 0.0
+
+    # ------------------------------------------------------------------
+    # Victim Investigative Awareness (negative signal)
+    # ------------------------------------------------------------------
+    sinais['investigativo'] = -1.5 if (
+        detectar_postura_investigativa(ctx)
+    ) else 0.0
+
+    return sinais
+
+# ======================================================================
+# Psychological Pressure Index (IPP) 
+# ======================================================================
+
+def calcular_indice_pressao(
+    texto: Union[str, ContextoAnalise],
+    sinais: Dict[str, float]
+) -> float:
+    """
+    Calculates the Psychological Pressure Index (IPP).
+
+    The IPP aggregates linguistic and behavioral indicators that
+    reflect coercion tactics commonly used in scam attempts.
+
+    Components:
+    - Urgency escalation
+    - Threat signals
+    - Isolation / secrecy attempts
     - Uppercase intensity
     - Excessive exclamation usage
     """
 
-    exclamacoes = texto.count('!')
-    maiusculas_ratio = proporcao_maiusculas(texto)
+    ctx = obter_contexto(texto)
+    exclamacoes = ctx.exclamacoes
+    maiusculas_ratio = ctx.proporcao_maiusculas
 
     ipp = (
         sinais.get('urgencia', 0) * 10 +
@@ -617,9 +1866,40 @@ def calcular_indice_pressao(texto: str, sinais: Dict[str, float]) -> float:
 # Legitimate Context Handling
 # ======================================================================
 
+_CONTEXTOS_GERAIS = registrar_termos([
+    "site oficial", "aplicativo oficial", "app oficial",
+    "loja física", "atendimento presencial", "contrato assinado",
+    "documento oficial", "gov.br", "canal oficial", "central oficial"
+])
+
+_CONTEXTOS_FINANCEIROS = registrar_termos([
+    "boleto registrado", "nota fiscal", "pagamento recorrente",
+    "contrato bancário", "suporte técnico oficial",
+    "assistência autorizada"
+])
+
+
+def fatores_reducao_contexto(ctx: ContextoAnalise) -> Dict[str, float]:
+    """
+    Category multipliers that the legitimate-context reduction
+    will apply to this message (empty when none applies).
+    """
+
+    fatores: Dict[str, float] = {}
+
+    if _tem_algum(ctx.termos, _CONTEXTOS_GERAIS):
+        fatores["PHISHING"] = 0.7
+        fatores["ENGENHARIA_SOCIAL"] = 0.7
+
+    if _tem_algum(ctx.termos, _CONTEXTOS_FINANCEIROS):
+        fatores["FINANCEIRO"] = 0.6
+
+    return fatores
+
+
 def aplicar_reducao_contexto_legitimo(
     score_por_categoria: Dict[str, int],
-    texto: str
+    texto: Union[str, ContextoAnalise]
 ) -> Dict[str, int]:
     """
     Applies score reduction when strong indicators of legitimate
@@ -630,62 +1910,60 @@ def aplicar_reducao_contexto_legitimo(
     but contain structured and verifiable legitimacy signals.
     """
 
-    t = texto.lower()
+    fatores = fatores_reducao_contexto(obter_contexto(texto))
 
-    # ------------------------------------------------------------------
-    # General Institutional Context
-    # ------------------------------------------------------------------
-    contextos_gerais = [
-        "site oficial", "aplicativo oficial", "app oficial",
-        "loja física", "atendimento presencial", "contrato assinado",
-        "documento oficial", "gov.br", "canal oficial", "central oficial"
-    ]
+    for categoria, fator in fatores.items():
+        if categoria in score_por_categoria:
+            score_atual = score_por_categoria[categoria]
+            score_por_categoria[categoria] = int(score_atual * fator)
 
-    tem_contexto_geral = any(ctx in t for ctx in contextos_gerais)
+            rastrear(
+                "context_reduction_applied",
+                categoria,
+                score_atual,
+                score_por_categoria[categoria]
+            )
 
-    # ------------------------------------------------------------------
-    # Structured Financial Context
-    # ------------------------------------------------------------------
-    contextos_financeiros = [
-        "boleto registrado", "nota fiscal", "pagamento recorrente",
-        "contrato bancário", "suporte técnico oficial",
-        "assistência autorizada"
-    ]
+    return score_por_categoria
 
-    tem_contexto_financeiro = any(ctx in t for ctx in contextos_financeiros)
 
-    # ------------------------------------------------------------------
-    # Apply Reductions
-    # ------------------------------------------------------------------
-    if tem_contexto_geral:
-        for categoria in ['PHISHING', 'ENGENHARIA_SOCIAL']:
-            if categoria in score_por_categoria:
-                score_atual = score_por_categoria[categoria]
-                score_por_categoria[categoria] = int(score_atual * 0.7)
+_COBRANCA_TERMOS_SENSIVEIS = registrar_termos([
+    "senha", "token", "código",
+    "confirme seus dados"
+])
 
-                logger.info(
-                    f"context_reduction_applied | type=general "
-                    f"| category={categoria} "
-                    f"| old_score={score_atual} "
-                    f"| new_score={score_por_categoria[categoria]}"
-                )
+_COBRANCA_TERMOS_AMEACA = registrar_termos([
+    "bloqueado", "prisão",
+    "cancelado imediatamente", "último aviso"
+])
 
-    if tem_contexto_financeiro:
-        if 'FINANCEIRO' in score_por_categoria:
-            score_atual = score_por_categoria['FINANCEIRO']
-            score_por_categoria['FINANCEIRO'] = int(score_atual * 0.6)
+_COBRANCA_AMEACA_FORTE = registrar_termos([
+    "bloqueado imediatamente",
+    "prisão",
+    "último aviso",
+    "suspensão imediata"
+])
 
-            logger.info(
-                f"context_reduction_applied | type=financial "
-                f"| category=FINANCEIRO "
-                f"| old_score={score_atual} "
-                f"| new_score={score_por_categoria['FINANCEIRO']}"
-            )
+FATOR_COBRANCA_ESTRUTURADA = 0.55
 
-    return score_por_categoria
 
+def possui_cobranca_estruturada(ctx: ContextoAnalise) -> bool:
+    """
+    Pipeline billing reduction criteria: monetary value + contract or
+    installment reference, without credential requests or strong threats.
+    """
 
-def detectar_contexto_financeiro_estruturado_legitimo(texto: str) -> bool:
+    return (
+        ctx.possui_valor_monetario and
+        ctx.possui_referencia_contrato and
+        not _tem_algum(ctx.termos, _COBRANCA_TERMOS_SENSIVEIS) and
+        not _tem_algum(ctx.termos, _COBRANCA_AMEACA_FORTE)
+    )
+
+
+def detectar_contexto_financeiro_estruturado_legitimo(
+    texto: Union[str, ContextoAnalise]
+) -> bool:
     """
     Detects structured legitimate financial communication.
 
@@ -696,38 +1974,24 @@ def detectar_contexto_financeiro_estruturado_legitimo(texto: str) -> bool:
     - Does NOT include extreme threat or coercion language
     """
 
-    t = texto.lower()
+    ctx = obter_contexto(texto)
 
     # Must contain monetary value
-    if not re.search(r'r\$\s?\d+[.,]?\d*', t):
+    if not ctx.possui_valor_monetario:
         return False
 
     # Must reference contract or installment
-    referencia = any([
-        re.search(r'parcela\s?\d+', t),
-        re.search(r'n[úu]mero\s?\d+', t),
-        re.search(r'\b\d{8,}\b', t)  # long numeric identifier (e.g., contract)
-    ])
-
-    if not referencia:
+    if not ctx.possui_referencia_contrato:
         return False
 
-    # Must NOT request sensitive credentials
-    termos_sensiveis = [
-        "senha", "token", "código", "codigo",
-        "confirme seus dados"
-    ]
+    termos = ctx.termos
 
-    if any(ts in t for ts in termos_sensiveis):
+    # Must NOT request sensitive credentials
+    if _tem_algum(termos, _COBRANCA_TERMOS_SENSIVEIS):
         return False
 
     # Must NOT contain severe threat escalation
-    termos_ameaca = [
-        "bloqueado", "prisão",
-        "cancelado imediatamente", "último aviso"
-    ]
-
-    if any(ts in t for ts in termos_ameaca):
+    if _tem_algum(termos, _COBRANCA_TERMOS_AMEACA):
         return False
 
     return True
@@ -746,6 +2010,10 @@ class Heuristica:
     - peso: Scoring weight applied when triggered
     - detector: Callable responsible for detection logic
     - grupo: Optional logical grouping identifier
+    - recebe_contexto: Detector takes a ContextoAnalise instead of
+      raw text (legacy `detector(texto)` callables keep working)
+    - prerequisitos: Term IDs of which at least one must occur in the
+      text for the detector to possibly fire (empty = always runs)
     """
 
     def __init__(
@@ -754,16 +2022,48 @@ class Heuristica:
         categoria: str,
         peso: int,
         detector: Callable,
-        grupo: Optional[str] = None
+        grupo: Optional[str] = None,
+        recebe_contexto: bool = False,
+        prerequisitos: FrozenSet[int] = frozenset()
     ):
         self.nome = nome
         self.categoria = categoria
         self.peso = peso
         self.detector = detector
         self.grupo = grupo
+        self.recebe_contexto = recebe_contexto
+        self.prerequisitos = prerequisitos
+
+        # Execution counters (skips = evaluations - executions)
+        self.execucoes = 0
 
         self.validar()
 
+    def contribuicao_maxima(self) -> float:
+        """
+        Largest capped score this rule can add on its own.
+
+        Dynamic (dict-returning) detectors are unbounded here.
+        """
+
+        if self.peso <= 0:
+            return float("inf")
+
+        return min(
+            self.peso,
+            TETO_POR_CATEGORIA.get(self.categoria, TETO_PADRAO_CATEGORIA)
+        )
+
+    def executar(self, contexto: ContextoAnalise) -> Union[Dict[str, int], bool]:
+        """
+        Runs the detector with the input shape it was registered for.
+        """
+
+        if self.recebe_contexto:
+            return self.detector(contexto)
+
+        return self.detector(contexto.texto)
+
     def validar(self):
         """
         Ensures rule integrity before being registered in the engine.
@@ -821,13 +2121,42 @@ def gerar_hash_texto(texto: str) -> str:
     - Audit references
     """
 
-    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+# ======================================================================
+# Heuristic Registration Registry
+# ======================================================================
+
+HEURISTICAS_REGISTRADAS: List[Heuristica] = []
+
+# Inverted index: prerequisite term ID -> registry positions
+INDICE_PREREQUISITOS: Dict[int, List[int]] = defaultdict(list)
+_HEURISTICAS_SEM_PREREQUISITO: List[int] = []
+
+_TOTAL_AVALIACOES = 0
+
+# Registry position -> early-exit evaluation rank (built lazily)
+_RANKING_CONTRIBUICAO: Optional[Dict[int, int]] = None
+
+
+def _ids_prerequisitos(
+    prerequisitos: Optional[Iterable[Union[str, int]]]
+) -> FrozenSet[int]:
+    """
+    Normalizes declared prerequisites (terms or term IDs) to term IDs.
+    """
+
+    if not prerequisitos:
+        return frozenset()
 
-# ======================================================================
-# Heuristic Registration Registry
-# ======================================================================
+    ids = set()
+    for termo in prerequisitos:
+        if isinstance(termo, int):
+            ids.add(termo)
+        else:
+            ids |= registrar_termos([termo])
 
-HEURISTICAS_REGISTRADAS: List[Heuristica] = []
+    return frozenset(ids)
 
 
 def registrar_heuristica(
@@ -835,13 +2164,16 @@ def registrar_heuristica(
     categoria: str,
     peso: int,
     detector: Callable,
-    grupo: Optional[str] = None
+    grupo: Optional[str] = None,
+    recebe_contexto: bool = False,
+    prerequisitos: Optional[Iterable[Union[str, int]]] = None
 ):
     """
     Registers a heuristic rule in the global engine registry.
 
     - Validates rule integrity via Heuristica class
     - Appends to central registry
+    - Indexes declared prerequisite terms (any-of) for gating
     - Fails fast in development environment
     """
 
@@ -851,10 +2183,22 @@ def registrar_heuristica(
             categoria=categoria,
             peso=peso,
             detector=detector,
-            grupo=grupo
+            grupo=grupo,
+            recebe_contexto=recebe_contexto,
+            prerequisitos=_ids_prerequisitos(prerequisitos)
         )
 
+        global _RANKING_CONTRIBUICAO
+
+        posicao = len(HEURISTICAS_REGISTRADAS)
         HEURISTICAS_REGISTRADAS.append(heuristica)
+        _RANKING_CONTRIBUICAO = None
+
+        if heuristica.prerequisitos:
+            for termo_id in heuristica.prerequisitos:
+                INDICE_PREREQUISITOS[termo_id].append(posicao)
+        else:
+            _HEURISTICAS_SEM_PREREQUISITO.append(posicao)
 
     except ValueError as e:
         logger.error(
@@ -866,48 +2210,124 @@ def registrar_heuristica(
         if APP_ENV == "development":
             raise
 
+
+def selecionar_heuristicas(
+    termos: FrozenSet[int],
+    por_contribuicao: bool = False
+) -> List[Heuristica]:
+    """
+    Returns, in registration order (or early-exit rank), only the
+    heuristics whose prerequisites occur in the text (plus the
+    ungated ones).
+
+    Cost scales with the number of hit terms and relevant rules,
+    not with the size of the registry.
+    """
+
+    posicoes = set(_HEURISTICAS_SEM_PREREQUISITO)
+
+    for termo_id in termos:
+        relevantes = INDICE_PREREQUISITOS.get(termo_id)
+        if relevantes:
+            posicoes.update(relevantes)
+
+    ordem = (
+        sorted(posicoes, key=ranking_contribuicao().__getitem__)
+        if por_contribuicao else sorted(posicoes)
+    )
+
+    return [HEURISTICAS_REGISTRADAS[i] for i in ordem]
+
+
+def ranking_contribuicao() -> Dict[int, int]:
+    """
+    Early-exit evaluation rank of each registry position: descending
+    maximum contribution, so the score lower bound rises fastest.
+
+    Members of a group are ranked by the group's best rule and kept in
+    registration order, preserving the "first 2 per group" semantics.
+    """
+
+    global _RANKING_CONTRIBUICAO
+
+    if _RANKING_CONTRIBUICAO is None:
+        maximo_grupo: Dict[str, float] = defaultdict(float)
+        for heur in HEURISTICAS_REGISTRADAS:
+            if heur.grupo:
+                maximo_grupo[heur.grupo] = max(
+                    maximo_grupo[heur.grupo], heur.contribuicao_maxima()
+                )
+
+        def chave(posicao: int):
+            heur = HEURISTICAS_REGISTRADAS[posicao]
+            maximo = (
+                maximo_grupo[heur.grupo] if heur.grupo
+                else heur.contribuicao_maxima()
+            )
+            return (-maximo, heur.grupo or "", posicao)
+
+        ordem = sorted(range(len(HEURISTICAS_REGISTRADAS)), key=chave)
+        _RANKING_CONTRIBUICAO = {
+            posicao: rank for rank, posicao in enumerate(ordem)
+        }
+
+    return _RANKING_CONTRIBUICAO
+
+
+def obter_estatisticas_heuristicas() -> Dict[str, Dict[str, int]]:
+    """
+    Per-heuristic execution and skip counters for this container.
+    """
+
+    return {
+        heur.nome: {
+            "execucoes": heur.execucoes,
+            "ignoradas": _TOTAL_AVALIACOES - heur.execucoes
+        }
+        for heur in HEURISTICAS_REGISTRADAS
+    }
+
 # ======================================================================
 # Phishing Detection Utilities
 # ======================================================================
 
-def contem_link(texto: str) -> bool:
+TERMOS_LINK = registrar_termos(["http://", "https://", "www."])
+
+TERMOS_ENTIDADE_SENSIVEL = registrar_termos([
+    "banco", "caixa", "itaú", "bradesco", "santander",
+    "nubank", "receita", "gov", "whatsapp", "email",
+    "google", "apple", "microsoft", "inter", "c6"
+])
+
+TERMOS_CREDENCIAIS = registrar_termos([
+    "senha", "login", "código",
+    "token", "confirme seus dados",
+    "atualize seus dados", "verifique sua conta"
+])
+
+
+def contem_link(texto: Union[str, ContextoAnalise]) -> bool:
     """
     Detects presence of URLs or web references.
 
     Used as a primary phishing signal trigger.
     """
-    return bool(re.search(r'https?://|www\.', texto.lower()))
+    return _tem_algum(obter_contexto(texto).termos, TERMOS_LINK)
 
 
-def menciona_entidade_sensivel(texto: str) -> bool:
+def menciona_entidade_sensivel(texto: Union[str, ContextoAnalise]) -> bool:
     """
     Detects references to sensitive or high-value entities
     commonly impersonated in phishing attempts.
     """
-
-    entidades = [
-        "banco", "caixa", "itau", "itaú", "bradesco", "santander",
-        "nubank", "receita", "gov", "whatsapp", "email",
-        "google", "apple", "microsoft", "inter", "c6"
-    ]
-
-    t = texto.lower()
-    return any(e in t for e in entidades)
+    return _tem_algum(obter_contexto(texto).termos, TERMOS_ENTIDADE_SENSIVEL)
 
 
-def pede_credenciais(texto: str) -> bool:
+def pede_credenciais(texto: Union[str, ContextoAnalise]) -> bool:
     """
     Detects explicit credential harvesting attempts.
     """
-
-    padroes = [
-        "senha", "login", "código", "codigo",
-        "token", "confirme seus dados",
-        "atualize seus dados", "verifique sua conta"
-    ]
-
-    t = texto.lower()
-    return any(p in t for p in padroes)
+    return _tem_algum(obter_contexto(texto).termos, TERMOS_CREDENCIAIS)
 
 
 def extrair_urls_validas(texto: str) -> List[str]:
@@ -923,10 +2343,7 @@ def extrair_urls_validas(texto: str) -> List[str]:
     if not texto:
         return []
 
-    candidatos = re.findall(
-        r"https?://[^\s<>'\"]+|www\.[^\s<>'\"]+|[a-zA-Z0-9-]+\.[a-zA-Z]{2,}",
-        texto.lower()
-    )
+    candidatos = RE_URL_CANDIDATA.findall(texto.lower())
 
     urls_validas = []
 
@@ -956,127 +2373,174 @@ def extrair_urls_validas(texto: str) -> List[str]:
 
     return list(set(urls_validas))
 
+# ======================================================================
+# Declarative Rule Pack (signatures, data rules, caps, combinations)
+# ======================================================================
+
+CAMPOS_GRUPO_TERMOS = ("must_any", "and_any")
+
+
+def _validar_grupos_termos(nome: str, cfg: Dict[str, Any]):
+    grupos = [campo for campo in CAMPOS_GRUPO_TERMOS if campo in cfg]
+
+    if not grupos:
+        raise ValueError(f"Regra '{nome}' sem must_any/and_any")
+
+    for campo in grupos:
+        termos = cfg[campo]
+        if (
+            not isinstance(termos, list) or not termos or
+            not all(isinstance(t, str) and t.strip() for t in termos)
+        ):
+            raise ValueError(
+                f"Regra '{nome}': {campo} deve ser lista não vazia de termos"
+            )
+
+
+def validar_pacote_regras(pacote: Dict[str, Any]):
+    """
+    Structural validation of a rule pack (fails fast at cold start).
+
+    Format:
+    - assinaturas: {KEY: {must_any, and_any, [peso], [categoria]}}
+    - regras: [{nome, categoria, peso, [grupo], must_any, [and_any]}]
+    - tetos: {CATEGORIA: cap}, teto_padrao: cap for unlisted categories
+    - combinacoes: [{categorias: [...], bonus}]
+    """
+
+    for chave in ("assinaturas", "tetos", "combinacoes"):
+        if chave not in pacote:
+            raise ValueError(f"Pacote de regras sem '{chave}'")
+
+    for key, cfg in pacote["assinaturas"].items():
+        _validar_grupos_termos(key, cfg)
+
+    nomes = set()
+    for regra in pacote.get("regras", []):
+        nome = regra.get("nome")
+        if not nome or nome in nomes:
+            raise ValueError(f"Regra sem nome ou duplicada: {nome}")
+        nomes.add(nome)
+
+        _validar_grupos_termos(nome, regra)
+
+        if not isinstance(regra.get("peso"), int) or not regra.get("categoria"):
+            raise ValueError(f"Regra '{nome}' exige peso (int) e categoria")
+
+    for categoria, teto in pacote["tetos"].items():
+        if not isinstance(teto, int):
+            raise ValueError(f"Teto inválido para {categoria}: {teto}")
+
+    for combo in pacote["combinacoes"]:
+        if not combo.get("categorias") or not isinstance(combo.get("bonus"), int):
+            raise ValueError(f"Combinação inválida: {combo}")
+
+
+def calcular_hash_regras(pacote: Dict[str, Any]) -> str:
+    """
+    Content hash of a rule pack (key order independent).
+    """
+
+    canonico = json.dumps(
+        pacote,
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":")
+    )
+
+    return hashlib.sha256(canonico.encode("utf-8")).hexdigest()
+
+
+def carregar_pacote_regras(caminho: str = REGRAS_PATH) -> Dict[str, Any]:
+    """
+    Loads and validates the JSON rule pack.
+    """
+
+    with open(caminho, encoding="utf-8") as f:
+        pacote = json.load(f)
+
+    validar_pacote_regras(pacote)
+
+    logger.info(
+        f"rule_pack_loaded "
+        f"| path={caminho} "
+        f"| version={pacote.get('versao', 'n/a')} "
+        f"| signatures={len(pacote['assinaturas'])} "
+        f"| rules={len(pacote.get('regras', []))}"
+    )
+
+    return pacote
+
+
+PACOTE_REGRAS = carregar_pacote_regras()
+HASH_REGRAS = calcular_hash_regras(PACOTE_REGRAS)
+
 # ======================================================================
 # Brazilian Scam Signatures (Behavioral Patterns)
 # ======================================================================
 
-SCAM_SIGNATURES_BR = {
-    "CONTATO_CLONADO": {
-        "must_any": [
-            "troquei de numero", "troquei de número", "meu novo numero",
-            "novo chip", "mudei de numero", "perdi meu chip"
-        ],
-        "and_any": [
-            "pix", "me ajuda", "urgente",
-            "preciso pagar", "transfere"
-        ]
-    },
-    "PEDIDO_CODIGO": {
-        "must_any": [
-            "codigo", "código", "token",
-            "sms", "código de verificação"
-        ],
-        "and_any": [
-            "me manda", "me passa",
-            "por engano", "pra confirmar", "recebeu"
-        ]
-    },
-    "ROMANCE_GOLPE": {
-        "must_any": [
-            "você é especial", "meu anjo",
-            "amor da minha vida", "te amo muito",
-            "meu amor"
-        ],
-        "and_any": [
-            "hospital", "aluguel",
-            "passagem", "emergência",
-            "preciso de ajuda"
-        ]
-    },
-    "CRISE_FAMILIAR": {
-        "must_any": [
-            "sequestrado", "em cativeiro",
-            "tô em perigo", "me sequestraram"
-        ],
-        "and_any": [
-            "não conta", "não chama",
-            "pix", "transfere", "polícia"
-        ]
-    },
-    "TRABALHO_TAXA": {
-        "must_any": [
-            "vagas limitadas", "home office",
-            "trabalho simples", "trabalhe de casa",
-            "ganhe dinheiro fácil"
-        ],
-        "and_any": [
-            "taxa", "pagar para começar",
-            "depósito", "investimento inicial"
-        ]
-    },
-    "PROMESSA_DINHEIRO_FACIL": {
-        "must_any": [
-            "lucro garantido", "sem risco",
-            "100% garantido", "multiplica",
-            "renda extra", "ganhe até",
-            "sem esforço"
-        ]
-    },
-    "SIGILO": {
-        "must_any": [
-            "não conta pra ninguém",
-            "segredo nosso",
-            "entre nós",
-            "confidencial",
-            "não espalha"
-        ]
-    },
-    "FALSA_CENTRAL": {
-        "must_any": [
-            "central de segurança",
-            "departamento de fraude",
-            "verificação de conta",
-            "bloqueio preventivo"
-        ],
-        "and_any": [
-            "confirme seus dados",
-            "atualize",
-            "senha",
-            "token"
-        ]
-    }
-}
+SCAM_SIGNATURES_BR: Dict[str, Dict[str, Any]] = PACOTE_REGRAS["assinaturas"]
 
 
-def _contains_any(texto: str, termos: list) -> bool:
+def compilar_assinaturas() -> Dict[str, Dict[str, FrozenSet[int]]]:
     """
-    Utility matcher for signature keyword groups.
+    Registers every signature keyword group in the shared vocabulary
+    and returns the groups as term-ID sets.
     """
-    return any(termo in texto for termo in termos)
 
+    return {
+        key: {
+            grupo: registrar_termos(termos)
+            for grupo, termos in cfg.items()
+            if grupo in CAMPOS_GRUPO_TERMOS
+        }
+        for key, cfg in SCAM_SIGNATURES_BR.items()
+    }
+
+
+_ASSINATURAS_COMPILADAS = compilar_assinaturas()
 
-def match_signature(texto_lower: str, key: str) -> bool:
+
+def match_signature(
+    texto_lower: Union[str, ContextoAnalise],
+    key: str
+) -> bool:
     """
     Evaluates whether a given signature configuration
     matches the provided text.
     """
 
-    cfg = SCAM_SIGNATURES_BR.get(key)
+    cfg = _ASSINATURAS_COMPILADAS.get(key)
     if not cfg:
         return False
 
-    if "must_any" in cfg:
-        if not _contains_any(texto_lower, cfg["must_any"]):
-            return False
+    termos = obter_contexto(texto_lower).termos
 
-    if "and_any" in cfg:
-        if not _contains_any(texto_lower, cfg["and_any"]):
+    for grupo in cfg.values():
+        if not _tem_algum(termos, grupo):
             return False
 
     return True
 
 
-def detectar_comportamental_full(texto: str) -> Union[Dict[str, int], bool]:
+_CONTEXTO_FINANCEIRO = registrar_termos([
+    'r$', 'reais', 'pix', 'transferir', 'depositar',
+    'pagar', 'valor', 'dinheiro', 'grana'
+])
+
+_VERBOS_PROPOSTA = registrar_termos([
+    'invista', 'investe', 'deposite',
+    'pague', 'transfira', 'ganhe', 'multiplica'
+])
+
+_VERBOS_RELATO = registrar_termos([
+    'recebi', 'paguei', 'transferi', 'ganhei'
+])
+
+
+def detectar_comportamental_full(
+    texto: Union[str, ContextoAnalise]
+) -> Union[Dict[str, int], bool]:
     """
     Full behavioral detection layer for Brazilian scam patterns.
 
@@ -1085,7 +2549,8 @@ def detectar_comportamental_full(texto: str) -> Union[Dict[str, int], bool]:
     - Financial escalation detection
     """
 
-    texto_lower = texto.lower()
+    ctx = obter_contexto(texto)
+    termos = ctx.termos
     categorias: Dict[str, int] = {}
 
     # ------------------------------------------------------------------
@@ -1093,60 +2558,34 @@ def detectar_comportamental_full(texto: str) -> Union[Dict[str, int], bool]:
     # ------------------------------------------------------------------
     signatures_detectadas = []
 
-    for key in SCAM_SIGNATURES_BR:
-        if match_signature(texto_lower, key):
+    for key, cfg in SCAM_SIGNATURES_BR.items():
+        if match_signature(ctx, key):
             signatures_detectadas.append(key)
-            categorias["ENGENHARIA_SOCIAL"] = (
-                categorias.get("ENGENHARIA_SOCIAL", 0) + PESO_SIGNATURE_MATCH
+            categoria = cfg.get("categoria", "ENGENHARIA_SOCIAL")
+            categorias[categoria] = (
+                categorias.get(categoria, 0)
+                + cfg.get("peso", PESO_SIGNATURE_MATCH)
             )
 
     if signatures_detectadas:
-        logger.info(
-            f"signature_match_detected "
-            f"| signatures={','.join(signatures_detectadas)}"
-        )
+        rastrear("signature_match_detected", *signatures_detectadas)
 
     # ------------------------------------------------------------------
     # Financial Escalation Pattern Detection
     # ------------------------------------------------------------------
-    contexto_financeiro = any(term in texto_lower for term in [
-        'r$', 'reais', 'pix', 'transferir', 'depositar',
-        'pagar', 'valor', 'dinheiro', 'grana'
-    ])
+    contexto_financeiro = _tem_algum(termos, _CONTEXTO_FINANCEIRO)
 
     if contexto_financeiro:
 
-        verbos_proposta = [
-            'invista', 'investe', 'deposite',
-            'pague', 'transfira', 'ganhe', 'multiplica'
-        ]
-
-        verbos_relato = [
-            'recebi', 'paguei', 'transferi', 'ganhei'
-        ]
-
-        tem_proposta = any(v in texto_lower for v in verbos_proposta)
-        tem_relato = any(v in texto_lower for v in verbos_relato)
+        tem_proposta = _tem_algum(termos, _VERBOS_PROPOSTA)
+        tem_relato = _tem_algum(termos, _VERBOS_RELATO)
 
         if tem_proposta or not tem_relato:
 
-            valores_raw = re.findall(
-                r'(?:r\$\s*)?(\d{1,6}(?:[.,]\d{2,3})?)',
-                texto_lower
-            )
+            valores_float = ctx.valores_monetarios
 
-            if len(valores_raw) >= 2:
+            if len(valores_float) >= 2:
                 try:
-                    valores_float = []
-
-                    for v in valores_raw:
-                        v_clean = v.replace(',', '.')
-                        if v_clean.count('.') > 1:
-                            partes = v_clean.split('.')
-                            v_clean = ''.join(partes[:-1]) + '.' + partes[-1]
-
-                        valores_float.append(float(v_clean))
-
                     for i in range(len(valores_float) - 1):
                         x = valores_float[i]
                         y = valores_float[i + 1]
@@ -1160,33 +2599,75 @@ def detectar_comportamental_full(texto: str) -> Union[Dict[str, int], bool]:
                                     + PESO_PROGRESSAO_FINANCEIRA
                                 )
 
-                                logger.info(
-                                    f"financial_progression_detected "
-                                    f"| from={x} | to={y} "
-                                    f"| ratio={ratio:.1f}"
+                                rastrear(
+                                    "financial_progression_detected",
+                                    x, y, round(ratio, 1)
                                 )
 
                                 break
 
-                except (ValueError, ZeroDivisionError):
+                except ZeroDivisionError:
                     pass
 
     return categorias if categorias else False
 
 
+def _prerequisitos_comportamentais() -> Optional[FrozenSet[int]]:
+    """
+    Any-of terms required by the behavioral layer: the first required
+    group of every signature plus the financial context terms.
+    """
+
+    requisitos = set(_CONTEXTO_FINANCEIRO)
+
+    for cfg in _ASSINATURAS_COMPILADAS.values():
+        grupo = cfg.get("must_any") or cfg.get("and_any")
+        if not grupo:
+            return None  # Unconditional signature: cannot be gated
+        requisitos |= grupo
+
+    return frozenset(requisitos)
+
+
 registrar_heuristica(
     "Camada comportamental BR",
     "ENGENHARIA_SOCIAL",
     0,
-    detectar_comportamental_full
+    detectar_comportamental_full,
+    recebe_contexto=True,
+    prerequisitos=_prerequisitos_comportamentais()
 )
 
 # ======================================================================
 # Unrealistic Financial Return Heuristic (v5.1)
 # ======================================================================
 
+_RETORNO_VERBOS_ENVIO = registrar_termos([
+    "pagar", "pague", "envie", "enviar",
+    "depositar", "transferir", "pix",
+    "investir", "aplicar"
+])
+
+_RETORNO_VERBOS_RETORNO = registrar_termos([
+    "receber", "devolver", "ganhar",
+    "lucro", "retorno", "dobrar",
+    "triplicar", "multiplicar"
+])
+
+_RETORNO_INTENSIFICADORES = registrar_termos([
+    "garantido", "lucro certo", "sem risco",
+    "renda fácil", "retorno imediato",
+    "oportunidade única", "só hoje"
+])
+
+_RETORNO_REDUTORES = registrar_termos([
+    "cashback", "troco", "reembolso",
+    "estorno", "restituição", "desconto"
+])
+
+
 def detectar_retorno_financeiro_irreal(
-    texto: str
+    texto: Union[str, ContextoAnalise]
 ) -> Union[Dict[str, int], bool]:
     """
     Detects unrealistic financial return promises.
@@ -1200,40 +2681,27 @@ def detectar_retorno_financeiro_irreal(
     - Applies legitimacy reducers
     """
 
-    t = texto.lower()
-
-    verbos_envio = [
-        "pagar", "pague", "envie", "enviar",
-        "depositar", "transferir", "pix",
-        "investir", "aplicar"
-    ]
-
-    verbos_retorno = [
-        "receber", "devolver", "ganhar",
-        "lucro", "retorno", "dobrar",
-        "triplicar", "multiplicar"
-    ]
+    ctx = obter_contexto(texto)
+    termos = ctx.termos
 
     # Must contain both send and return semantics
-    if not any(v in t for v in verbos_envio):
-        return False
-
-    if not any(v in t for v in verbos_retorno):
+    if not _tem_algum(termos, _RETORNO_VERBOS_ENVIO):
         return False
 
-    # Extract numeric values
-    numeros = re.findall(r'\b\d{1,6}\b', t)
-    numeros = [int(n) for n in numeros if 0 < int(n) < 1_000_000]
-
-    if len(numeros) < 2:
+    if not _tem_algum(termos, _RETORNO_VERBOS_RETORNO):
         return False
 
-    x, y = numeros[0], numeros[1]
+    # Return ratio: first two amounts, or an explicit multiplier
+    # ("2x", "dobro") when the message states it directly
+    numeros = ctx.numeros
+    ratio = 0.0
 
-    if y <= x:
-        return False
+    if len(numeros) >= 2 and numeros[1] > numeros[0]:
+        ratio = numeros[1] / numeros[0]
 
-    ratio = y / x
+    for token in ctx.tokens_numericos:
+        if token.tipo == "MULTIPLICADOR":
+            ratio = max(ratio, token.valor)
 
     if ratio < 1.5:
         return False
@@ -1251,22 +2719,11 @@ def detectar_retorno_financeiro_irreal(
         score_es = 60
 
     # Intensifiers
-    intensificadores = [
-        "garantido", "lucro certo", "sem risco",
-        "renda fácil", "retorno imediato",
-        "oportunidade única", "só hoje"
-    ]
-
-    if any(p in t for p in intensificadores):
+    if _tem_algum(termos, _RETORNO_INTENSIFICADORES):
         score_es += 20
 
     # Legitimate context reducers
-    redutores = [
-        "cashback", "troco", "reembolso",
-        "estorno", "restituição", "desconto"
-    ]
-
-    if any(p in t for p in redutores):
+    if _tem_algum(termos, _RETORNO_REDUTORES):
         score_es -= 25
 
     if score_es <= 0:
@@ -1278,11 +2735,9 @@ def detectar_retorno_financeiro_irreal(
     if ratio >= 5:
         resultado["FINANCEIRO"] = 25
 
-    logger.info(
-        f"unrealistic_return_detected "
-        f"| base={x} | target={y} "
-        f"| ratio={ratio:.1f}x "
-        f"| score={score_es}"
+    rastrear(
+        "unrealistic_return_detected",
+        numeros[:2], round(ratio, 1), score_es
     )
 
     return resultado
@@ -1292,15 +2747,166 @@ registrar_heuristica(
     nome="Promessa de retorno financeiro irreal",
     categoria="ENGENHARIA_SOCIAL",
     peso=0,
-    detector=detectar_retorno_financeiro_irreal
+    detector=detectar_retorno_financeiro_irreal,
+    recebe_contexto=True,
+    prerequisitos=_RETORNO_VERBOS_ENVIO
+)
+
+# ======================================================================
+# Amount at Stake Heuristic (prize, unlock fee, threat, return rate)
+# ======================================================================
+
+# A payout offered to the recipient ("você ganhou R$ 1.847")
+_VALOR_PREMIO = registrar_termos([
+    "ganhou", "contemplado", "sorteado", "selecionado para receber",
+    "aprovado para receber", "direito a", "liberado no valor",
+    "para receber", "a receber", "resgatar", "acumulou", "acumulado"
+])
+
+# A fee that must be paid before the payout is released
+_VALOR_TAXA = registrar_termos([
+    "taxa", "custas", "frete de", "tarifa de liberação"
+])
+_VALOR_LIBERACAO = registrar_termos([
+    "liberar", "liberação", "receber", "resgatar", "ativar",
+    "participar", "despacho", "prosseguir", "resgate"
+])
+
+# An amount put at risk to force an immediate action
+_VALOR_AMEACA = registrar_termos([
+    "multa", "dívida", "bloquead", "retido", "em risco",
+    "negativad", "perderá", "perder o valor", "será cancelado"
+])
+
+# How the bait is collected: payment or personal data
+_VALOR_COLETA = registrar_termos([
+    "pague", "pagar", "deposite", "pix", "confirme", "informe",
+    "seus dados", "dados bancários", "senha", "cpf"
+])
+
+# An amount demanded for an immediate transfer
+_VALOR_PEDIDO = registrar_termos([
+    "faz pix", "faz um pix", "faça o pix", "faça um pix",
+    "me devolve", "devolva"
+])
+_VALOR_IMEDIATO = registrar_termos(["agora", "urgente"])
+
+# Return rate stated per period ("30% ao mês")
+_VALOR_PERIODO = registrar_termos([
+    "ao mês", "ao dia", "por dia", "por mês", "por semana", "a.m."
+])
+RENDIMENTO_IRREAL_PCT = 10
+
+
+def detectar_valor_em_jogo(
+    texto: Union[str, ContextoAnalise]
+) -> Union[Dict[str, int], bool]:
+    """
+    Detects an amount used as bait or leverage.
+
+    Patterns (any one fires, scored once):
+    - Prize/benefit amount offered to the recipient
+    - Fee required to release a payout
+    - Amount threatened (fine, debt, blocked or retained funds)
+    - Return rate of RENDIMENTO_IRREAL_PCT% or more per period
+
+    Replaces the signal the old free-form number parser produced by
+    accident, from typed BRL/percentage tokens.
+    """
+
+    ctx = obter_contexto(texto)
+    termos = ctx.termos
+    tipos = {token.tipo for token in ctx.tokens_numericos}
+
+    padrao = None
+
+    if "BRL" in tipos:
+        if (
+            _tem_algum(termos, _VALOR_TAXA) and
+            _tem_algum(termos, _VALOR_LIBERACAO)
+        ):
+            padrao = "taxa_liberacao"
+        elif _tem_algum(termos, _VALOR_PREMIO):
+            padrao = "premio"
+        elif _tem_algum(termos, _VALOR_AMEACA):
+            padrao = "ameaca"
+        elif (
+            _tem_algum(termos, _VALOR_PEDIDO) and
+            _tem_algum(termos, _VALOR_IMEDIATO)
+        ):
+            padrao = "pedido"
+
+    if padrao is None and _tem_algum(termos, _VALOR_PERIODO):
+        if any(
+            token.tipo == "PERCENTUAL" and
+            token.valor >= RENDIMENTO_IRREAL_PCT
+            for token in ctx.tokens_numericos
+        ):
+            padrao = "rendimento"
+
+    if padrao is None:
+        return False
+
+    rastrear("amount_at_stake_detected", padrao)
+
+    resultado = {"FINANCEIRO": PESO_VALOR_EM_JOGO}
+
+    # Winnings or a paid unlock with a link or a payment/data request
+    # is the bait itself (a plain "you got R$ 10 cashback" is not)
+    if padrao in ("premio", "taxa_liberacao") and (
+        ctx.urls or _tem_algum(termos, _VALOR_COLETA)
+    ):
+        resultado["ENGENHARIA_SOCIAL"] = PESO_VALOR_EM_JOGO
+
+    return resultado
+
+
+registrar_heuristica(
+    nome="Valor usado como isca ou ameaça",
+    categoria="FINANCEIRO",
+    peso=0,
+    detector=detectar_valor_em_jogo,
+    recebe_contexto=True,
+    prerequisitos=_CONTEXTO_FINANCEIRO | _VALOR_PERIODO
 )
 
 # ======================================================================
 # Fake Payment Receipt Heuristic (Critical Pattern)
 # ======================================================================
 
+_COMPROVANTE_MENCAO = registrar_termos([
+    'comprovante', 'comprovante de pagamento', 'comprovante pix'
+])
+_COMPROVANTE_RECIBO = registrar_termos(['recibo'])
+_COMPROVANTE_PIX = registrar_termos(['pix'])
+
+_COMPROVANTE_CONFIRMACAO = registrar_termos([
+    'pode confirmar', 'confirma o recebimento', 'confirma aí'
+])
+_COMPROVANTE_PERGUNTA_RECEBIMENTO = registrar_termos(['chegou', 'recebeu'])
+
+_COMPROVANTE_PROCESSAMENTO = registrar_termos([
+    'processamento', 'em processamento'
+])
+
+_COMPROVANTE_URGENCIA = registrar_termos([
+    'urgente', 'urgência',
+    'agora', 'já está', 'esperando'
+])
+
+_COMPROVANTE_JUSTIFICATIVAS = registrar_termos([
+    'motoboy', 'entrega',
+    'produto', 'mercadoria',
+    'caminho'
+])
+
+_COMPROVANTE_DEBITO_PREMATURO = registrar_termos([
+    'já foi debitado'
+])
+
+
 def detectar_comprovante_falso(
-    texto: str
+    texto: Union[str, ContextoAnalise]
 ) -> Union[Dict[str, int], bool]:
     """
     Detects fake PIX payment receipt scams.
@@ -1313,17 +2919,18 @@ def detectar_comprovante_falso(
     - Claims of debit before confirmation
     """
 
-    t = texto.lower()
+    ctx = obter_contexto(texto)
+    termos = ctx.termos
 
     # ------------------------------------------------------------------
     # Must indicate receipt context
     # ------------------------------------------------------------------
-    tem_comprovante = any([
-        'comprovante' in t,
-        'comprovante de pagamento' in t,
-        'comprovante pix' in t,
-        'recibo' in t and 'pix' in t
-    ])
+    tem_comprovante = (
+        _tem_algum(termos, _COMPROVANTE_MENCAO) or (
+            _tem_algum(termos, _COMPROVANTE_RECIBO) and
+            _tem_algum(termos, _COMPROVANTE_PIX)
+        )
+    )
 
     if not tem_comprovante:
         return False
@@ -1334,56 +2941,44 @@ def detectar_comprovante_falso(
     # ------------------------------------------------------------------
     # 1. Confirmation pressure after receipt
     # ------------------------------------------------------------------
-    pede_confirmacao = any([
-        'pode confirmar' in t,
-        'confirma o recebimento' in t,
-        'confirma aí' in t,
-        'chegou' in t and '?' in texto,
-        'recebeu' in t and '?' in texto
-    ])
+    pede_confirmacao = (
+        _tem_algum(termos, _COMPROVANTE_CONFIRMACAO) or (
+            _tem_algum(termos, _COMPROVANTE_PERGUNTA_RECEBIMENTO) and
+            ctx.interrogacoes > 0
+        )
+    )
 
     if pede_confirmacao:
         score += 50
-        logger.info("fake_receipt_detected | reason=confirmation_pressure")
+        rastrear("fake_receipt_detected:confirmation_pressure")
 
     # ------------------------------------------------------------------
     # 2. "Transaction processing" indicator (high severity)
     # ------------------------------------------------------------------
-    if 'processamento' in t or 'em processamento' in t:
+    if _tem_algum(termos, _COMPROVANTE_PROCESSAMENTO):
         score += 60
-        logger.info("fake_receipt_detected | reason=processing_status")
+        rastrear("fake_receipt_detected:processing_status")
 
     # ------------------------------------------------------------------
     # 3. Urgency escalation
     # ------------------------------------------------------------------
-    urgencia_termos = [
-        'urgente', 'urgência',
-        'agora', 'já está', 'esperando'
-    ]
-
-    if any(u in t for u in urgencia_termos):
+    if _tem_algum(termos, _COMPROVANTE_URGENCIA):
         score += 30
-        logger.info("fake_receipt_detected | reason=urgency")
+        rastrear("fake_receipt_detected:urgency")
 
     # ------------------------------------------------------------------
     # 4. Delivery / product justification
     # ------------------------------------------------------------------
-    justificativas = [
-        'motoboy', 'entrega',
-        'produto', 'mercadoria',
-        'caminho'
-    ]
-
-    if any(j in t for j in justificativas):
+    if _tem_algum(termos, _COMPROVANTE_JUSTIFICATIVAS):
         score += 25
-        logger.info("fake_receipt_detected | reason=delivery_justification")
+        rastrear("fake_receipt_detected:delivery_justification")
 
     # ------------------------------------------------------------------
     # 5. Premature debit claim
     # ------------------------------------------------------------------
-    if 'já foi debitado' in t or 'ja foi debitado' in t:
+    if _tem_algum(termos, _COMPROVANTE_DEBITO_PREMATURO):
         score += 40
-        logger.info("fake_receipt_detected | reason=premature_debit_claim")
+        rastrear("fake_receipt_detected:premature_debit_claim")
 
     if score > 0:
         categoria['FALSO_COMPROVANTE'] = score
@@ -1397,11 +2992,48 @@ registrar_heuristica(
     nome="Comprovante de PIX falso",
     categoria="FALSO_COMPROVANTE",
     peso=0,
-    detector=detectar_comprovante_falso
+    detector=detectar_comprovante_falso,
+    recebe_contexto=True,
+    prerequisitos=_COMPROVANTE_MENCAO | _COMPROVANTE_RECIBO
 )
 
 
-def detectar_boleto_falso(texto: str) -> Union[Dict[str, int], bool]:
+_BOLETO_MENCAO = registrar_termos([
+    'boleto', 'código de barras', 'linha digitável'
+])
+
+_BOLETO_ALTERACAO_DADOS = registrar_termos([
+    'mudança de conta', 'nova conta',
+    'dados bancários alterados', 'atualização bancária'
+])
+
+_BOLETO_URGENCIA = registrar_termos([
+    'vence hoje', 'urgente', 'imediato', '24h', '24 horas'
+])
+_BOLETO_HOJE = registrar_termos(['hoje'])
+_BOLETO_PAGAR = registrar_termos(['pagar'])
+
+_BOLETO_LINK = registrar_termos([
+    'http://', 'https://', 'www.', 'clique aqui'
+])
+_BOLETO_ACESSE = registrar_termos(['acesse'])
+_BOLETO_PALAVRA_LINK = registrar_termos(['link'])
+_BOLETO_PDF = registrar_termos(['.pdf', 'arquivo pdf', 'anexo pdf'])
+
+_BOLETO_DESCONTO = registrar_termos(['desconto'])
+_BOLETO_HOJE_AGORA = registrar_termos(['hoje', 'agora'])
+_BOLETO_PAGUE_AGORA = registrar_termos(['pague agora'])
+_BOLETO_GANHE = registrar_termos(['ganhe'])
+_BOLETO_ANTECIPACAO = registrar_termos(['antecipação'])
+
+_BOLETO_AMEACA = registrar_termos([
+    'bloqueio', 'suspensão', 'suspenso', 'cancelamento'
+])
+
+
+def detectar_boleto_falso(
+    texto: Union[str, ContextoAnalise]
+) -> Union[Dict[str, int], bool]:
     """
     Detecta golpes de boleto falso.
     
@@ -1414,89 +3046,66 @@ def detectar_boleto_falso(texto: str) -> Union[Dict[str, int], bool]:
     
     NOVO: Requisito do Luan para detectar boletos fraudulentos
     """
-    t = texto.lower()
+    termos = obter_contexto(texto).termos
     
     # Deve mencionar boleto
-    tem_boleto = any([
-        'boleto' in t,
-        'código de barras' in t,
-        'codigo de barras' in t,
-        'linha digitável' in t,
-        'linha digitavel' in t
-    ])
-    
-    if not tem_boleto:
+    if not _tem_algum(termos, _BOLETO_MENCAO):
         return False
     
     score = 0
     categoria: Dict[str, int] = {}
     
     # 1. Boleto + alteração de dados bancários
-    alteracao_dados = any([
-        'mudança de conta' in t,
-        'mudanca de conta' in t,
-        'nova conta' in t,
-        'dados bancários alterados' in t,
-        'dados bancarios alterados' in t,
-        'atualização bancária' in t,
-        'atualizacao bancaria' in t
-    ])
-    
-    if alteracao_dados:
+    if _tem_algum(termos, _BOLETO_ALTERACAO_DADOS):
         score += 70
-        logger.info("fake_boleto_detected | reason=bank_data_change")
+        rastrear("fake_boleto_detected:bank_data_change")
     
     # 2. Boleto + urgência extrema
-    urgencia = any([
-        'vence hoje' in t,
-        'hoje' in t and 'pagar' in t,
-        'urgente' in t,
-        'imediato' in t,
-        '24h' in t or '24 horas' in t
-    ])
+    urgencia = (
+        _tem_algum(termos, _BOLETO_URGENCIA) or (
+            _tem_algum(termos, _BOLETO_HOJE) and
+            _tem_algum(termos, _BOLETO_PAGAR)
+        )
+    )
     
     if urgencia:
         score += 40
-        logger.info("fake_boleto_detected | reason=urgency")
+        rastrear("fake_boleto_detected:urgency")
     
     # 3. Boleto + link (não PDF)
-    tem_link = any([
-        'http://' in t,
-        'https://' in t,
-        'www.' in t,
-        'clique aqui' in t,
-        'acesse' in t and 'link' in t
-    ])
+    tem_link = (
+        _tem_algum(termos, _BOLETO_LINK) or (
+            _tem_algum(termos, _BOLETO_ACESSE) and
+            _tem_algum(termos, _BOLETO_PALAVRA_LINK)
+        )
+    )
     
     # Se tem link mas NÃO menciona PDF, é suspeito
-    menciona_pdf = '.pdf' in t or 'arquivo pdf' in t or 'anexo pdf' in t
+    menciona_pdf = _tem_algum(termos, _BOLETO_PDF)
     
     if tem_link and not menciona_pdf:
         score += 50
-        logger.info("fake_boleto_detected | reason=link_not_pdf")
+        rastrear("fake_boleto_detected:link_not_pdf")
     
     # 4. Boleto + desconto por antecipação (tática de pressão)
-    desconto_pressao = any([
-        'desconto' in t and ('hoje' in t or 'agora' in t),
-        'pague agora' in t and 'ganhe' in t,
-        'antecipação' in t and 'desconto' in t
-    ])
+    tem_desconto = _tem_algum(termos, _BOLETO_DESCONTO)
+    desconto_pressao = (
+        (tem_desconto and _tem_algum(termos, _BOLETO_HOJE_AGORA)) or
+        (
+            _tem_algum(termos, _BOLETO_PAGUE_AGORA) and
+            _tem_algum(termos, _BOLETO_GANHE)
+        ) or
+        (tem_desconto and _tem_algum(termos, _BOLETO_ANTECIPACAO))
+    )
     
     if desconto_pressao:
         score += 35
-        logger.info("fake_boleto_detected | reason=discount_pressure")
+        rastrear("fake_boleto_detected:discount_pressure")
     
     # 5. Boleto + bloqueio/suspensão
-    ameaca = any([
-        'bloqueio' in t,
-        'suspensão' in t,
-        'suspenso' in t,
-        'cancelamento' in t
-    ])
-    
-    if ameaca:
+    if _tem_algum(termos, _BOLETO_AMEACA):
         score += 30
-        logger.info("fake_boleto_detected | reason=threat")
+        rastrear("fake_boleto_detected:threat")
     
     if score > 0:
         categoria['FALSO_BOLETO'] = score
@@ -1509,14 +3118,20 @@ registrar_heuristica(
     nome="Boleto bancário falso",
     categoria="FALSO_BOLETO",
     peso=0,
-    detector=detectar_boleto_falso
+    detector=detectar_boleto_falso,
+    recebe_contexto=True,
+    prerequisitos=_BOLETO_MENCAO
 )
 
 # ======================================================================
 # Additional Heuristics
 # ======================================================================
 
-def detectar_phishing_classico(texto: str) -> bool:
+_PHISHING_CLIQUE = registrar_termos(["clique"])
+_PHISHING_VERIFIQUE = registrar_termos(["verifique"])
+
+
+def detectar_phishing_classico(texto: Union[str, ContextoAnalise]) -> bool:
     """
     Detects classic phishing pattern based on signal combination.
 
@@ -1527,14 +3142,14 @@ def detectar_phishing_classico(texto: str) -> bool:
     - Sensitive entity mention
     """
 
-    t = texto.lower()
+    termos = obter_contexto(texto).termos
 
     indicadores = [
-        contem_link(t),
-        pede_credenciais(t),
-        "clique" in t,
-        "verifique" in t,
-        menciona_entidade_sensivel(t)
+        _tem_algum(termos, TERMOS_LINK),
+        _tem_algum(termos, TERMOS_CREDENCIAIS),
+        _tem_algum(termos, _PHISHING_CLIQUE),
+        _tem_algum(termos, _PHISHING_VERIFIQUE),
+        _tem_algum(termos, TERMOS_ENTIDADE_SENSIVEL)
     ]
 
     return indicadores.count(True) >= 3
@@ -1545,59 +3160,69 @@ registrar_heuristica(
     "PHISHING",
     50,  # CALIBRADO: 35 → 50 (golpes óbvios com URL+cred+entidade)
     detectar_phishing_classico,
-    "PHISHING_LINK"
+    "PHISHING_LINK",
+    recebe_contexto=True,
+    prerequisitos=(
+        TERMOS_LINK | TERMOS_CREDENCIAIS | TERMOS_ENTIDADE_SENSIVEL |
+        _PHISHING_CLIQUE | _PHISHING_VERIFIQUE
+    )
 )
 
 
-def detectar_autoridade_institucional(texto: str) -> bool:
+_AUTORIDADE_ALEGACOES = registrar_termos([
+    'sou do banco',
+    'sou da receita',
+    'central de segurança',
+    'departamento de fraude'
+])
+_AUTORIDADE_CENTRAL = registrar_termos(['central de segurança'])
+_AUTORIDADE_CARGOS = registrar_termos(['gerente', 'analista', 'técnico'])
+_AUTORIDADE_ACOES = registrar_termos(['confirme seus dados', 'atualize cadastro'])
+
+
+def detectar_autoridade_institucional(texto: Union[str, ContextoAnalise]) -> bool:
     """
     Detects institutional impersonation attempts.
     """
 
-    t = texto.lower()
-
-    alegacoes = [
-        'sou do banco',
-        'sou da receita',
-        'central de segurança',
-        'departamento de fraude'
-    ]
-
-    tem_alegacao = any(a in t for a in alegacoes)
-
-    cargos = ['gerente', 'analista', 'técnico']
-    tem_cargo = any(c in t for c in cargos)
+    termos = obter_contexto(texto).termos
 
-    acoes = ['confirme seus dados', 'atualize cadastro']
-    tem_acao = any(a in t for a in acoes)
+    tem_alegacao = _tem_algum(termos, _AUTORIDADE_ALEGACOES)
+    tem_cargo = _tem_algum(termos, _AUTORIDADE_CARGOS)
+    tem_acao = _tem_algum(termos, _AUTORIDADE_ACOES)
 
     return (
         tem_alegacao and (tem_cargo or tem_acao)
-    ) or 'central de segurança' in t
+    ) or _tem_algum(termos, _AUTORIDADE_CENTRAL)
 
 
 registrar_heuristica(
     "Autoridade institucional falsa",
     "AUTORIDADE",
     60,  # CALIBRADO: 45 → 60 (impersonação de banco/receita/gov)
-    detectar_autoridade_institucional
+    detectar_autoridade_institucional,
+    recebe_contexto=True,
+    prerequisitos=_AUTORIDADE_ALEGACOES
 )
 
 
-def detectar_urgencia(texto: str) -> bool:
+_URGENCIA_TERMOS = registrar_termos([
+    "urgente", "agora", "imediatamente"
+])
+_URGENCIA_ACOES = registrar_termos([
+    "clique", "acesse", "confirme", "pix"
+])
+
+
+def detectar_urgencia(texto: Union[str, ContextoAnalise]) -> bool:
     """
     Detects urgency combined with call-to-action.
     """
 
-    t = texto.lower()
-
-    tem_urgencia = any(p in t for p in [
-        "urgente", "agora", "imediatamente"
-    ])
+    termos = obter_contexto(texto).termos
 
-    tem_acao = any(p in t for p in [
-        "clique", "acesse", "confirme", "pix"
-    ])
+    tem_urgencia = _tem_algum(termos, _URGENCIA_TERMOS)
+    tem_acao = _tem_algum(termos, _URGENCIA_ACOES)
 
     return tem_urgencia and tem_acao
 
@@ -1606,11 +3231,28 @@ registrar_heuristica(
     "Urgência com ação",
     "URGÊNCIA",
     40,  # CALIBRADO: 30 → 40 (urgência + ação imediata)
-    detectar_urgencia
+    detectar_urgencia,
+    recebe_contexto=True,
+    prerequisitos=_URGENCIA_TERMOS
 )
 
 
-def detectar_url_prazo_consequencia(texto: str) -> bool:
+_URL_PRAZOS_CURTOS = registrar_termos([
+    "hoje", "agora", "24h", "24 horas",
+    "imediatamente", "imediato", "urgente",
+    "até hoje", "prazo máximo", "prazo limite"
+])
+
+_URL_CONSEQUENCIAS = registrar_termos([
+    "bloqueio", "bloqueado", "bloqueada",
+    "cancelamento", "cancelado", "cancelada",
+    "devolução", "devolvido", "devolvida",
+    "indisponível", "suspens", "perda",
+    "retido", "retida", "impedido", "impedida"
+])
+
+
+def detectar_url_prazo_consequencia(texto: Union[str, ContextoAnalise]) -> bool:
     """
     Detecta golpes com padrão: URL + prazo curto + consequência negativa
     
@@ -1621,35 +3263,19 @@ def detectar_url_prazo_consequencia(texto: str) -> bool:
     NOVO: Adicionado para capturar golpes tipo Correios/Banco
     que escapavam da detecção anterior.
     """
-    t = texto.lower()
+    termos = obter_contexto(texto).termos
     
     # Precisa ter URL
-    tem_url = bool(
-        "http://" in t or "https://" in t or "www." in t
-    )
+    tem_url = _tem_algum(termos, TERMOS_LINK)
     
     if not tem_url:
         return False
     
     # Precisa ter prazo curto
-    prazos_curtos = [
-        "hoje", "agora", "24h", "24 horas",
-        "imediatamente", "imediato", "urgente",
-        "até hoje", "prazo máximo", "prazo limite"
-    ]
-    
-    tem_prazo = any(p in t for p in prazos_curtos)
+    tem_prazo = _tem_algum(termos, _URL_PRAZOS_CURTOS)
     
     # Precisa ter consequência negativa
-    consequencias = [
-        "bloqueio", "bloqueado", "bloqueada",
-        "cancelamento", "cancelado", "cancelada",
-        "devolução", "devolvido", "devolvida",
-        "indisponível", "suspens", "perda",
-        "retido", "retida", "impedido", "impedida"
-    ]
-    
-    tem_consequencia = any(c in t for c in consequencias)
+    tem_consequencia = _tem_algum(termos, _URL_CONSEQUENCIAS)
     
     # Detecta quando tem os 3 elementos
     if tem_url and tem_prazo and tem_consequencia:
@@ -1663,11 +3289,25 @@ registrar_heuristica(
     "PHISHING",
     45,  # NOVO: detector específico para golpes tipo Correios/Banco
     detectar_url_prazo_consequencia,
-    "URL_COERCAO"
+    "URL_COERCAO",
+    recebe_contexto=True,
+    prerequisitos=TERMOS_LINK
 )
 
 
-def detectar_url_promessa(texto: str) -> bool:
+_URL_PROMESSAS = registrar_termos([
+    'ganhou', 'ganhar', 'sorteado', 'sorteio',
+    'premiado', 'prêmio', 'parabéns',
+    'resgate', 'resgatar', 'aprovado',
+    'grátis', 'gratuito'
+])
+
+_URL_ACOES = registrar_termos([
+    'clique', 'acesse', 'link', 'aqui', 'acessar'
+])
+
+
+def detectar_url_promessa(texto: Union[str, ContextoAnalise]) -> bool:
     """
     Detecta golpes genéricos: URL + Promessa de prêmio/sorteio
     
@@ -1679,30 +3319,19 @@ def detectar_url_promessa(texto: str) -> bool:
     NOVO: Captura golpes de prêmios/sorteios que não mencionam
     banco mas são óbvios por oferecer algo grátis.
     """
-    t = texto.lower()
+    termos = obter_contexto(texto).termos
     
     # Deve ter URL
-    tem_url = bool(
-        'http://' in t or 'https://' in t or 'www.' in t
-    )
+    tem_url = _tem_algum(termos, TERMOS_LINK)
     
     if not tem_url:
         return False
     
     # Promessas/prêmios
-    promessas = [
-        'ganhou', 'ganhar', 'sorteado', 'sorteio',
-        'premiado', 'prêmio', 'premio', 'parabéns',
-        'parabens', 'resgate', 'resgatar', 'aprovado',
-        'grátis', 'gratis', 'gratuito'
-    ]
-    
-    tem_promessa = any(p in t for p in promessas)
+    tem_promessa = _tem_algum(termos, _URL_PROMESSAS)
     
     # Ação de click/acesso
-    tem_acao = any(a in t for a in [
-        'clique', 'acesse', 'link', 'aqui', 'acessar'
-    ])
+    tem_acao = _tem_algum(termos, _URL_ACOES)
     
     return tem_promessa or (tem_url and tem_acao)
 
@@ -1712,11 +3341,22 @@ registrar_heuristica(
     "PHISHING",
     50,  # NOVO: golpes genéricos de prêmio/sorteio
     detectar_url_promessa,
-    "URL_ISCA"
+    "URL_ISCA",
+    recebe_contexto=True,
+    prerequisitos=TERMOS_LINK
 )
 
 
-def detectar_url_cobranca_falsa(texto: str) -> bool:
+_URL_COBRANCA_TERMOS = registrar_termos([
+    'venceu', 'vence', 'vencido', 'vencida',
+    'expirou', 'expira', 'expirado', 'expirada',
+    'renove', 'renovar', 'renovação',
+    'boleto', 'fatura', 'débito',
+    'pagamento pendente', 'conta em atraso'
+])
+
+
+def detectar_url_cobranca_falsa(texto: Union[str, ContextoAnalise]) -> bool:
     """
     Detecta golpes de cobrança/renovação falsa
     
@@ -1728,26 +3368,16 @@ def detectar_url_cobranca_falsa(texto: str) -> bool:
     NOVO: Captura golpes de renovação/cobrança sem mencionar
     banco explicitamente.
     """
-    t = texto.lower()
+    termos = obter_contexto(texto).termos
     
     # Deve ter URL
-    tem_url = bool(
-        'http://' in t or 'https://' in t or 'www.' in t
-    )
+    tem_url = _tem_algum(termos, TERMOS_LINK)
     
     if not tem_url:
         return False
     
     # Termos de cobrança/renovação
-    cobranca_termos = [
-        'venceu', 'vence', 'vencido', 'vencida',
-        'expirou', 'expira', 'expirado', 'expirada',
-        'renove', 'renovar', 'renovação', 'renovacao',
-        'boleto', 'fatura', 'débito', 'debito',
-        'pagamento pendente', 'conta em atraso'
-    ]
-    
-    return any(c in t for c in cobranca_termos)
+    return _tem_algum(termos, _URL_COBRANCA_TERMOS)
 
 
 registrar_heuristica(
@@ -1755,49 +3385,147 @@ registrar_heuristica(
     "PHISHING",
     45,  # NOVO: golpes de renovação/boleto falso
     detectar_url_cobranca_falsa,
-    "URL_COBRANCA"
+    "URL_COBRANCA",
+    recebe_contexto=True,
+    prerequisitos=TERMOS_LINK
 )
 
+# ======================================================================
+# Rule Pack Heuristics (data-only rules)
+# ======================================================================
+
+def _criar_detector_termos(
+    grupos: Tuple[FrozenSet[int], ...]
+) -> Callable[[ContextoAnalise], bool]:
+    """
+    Builds a detector that fires when every term group has a hit.
+    """
+
+    def detector(ctx: ContextoAnalise) -> bool:
+        termos = ctx.termos
+        return all(_tem_algum(termos, grupo) for grupo in grupos)
+
+    return detector
+
+
+def registrar_regras_pacote(pacote: Dict[str, Any]):
+    """
+    Compiles the pack's data-only rules into gated term-group detectors.
+
+    Registered after the built-in heuristics so group limits keep
+    giving precedence to code-defined rules.
+    """
+
+    for regra in pacote.get("regras", []):
+        grupos = tuple(
+            registrar_termos(regra[campo])
+            for campo in CAMPOS_GRUPO_TERMOS
+            if campo in regra
+        )
+
+        registrar_heuristica(
+            regra["nome"],
+            regra["categoria"],
+            regra["peso"],
+            _criar_detector_termos(grupos),
+            regra.get("grupo"),
+            recebe_contexto=True,
+            prerequisitos=grupos[0]
+        )
+
+
+registrar_regras_pacote(PACOTE_REGRAS)
+
 # ======================================================================
 # Category Score Caps (Risk Normalization Layer)
 # ======================================================================
 
-TETO_POR_CATEGORIA = {
-    "PHISHING": 70,
-    "ENGENHARIA_SOCIAL": 80,
-    "FINANCEIRO": 70,
-    "MALWARE": 70,
-    "CRYPTO": 60,
-    "INFRAESTRUTURA": 50,
-    "TRABALHO": 50,
-    "ECOMMERCE": 50,
-    "URL": 40,
-    "URGÊNCIA": 50,
-    "ENCURTADOR": 50,
-    "DOMINIO_SUSPEITO": 50,
-    "FALSO_COMPROVANTE": 100, 
-    "FALSO_BOLETO": 100,  # NOVO: Boleto falso tem alta criticidade
-    "AUTORIDADE": 60,
-    "EMOCIONAL": 50,
-}
+TETO_POR_CATEGORIA: Dict[str, int] = PACOTE_REGRAS["tetos"]
+TETO_PADRAO_CATEGORIA = int(PACOTE_REGRAS.get("teto_padrao", 50))
+
+# ======================================================================
+# Early Exit Bound (opt-in)
+# ======================================================================
+
+def limiar_saida_antecipada() -> Optional[int]:
+    """
+    Heuristic score from which neither the classification nor the
+    escalation decision can change: obvious-scam zone (no LLM) and
+    top classification band. None when unreachable (score caps at 200).
+    """
+
+    limiar = max(ZONA_COGNITIVA_MAX, SCORE_GOLPE_CONFIRMADO)
+    return limiar if limiar <= 200 else None
+
+
+def limite_inferior_score_final(
+    score_por_categoria: Dict[str, Union[int, float]],
+    categorias_ativas: set,
+    ctx: ContextoAnalise
+) -> Union[int, float]:
+    """
+    Lower bound of the pipeline's heuristic score given the categories
+    scored so far.
+
+    Remaining heuristics, semantic score and IPP can only add; the
+    reductions that can still apply to this message are applied.
+    """
+
+    fatores = fatores_reducao_contexto(ctx)
+
+    score = 0
+    for categoria, valor in score_por_categoria.items():
+        if categoria in fatores:
+            valor = int(valor * fatores[categoria])
+        score += min(
+            valor,
+            TETO_POR_CATEGORIA.get(categoria, TETO_PADRAO_CATEGORIA)
+        )
+
+    for combo in COMBINACOES_CRITICAS:
+        if categorias_ativas.issuperset(combo["categorias"]):
+            score += combo["bonus"]
+
+    if detectar_postura_investigativa(ctx):
+        score = int(score * REDUCAO_INVESTIGATIVO)
+
+    if possui_cobranca_estruturada(ctx):
+        score = int(score * FATOR_COBRANCA_ESTRUTURADA)
+
+    if MULTIPLICADOR_CRITICO < 1:
+        score = int(score * MULTIPLICADOR_CRITICO)
+
+    return score
 
 # ======================================================================
 # Heuristic Evaluation Engine
 # ======================================================================
 
-def avaliar_heuristicas(texto: str) -> Tuple[int, List[str], Dict[str, Any]]:
+def avaliar_heuristicas(
+    texto: Union[str, ContextoAnalise],
+    saida_antecipada: bool = False,
+    contar: bool = True
+) -> Tuple[int, List[str], Dict[str, Any]]:
     """
     Executes all registered heuristics and computes normalized risk score.
 
     Pipeline:
-    - Executes each heuristic detector
+    - Executes only the detectors whose prerequisites occur in the text
     - Aggregates category scores
     - Applies contextual legitimacy reductions
     - Enforces category caps
     - Returns total score, triggered reasons, and technical indicators
+
+    With `saida_antecipada`, rules run in descending order of maximum
+    contribution and evaluation stops as soon as the final verdict is
+    fixed (indicadores["saida_antecipada"] is then set).
+
+    `contar=False` leaves the skip-rate counters untouched, for probe
+    evaluations that are not the message's own scoring pass.
     """
 
     inicio = time.time()
+    ctx = obter_contexto(texto)
 
     score_total = 0
     motivos: List[str] = []
@@ -1805,12 +3533,28 @@ def avaliar_heuristicas(texto: str) -> Tuple[int, List[str], Dict[str, Any]]:
     score_por_categoria = defaultdict(int)
     grupos_ativados = defaultdict(int)
 
+    limiar = limiar_saida_antecipada() if saida_antecipada else None
+    categorias_ativas = set()
+
     # ------------------------------------------------------------------
-    # Execute Registered Heuristics
+    # Execute Relevant Heuristics (prerequisite gating)
     # ------------------------------------------------------------------
-    for heur in HEURISTICAS_REGISTRADAS:
+    global _TOTAL_AVALIACOES
+    if contar:
+        _TOTAL_AVALIACOES += 1
+
+    candidatas = selecionar_heuristicas(
+        ctx.termos,
+        por_contribuicao=limiar is not None
+    )
+
+    for posicao, heur in enumerate(candidatas):
+        if contar:
+            heur.execucoes += 1
+        pontuou = False
+
         try:
-            resultado = heur.detector(texto)
+            resultado = heur.executar(ctx)
 
             # Boolean heuristic (fixed weight)
             if isinstance(resultado, bool):
@@ -1824,6 +3568,8 @@ def avaliar_heuristicas(texto: str) -> Tuple[int, List[str], Dict[str, Any]]:
                     score_por_categoria[heur.categoria] += heur.peso
                     motivos.append(f"{heur.categoria}: {heur.nome}")
                     indicadores[f"hit_{heur.nome}"] += 1
+                    categorias_ativas.add(heur.categoria)
+                    pontuou = True
 
             # Dynamic scoring heuristic (dict return)
             elif isinstance(resultado, dict):
@@ -1831,25 +3577,43 @@ def avaliar_heuristicas(texto: str) -> Tuple[int, List[str], Dict[str, Any]]:
                     if isinstance(score, (int, float)):
                         score_por_categoria[categoria] += score
                         motivos.append(f"{categoria}: {heur.nome}")
+                        categorias_ativas.add(categoria)
+                        pontuou = True
 
         except Exception:
             logger.exception(
                 f"heuristic_execution_error | name={heur.nome}"
             )
 
+        # --------------------------------------------------------------
+        # Early Exit (verdict already fixed)
+        # --------------------------------------------------------------
+        if (
+            pontuou and
+            limiar is not None and
+            limite_inferior_score_final(
+                score_por_categoria, categorias_ativas, ctx
+            ) >= limiar
+        ):
+            indicadores["saida_antecipada"] = True
+            indicadores["heuristicas_nao_avaliadas"] = (
+                len(candidatas) - posicao - 1
+            )
+            break
+
     # ------------------------------------------------------------------
     # Apply Legitimate Context Reductions
     # ------------------------------------------------------------------
     score_por_categoria = aplicar_reducao_contexto_legitimo(
         score_por_categoria,
-        texto
+        ctx
     )
 
     # ------------------------------------------------------------------
     # Apply Category Caps and Aggregate Final Score
     # ------------------------------------------------------------------
     for categoria, score_categoria in score_por_categoria.items():
-        teto = TETO_POR_CATEGORIA.get(categoria, 50)
+        teto = TETO_POR_CATEGORIA.get(categoria, TETO_PADRAO_CATEGORIA)
         score_normalizado = min(score_categoria, teto)
 
         score_total += score_normalizado
@@ -1861,6 +3625,9 @@ def avaliar_heuristicas(texto: str) -> Tuple[int, List[str], Dict[str, Any]]:
     tempo_total = (time.time() - inicio) * 1000
     indicadores["tempo_avaliacao_ms"] = round(tempo_total, 2)
     indicadores["score_heuristico_base"] = score_total
+    indicadores["heuristicas_ignoradas"] = (
+        len(HEURISTICAS_REGISTRADAS) - len(candidatas)
+    )
 
     return score_total, motivos, dict(indicadores)
 
@@ -1868,14 +3635,7 @@ def avaliar_heuristicas(texto: str) -> Tuple[int, List[str], Dict[str, Any]]:
 # Critical Category Combinations (Risk Amplification Layer)
 # ======================================================================
 
-COMBINACOES_CRITICAS = [
-    {"categorias": ["FINANCEIRO", "URL"], "bonus": 70},
-    {"categorias": ["FINANCEIRO", "ENCURTADOR"], "bonus": 90},
-    {"categorias": ["ENGENHARIA_SOCIAL", "PHISHING"], "bonus": 100},  # CALIBRADO: 90 → 100
-    {"categorias": ["ENGENHARIA_SOCIAL", "FINANCEIRO"], "bonus": 80},
-    {"categorias": ["AUTORIDADE", "FINANCEIRO"], "bonus": 100},  # CALIBRADO: 85 → 100
-    {"categorias": ["EMOCIONAL", "FINANCEIRO"], "bonus": 70},
-]
+COMBINACOES_CRITICAS: List[Dict[str, Any]] = PACOTE_REGRAS["combinacoes"]
 
 
 def aplicar_combinacoes(
@@ -1906,100 +3666,732 @@ def aplicar_combinacoes(
         if set(combo["categorias"]).issubset(categorias_ativas):
             bonus_total += combo["bonus"]
 
-    if bonus_total > 0:
-        indicadores["bonus_combinacoes"] = bonus_total
+    if bonus_total > 0:
+        indicadores["bonus_combinacoes"] = bonus_total
+
+    return score + bonus_total, motivos
+
+# ======================================================================
+# Batch Heuristic Scoring (bulk re-scoring / threshold calibration)
+# ======================================================================
+
+TAMANHO_BLOCO_LOTE = 4096
+
+
+def _avaliar_heuristicas_lote_escalar(
+    textos: List[str]
+) -> Dict[str, Any]:
+    """
+    Pure-Python fallback used when numpy is not available.
+    """
+
+    categorias: List[str] = []
+    linhas: List[Dict[str, Any]] = []
+    scores_heuristicos: List[Union[int, float]] = []
+    bonus: List[Union[int, float]] = []
+
+    for texto in textos:
+        score, motivos, indicadores = avaliar_heuristicas(texto)
+        score_final, _ = aplicar_combinacoes(score, motivos, indicadores)
+
+        linha = {}
+        for chave, valor in indicadores.items():
+            if chave.startswith("score_categoria_"):
+                categoria = chave[len("score_categoria_"):]
+                if categoria not in categorias:
+                    categorias.append(categoria)
+                linha[categoria] = valor
+
+        linhas.append(linha)
+        scores_heuristicos.append(score)
+        bonus.append(score_final - score)
+
+    return {
+        "categorias": categorias,
+        "score_por_categoria": [
+            [linha.get(c, 0) for c in categorias] for linha in linhas
+        ],
+        "score_heuristico": scores_heuristicos,
+        "bonus_combinacoes": bonus,
+        "score_total": [s + b for s, b in zip(scores_heuristicos, bonus)]
+    }
+
+
+def _avaliar_bloco_lote(
+    contextos: List[ContextoAnalise],
+    categorias: Dict[str, int]
+) -> Tuple[Any, Any, Any]:
+    """
+    Scores one block of messages.
+
+    Returns (score_por_categoria, categorias_ativas, bonus) where the
+    category matrices are indexed by the (growing) `categorias` map.
+    """
+
+    heuristicas = HEURISTICAS_REGISTRADAS
+    total_heur = len(heuristicas)
+    total_msgs = len(contextos)
+
+    # ------------------------------------------------------------------
+    # Sparse message x term hits (CSR) -> heuristic activation
+    # ------------------------------------------------------------------
+    indices = np.fromiter(
+        (t for ctx in contextos for t in ctx.termos),
+        dtype=np.int64
+    )
+    tamanhos = np.fromiter(
+        (len(ctx.termos) for ctx in contextos),
+        dtype=np.int64,
+        count=total_msgs
+    )
+    linhas = np.repeat(np.arange(total_msgs), tamanhos)
+
+    total_termos = max(len(VOCABULARIO_TERMOS), 1)
+    prerequisitos = np.zeros((total_termos, total_heur), dtype=np.int32)
+    for termo_id, posicoes in INDICE_PREREQUISITOS.items():
+        prerequisitos[termo_id, posicoes] = 1
+
+    # Row-wise sum of prerequisite rows for each hit term (sparse product)
+    ativacao = np.zeros((total_msgs, total_heur), dtype=np.int32)
+    np.add.at(ativacao, linhas, prerequisitos[indices])
+    ativacao = ativacao > 0
+    ativacao[:, _HEURISTICAS_SEM_PREREQUISITO] = True
+
+    # ------------------------------------------------------------------
+    # Run detectors only where their prerequisites hold
+    # ------------------------------------------------------------------
+    disparos = np.zeros((total_msgs, total_heur), dtype=bool)
+    dinamicos: List[Tuple[int, Dict[str, Any]]] = []
+
+    for j, heur in enumerate(heuristicas):
+        candidatos = np.flatnonzero(ativacao[:, j])
+        heur.execucoes += len(candidatos)
+
+        for i in candidatos:
+            try:
+                resultado = heur.executar(contextos[i])
+            except Exception:
+                logger.exception(
+                    f"heuristic_execution_error | name={heur.nome}"
+                )
+                continue
+
+            if isinstance(resultado, bool):
+                disparos[i, j] = resultado
+            elif isinstance(resultado, dict):
+                dinamicos.append((i, resultado))
+
+    for heur in heuristicas:
+        categorias.setdefault(heur.categoria, len(categorias))
+    for _, resultado in dinamicos:
+        for categoria, score in resultado.items():
+            if isinstance(score, (int, float)):
+                categorias.setdefault(categoria, len(categorias))
+
+    total_cat = len(categorias)
+
+    # ------------------------------------------------------------------
+    # Group limit: at most 2 fired heuristics per group count
+    # ------------------------------------------------------------------
+    grupos: Dict[str, List[int]] = defaultdict(list)
+    for j, heur in enumerate(heuristicas):
+        if heur.grupo:
+            grupos[heur.grupo].append(j)
+
+    for colunas in grupos.values():
+        acumulado = np.cumsum(disparos[:, colunas], axis=1)
+        disparos[:, colunas] &= acumulado <= 2
+
+    # ------------------------------------------------------------------
+    # Category scores = fired x weights (+ dynamic detector scores)
+    # ------------------------------------------------------------------
+    pesos = np.zeros((total_heur, total_cat), dtype=np.float64)
+    pertence = np.zeros((total_heur, total_cat), dtype=np.int32)
+    for j, heur in enumerate(heuristicas):
+        pesos[j, categorias[heur.categoria]] = heur.peso
+        pertence[j, categorias[heur.categoria]] = 1
+
+    score = disparos.astype(np.float64) @ pesos
+    ativas = (disparos.astype(np.int32) @ pertence) > 0
+
+    for i, resultado in dinamicos:
+        for categoria, valor in resultado.items():
+            if isinstance(valor, (int, float)):
+                k = categorias[categoria]
+                score[i, k] += valor
+                ativas[i, k] = True
+
+    # ------------------------------------------------------------------
+    # Legitimate context reductions (same factors as scalar path)
+    # ------------------------------------------------------------------
+    contexto_geral = np.fromiter(
+        (_tem_algum(ctx.termos, _CONTEXTOS_GERAIS) for ctx in contextos),
+        dtype=bool,
+        count=total_msgs
+    )
+    contexto_financeiro = np.fromiter(
+        (_tem_algum(ctx.termos, _CONTEXTOS_FINANCEIROS) for ctx in contextos),
+        dtype=bool,
+        count=total_msgs
+    )
+
+    for categoria, mascara, fator in (
+        ("PHISHING", contexto_geral, 0.7),
+        ("ENGENHARIA_SOCIAL", contexto_geral, 0.7),
+        ("FINANCEIRO", contexto_financeiro, 0.6),
+    ):
+        k = categorias.get(categoria)
+        if k is not None:
+            linhas_reduzidas = mascara & ativas[:, k]
+            score[linhas_reduzidas, k] = np.trunc(
+                score[linhas_reduzidas, k] * fator
+            )
+
+    # ------------------------------------------------------------------
+    # Category caps
+    # ------------------------------------------------------------------
+    tetos = np.array(
+        [TETO_POR_CATEGORIA.get(c, TETO_PADRAO_CATEGORIA) for c in categorias],
+        dtype=np.float64
+    )
+    score = np.where(ativas, np.minimum(score, tetos), 0.0)
+
+    # ------------------------------------------------------------------
+    # Critical combinations
+    # ------------------------------------------------------------------
+    bonus = np.zeros(total_msgs, dtype=np.float64)
+    for combo in COMBINACOES_CRITICAS:
+        colunas = [categorias.get(c) for c in combo["categorias"]]
+        if None in colunas:
+            continue
+        bonus += np.all(ativas[:, colunas], axis=1) * combo["bonus"]
+
+    return score, ativas, bonus
+
+
+def avaliar_heuristicas_lote(textos: Iterable[str]) -> Dict[str, Any]:
+    """
+    Scores many messages at once for re-scoring and calibration.
+
+    Equivalent to `avaliar_heuristicas` followed by `aplicar_combinacoes`
+    for each text, but gating, group limits, category aggregation,
+    legitimacy reductions, caps and combination bonuses are computed as
+    array operations over a message x term hit matrix. Only detector
+    calls remain per message (and only where prerequisites hold).
+
+    Returns:
+    - categorias: column names of score_por_categoria
+    - score_por_categoria: capped category scores (messages x categories)
+    - score_heuristico: heuristic score (before combinations)
+    - bonus_combinacoes: combination bonus
+    - score_total: score_heuristico + bonus_combinacoes
+
+    Falls back to the scalar path (lists instead of arrays) when numpy
+    is not installed.
+    """
+
+    global _TOTAL_AVALIACOES
+
+    textos = list(textos)
+
+    if np is None:
+        return _avaliar_heuristicas_lote_escalar(textos)
+
+    categorias: Dict[str, int] = {}
+    blocos = []
+
+    for inicio in range(0, len(textos), TAMANHO_BLOCO_LOTE):
+        contextos = [
+            construir_contexto(t)
+            for t in textos[inicio:inicio + TAMANHO_BLOCO_LOTE]
+        ]
+        _TOTAL_AVALIACOES += len(contextos)
+        blocos.append(_avaliar_bloco_lote(contextos, categorias))
+
+    total_cat = len(categorias)
+    score_por_categoria = np.zeros((len(textos), total_cat))
+    bonus = np.zeros(len(textos))
+
+    posicao = 0
+    for score, _, bonus_bloco in blocos:
+        fim = posicao + score.shape[0]
+        score_por_categoria[posicao:fim, :score.shape[1]] = score
+        bonus[posicao:fim] = bonus_bloco
+        posicao = fim
+
+    score_heuristico = score_por_categoria.sum(axis=1)
+
+    return {
+        "categorias": list(categorias),
+        "score_por_categoria": score_por_categoria,
+        "score_heuristico": score_heuristico,
+        "bonus_combinacoes": bonus,
+        "score_total": score_heuristico + bonus
+    }
+
+# ======================================================================
+# Write-Behind Queue (DynamoDB)
+# ======================================================================
+
+class FilaEscrita:
+    """
+    Bounded write-behind buffer for DynamoDB writes off the request path.
+
+    - Puts are grouped per table into batch_write_item requests of up
+      to 25 items (last write wins per key)
+    - Counter increments on the same key are merged into one ADD update
+    - Flushed by lambda_handler before returning, by a worker pool, within
+      the remaining invocation time; a full buffer is flushed inline,
+      waiting at most FILA_ESCRITA_PRAZO_INLINE_MS
+    - Unprocessed items and throttling / 5xx / transport errors go back
+      to the buffer for the next flush, up to FILA_ESCRITA_TENTATIVAS_ITEM
+      times per write; any other error (validation, access, item too
+      large) would fail again on every flush, so the write is dropped
+    """
+
+    LOTE_MAX = 25
+    TENTATIVAS_LOTE = 3
+
+    ERROS_TRANSITORIOS = frozenset({
+        "ProvisionedThroughputExceededException",
+        "ThrottlingException",
+        "RequestLimitExceeded",
+        "InternalServerError",
+        "ServiceUnavailable"
+    })
+
+    def __init__(self, max_itens: int, workers: int):
+        self.max_itens = max(1, max_itens)
+        self.workers = max(1, workers)
+        self._lock = threading.Lock()
+        self._lock_descarga = threading.Lock()
+        self._tabelas: Dict[str, Any] = {}
+        self._puts: Dict[str, Dict[Tuple, Dict]] = defaultdict(dict)
+        self._incrementos: Dict[Tuple, Dict[str, Decimal]] = {}
+        self._tentativas: Dict[Tuple, int] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._total()
+
+    def gravar(self, tabela, item: Dict[str, Any]):
+        """
+        Queues a put (replaces a queued put with the same key).
+        """
+
+        chave = (item.get("pk"), item.get("sk"))
+
+        with self._lock:
+            self._tabelas[tabela.name] = tabela
+            self._puts[tabela.name][chave] = item
+            self._tentativas.pop((tabela.name, chave), None)
+            cheia = self._total() >= self.max_itens
+
+        if cheia:
+            self.descarregar(prazo_s=FILA_ESCRITA_PRAZO_INLINE_MS / 1000)
+
+    def incrementar(
+        self,
+        tabela,
+        chave: Dict[str, str],
+        valores: Dict[str, Union[int, float, Decimal]]
+    ):
+        """
+        Queues atomic ADD increments, merged with pending ones on the key.
+        """
+
+        id_chave = (tabela.name, tuple(sorted(chave.items())))
+
+        with self._lock:
+            self._tabelas[tabela.name] = tabela
+            campos = self._incrementos.setdefault(id_chave, {})
+            for campo, valor in valores.items():
+                campos[campo] = (
+                    campos.get(campo, Decimal("0")) + Decimal(str(valor))
+                )
+            cheia = self._total() >= self.max_itens
+
+        if cheia:
+            self.descarregar(prazo_s=FILA_ESCRITA_PRAZO_INLINE_MS / 1000)
+
+    def _total(self) -> int:
+        return (
+            sum(len(itens) for itens in self._puts.values()) +
+            len(self._incrementos)
+        )
+
+    # ------------------------------------------------------------------
+    # Flush
+    # ------------------------------------------------------------------
+
+    def descarregar(self, prazo_s: Optional[float] = None) -> int:
+        """
+        Sends everything queued, waiting at most `prazo_s` seconds.
+        Returns the number of writes still pending afterwards.
+        """
+
+        with self._lock_descarga:
+            with self._lock:
+                puts, self._puts = self._puts, defaultdict(dict)
+                incrementos, self._incrementos = self._incrementos, {}
+
+            tarefas = []
+
+            for nome, itens in puts.items():
+                valores = list(itens.values())
+                for i in range(0, len(valores), self.LOTE_MAX):
+                    tarefas.append(
+                        (self._enviar_lote, nome, valores[i:i + self.LOTE_MAX])
+                    )
+
+            for id_chave, campos in incrementos.items():
+                tarefas.append((self._enviar_incremento, id_chave, campos))
+
+            if not tarefas:
+                return 0
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="fila_escrita"
+                )
+
+            futuros = [
+                self._executor.submit(funcao, *args)
+                for funcao, *args in tarefas
+            ]
+
+            _, atrasados = wait(futuros, timeout=prazo_s)
+
+        if atrasados:
+            logger.warning(
+                f"write_behind_flush_timeout "
+                f"| tasks={len(futuros)} "
+                f"| still_running={len(atrasados)}"
+            )
+
+        pendentes = len(self)
+
+        logger.info(
+            f"write_behind_flushed "
+            f"| puts={sum(len(i) for i in puts.values())} "
+            f"| increments={len(incrementos)} "
+            f"| requests={len(futuros)} "
+            f"| requeued={pendentes}"
+        )
+
+        return pendentes + len(atrasados)
+
+    @classmethod
+    def erro_transitorio(cls, erro: Exception) -> bool:
+        """
+        Whether a failed write may succeed on a later flush.
+        """
+
+        if isinstance(erro, ClientError):
+            codigo = erro.response.get("Error", {}).get("Code", "")
+            status = erro.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+            return codigo in cls.ERROS_TRANSITORIOS or status >= 500
+
+        return isinstance(erro, (
+            ConnectionClosedError,
+            ConnectTimeoutError,
+            EndpointConnectionError,
+            ReadTimeoutError
+        ))
+
+    def _nova_tentativa(self, chave: Tuple) -> bool:
+        """
+        Counts one more failed flush of a write (lock held); False once
+        it has used up FILA_ESCRITA_TENTATIVAS_ITEM.
+        """
+
+        tentativas = self._tentativas.get(chave, 0) + 1
+
+        if tentativas >= FILA_ESCRITA_TENTATIVAS_ITEM:
+            self._tentativas.pop(chave, None)
+            return False
+
+        self._tentativas[chave] = tentativas
+        return True
+
+    def _reenfileirar_puts(self, nome: str, itens: List[Dict]):
+        descartados = 0
+
+        with self._lock:
+            for item in itens:
+                chave = (item.get("pk"), item.get("sk"))
+
+                # A newer queued write for the same key wins
+                if chave in self._puts[nome]:
+                    continue
+
+                if self._nova_tentativa((nome, chave)):
+                    self._puts[nome][chave] = item
+                else:
+                    descartados += 1
+
+        if descartados:
+            logger.error(
+                f"write_behind_put_dropped "
+                f"| table={nome} | items={descartados} | reason=max_attempts"
+            )
+
+    def _enviar_lote(self, nome: str, itens: List[Dict]):
+        pedidos = [{"PutRequest": {"Item": item}} for item in itens]
+
+        try:
+            for tentativa in range(self.TENTATIVAS_LOTE):
+                response = dynamodb.batch_write_item(
+                    RequestItems={nome: pedidos}
+                )
+                pedidos = response.get("UnprocessedItems", {}).get(nome, [])
+
+                if not pedidos:
+                    self._concluir(nome, itens)
+                    return
+
+                time.sleep(0.05 * (2 ** tentativa))
+
+        except Exception as e:
+            logger.error(
+                f"write_behind_batch_failed "
+                f"| table={nome} | items={len(pedidos)} | error={e}"
+            )
+
+            if not self.erro_transitorio(e):
+                self._concluir(nome, itens)
+                return
+
+        self._reenfileirar_puts(
+            nome, [p["PutRequest"]["Item"] for p in pedidos]
+        )
+
+    def _concluir(self, nome: str, itens: List[Dict]):
+        """
+        Forgets the failed-flush counts of writes that are settled.
+        """
+
+        if not self._tentativas:
+            return
+
+        with self._lock:
+            for item in itens:
+                self._tentativas.pop(
+                    (nome, (item.get("pk"), item.get("sk"))), None
+                )
+
+    def _enviar_incremento(
+        self,
+        id_chave: Tuple,
+        campos: Dict[str, Decimal]
+    ):
+        nome, chave = id_chave
+
+        try:
+            nomes = list(campos)
+            self._tabelas[nome].update_item(
+                Key=dict(chave),
+                UpdateExpression="ADD " + ", ".join(
+                    f"#c{i} :v{i}" for i in range(len(nomes))
+                ),
+                ExpressionAttributeNames={
+                    f"#c{i}": campo for i, campo in enumerate(nomes)
+                },
+                ExpressionAttributeValues={
+                    f":v{i}": campos[campo] for i, campo in enumerate(nomes)
+                },
+                ReturnValues="NONE"
+            )
+
+            if self._tentativas:
+                with self._lock:
+                    self._tentativas.pop(id_chave, None)
+
+        except Exception as e:
+            logger.error(
+                f"write_behind_increment_failed "
+                f"| table={nome} | error={e}"
+            )
+
+            if not self.erro_transitorio(e):
+                return
+
+            with self._lock:
+                if not self._nova_tentativa(id_chave):
+                    logger.error(
+                        f"write_behind_increment_dropped "
+                        f"| table={nome} | reason=max_attempts"
+                    )
+                    return
+
+                pendentes = self._incrementos.setdefault(id_chave, {})
+                for campo, valor in campos.items():
+                    pendentes[campo] = pendentes.get(campo, Decimal("0")) + valor
+
+
+FILA_ESCRITA = FilaEscrita(FILA_ESCRITA_MAX_ITENS, FILA_ESCRITA_WORKERS)
+
+
+def prazo_descarga(context) -> Optional[float]:
+    """
+    Seconds available to flush the write-behind queue in this invocation
+    (None outside Lambda, e.g. local scripts).
+    """
+
+    if context is None or not hasattr(context, "get_remaining_time_in_millis"):
+        return None
 
-    return score + bonus_total, motivos
+    restante_ms = context.get_remaining_time_in_millis() - FILA_ESCRITA_MARGEM_MS
+
+    return max(restante_ms, 50) / 1000
 
 # ======================================================================
 # Bedrock Metrics Persistence (DynamoDB Aggregation)
 # ======================================================================
 
-def incrementar_metrica_bedrock(
-    metrica: str,
-    valor: Union[int, float] = 1
-):
+SHARD_METRICAS = random.randrange(METRICS_SHARDS)
+
+
+def chave_metricas(data: str, shard: Optional[int] = None) -> str:
     """
-    Backward-compatible wrapper.
-    Internally delegates to batch update method.
+    Partition key of a metrics shard (None: unsharded legacy item).
     """
-    incrementar_metricas_bedrock_batch_interno(metrica, valor)
 
+    if shard is None:
+        return f"METRICS#{data}"
 
-def incrementar_metricas_bedrock_batch_interno(
-    metrica: str,
-    valor: Union[int, float] = 1
-):
+    return f"METRICS#{data}#{shard}"
+
+
+class AgregadorMetricas:
     """
-    Increments a single metric field using DynamoDB atomic ADD.
+    Per-invocation counter registry for the Bedrock metrics item.
+
+    Increments are summed in memory (no DynamoDB call on the request
+    path) and `descarregar` emits one atomic ADD per metrics key through
+    the write-behind queue, flushed by lambda_handler.
     """
 
-    try:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._contadores: Dict[str, Dict[str, Decimal]] = {}
+
+    def somar(self, valores: Dict[str, Union[int, float]]):
         hoje = datetime.now(timezone.utc).date().isoformat()
-        pk = f"METRICS#{hoje}"
+        pk = chave_metricas(hoje, SHARD_METRICAS)
 
-        metrics_table.update_item(
-            Key={"pk": pk, "sk": "bedrock"},
-            UpdateExpression=f"ADD {metrica} :val",
-            ExpressionAttributeValues={
-                ":val": Decimal(str(valor))
-            },
-            ReturnValues="NONE"
-        )
+        with self._lock:
+            campos = self._contadores.setdefault(pk, {})
+            for metrica, valor in valores.items():
+                campos[metrica] = (
+                    campos.get(metrica, Decimal("0")) + Decimal(str(valor))
+                )
 
-    except Exception as e:
-        logger.error(
-            f"metrics_increment_failed "
-            f"| metric={metrica} | error={e}"
-        )
+    def instantaneo(self) -> Dict[str, Dict[str, float]]:
+        """
+        Counters accumulated since the last flush (for logging/debug).
+        """
+
+        with self._lock:
+            return {
+                pk: {k: float(v) for k, v in campos.items()}
+                for pk, campos in self._contadores.items()
+            }
+
+    def descarregar(self) -> int:
+        """
+        Moves the accumulated counters to the write-behind queue.
+        Returns the number of metrics keys written.
+        """
+
+        with self._lock:
+            contadores, self._contadores = self._contadores, {}
+
+        for pk, campos in contadores.items():
+            FILA_ESCRITA.incrementar(
+                metrics_table,
+                {"pk": pk, "sk": "bedrock"},
+                campos
+            )
+
+        return len(contadores)
+
+
+AGREGADOR_METRICAS = AgregadorMetricas()
+
+
+def incrementar_metrica_bedrock(
+    metrica: str,
+    valor: Union[int, float] = 1
+):
+    """
+    Backward-compatible wrapper.
+    Accumulates in the per-invocation aggregator (no I/O).
+    """
+    AGREGADOR_METRICAS.somar({metrica: valor})
 
 
 def incrementar_metricas_bedrock_batch(
     modelo: str,
-    custo: float
+    custo: float,
+    tokens_cache_leitura: int = 0,
+    tokens_cache_escrita: int = 0
 ):
     """
-    Atomic batch update:
+    Counts one Bedrock call:
     - total_calls
     - model-specific calls
     - total_cost_usd
+    - prompt cache read/write input tokens
 
-    All updated in a single DynamoDB request.
+    Accumulated in the per-invocation aggregator and written with the
+    other metrics in a single DynamoDB update.
     """
 
-    try:
-        hoje = datetime.now(timezone.utc).date().isoformat()
-        pk = f"METRICS#{hoje}"
+    campo_modelo = (
+        "haiku_calls" if modelo == "haiku"
+        else "sonnet_calls"
+    )
 
-        campo_modelo = (
-            "haiku_calls" if modelo == "haiku"
-            else "sonnet_calls"
-        )
+    AGREGADOR_METRICAS.somar({
+        "total_calls": 1,
+        campo_modelo: 1,
+        "total_cost_usd": custo,
+        "cache_read_tokens": tokens_cache_leitura,
+        "cache_write_tokens": tokens_cache_escrita
+    })
 
-        metrics_table.update_item(
-            Key={"pk": pk, "sk": "bedrock"},
-            UpdateExpression=(
-                f"ADD total_calls :one, "
-                f"{campo_modelo} :one, "
-                f"total_cost_usd :custo"
-            ),
-            ExpressionAttributeValues={
-                ":one": Decimal("1"),
-                ":custo": Decimal(str(custo))
-            },
-            ReturnValues="NONE"
-        )
 
-    except Exception as e:
-        logger.error(
-            f"metrics_batch_update_failed | error={e}"
-        )
+def _ler_metricas_lote(chaves: List[Dict[str, str]]) -> List[Dict]:
+    """
+    One batch_get_item (up to 100 keys), retrying unprocessed keys.
+    """
+
+    itens = []
+    pedido = {METRICS_TABLE_NAME: {"Keys": chaves}}
+
+    for tentativa in range(3):
+        response = dynamodb.batch_get_item(RequestItems=pedido)
+        itens.extend(response.get("Responses", {}).get(METRICS_TABLE_NAME, []))
+
+        pedido = response.get("UnprocessedKeys") or {}
+        if not pedido:
+            break
+
+        time.sleep(0.05 * (2 ** tentativa))
+
+    return itens
 
 
 def obter_metricas_bedrock(dias: int = 1) -> Dict[str, Any]:
     """
     Retrieves aggregated Bedrock metrics from DynamoDB.
 
+    Sums every shard (and the legacy unsharded item) of each day, read
+    with parallel batch reads.
+
     Args:
         dias: Number of past days to aggregate (default=1).
 
@@ -2016,20 +4408,39 @@ def obter_metricas_bedrock(dias: int = 1) -> Dict[str, Any]:
             "sonnet_calls": 0,
             "total_cost_usd": 0.0,
             "cache_hits": 0,
-            "fallback_count": 0
+            "fallback_count": 0,
+            "memo_hits": 0,
+            "memo_misses": 0,
+            "avoided_cost_usd": 0.0,
+            "speculative_calls": 0,
+            "speculative_hits": 0,
+            "speculative_saved_ms": 0,
+            "speculative_wasted_usd": 0.0,
+            "deadline_skips": 0,
+            "circuit_skips": 0,
+            "circuit_opened": 0,
+            "circuit_half_opened": 0,
+            "circuit_closed": 0,
+            "cache_read_tokens": 0,
+            "cache_write_tokens": 0
         }
 
+        chaves = []
         for i in range(dias):
             data = (hoje - timedelta(days=i)).isoformat()
-            pk = f"METRICS#{data}"
 
-            response = metrics_table.get_item(
-                Key={"pk": pk, "sk": "bedrock"}
-            )
+            for shard in [None, *range(METRICS_SHARDS)]:
+                chaves.append(
+                    {"pk": chave_metricas(data, shard), "sk": "bedrock"}
+                )
+
+        lotes = [chaves[i:i + 100] for i in range(0, len(chaves), 100)]
 
-            if "Item" in response:
-                item = response["Item"]
+        with ThreadPoolExecutor(max_workers=max(1, min(len(lotes), 4))) as executor:
+            resultados = list(executor.map(_ler_metricas_lote, lotes))
 
+        for itens in resultados:
+            for item in itens:
                 for key in metricas_totais:
                     if key in item:
                         metricas_totais[key] += float(item[key])
@@ -2049,14 +4460,17 @@ def obter_metricas_bedrock(dias: int = 1) -> Dict[str, Any]:
 def calcular_custo_bedrock(
     modelo: str,
     tokens_input: int,
-    tokens_output: int
+    tokens_output: int,
+    tokens_cache_leitura: int = 0,
+    tokens_cache_escrita: int = 0
 ) -> float:
     """
     Calculates estimated Bedrock usage cost based on token consumption.
 
     Pricing model:
-    - Cost per 1M input tokens
+    - Cost per 1M input tokens (uncached)
     - Cost per 1M output tokens
+    - Prompt cache reads/writes at a fraction/multiple of the input price
     - Differentiated by model (Haiku vs Sonnet)
 
     Returns:
@@ -2064,15 +4478,20 @@ def calcular_custo_bedrock(
     """
 
     if "haiku" in modelo.lower():
-        custo = (
-            (tokens_input / 1_000_000 * CUSTO_HAIKU_INPUT_1M) +
-            (tokens_output / 1_000_000 * CUSTO_HAIKU_OUTPUT_1M)
-        )
+        preco_input, preco_output = CUSTO_HAIKU_INPUT_1M, CUSTO_HAIKU_OUTPUT_1M
     else:  # Default to Sonnet pricing
-        custo = (
-            (tokens_input / 1_000_000 * CUSTO_SONNET_INPUT_1M) +
-            (tokens_output / 1_000_000 * CUSTO_SONNET_OUTPUT_1M)
-        )
+        preco_input, preco_output = CUSTO_SONNET_INPUT_1M, CUSTO_SONNET_OUTPUT_1M
+
+    tokens_input_equivalentes = (
+        tokens_input +
+        tokens_cache_leitura * FATOR_CACHE_LEITURA +
+        tokens_cache_escrita * FATOR_CACHE_ESCRITA
+    )
+
+    custo = (
+        (tokens_input_equivalentes / 1_000_000 * preco_input) +
+        (tokens_output / 1_000_000 * preco_output)
+    )
 
     return round(custo, 6)
 
@@ -2164,162 +4583,427 @@ def validar_resposta_bedrock(
         "explicacao_tecnica"
     ]
 
-    for campo in campos_texto:
-        if campo not in resultado_json:
-            return False, f"Campo {campo} ausente"
+    for campo in campos_texto:
+        if campo not in resultado_json:
+            return False, f"Campo {campo} ausente"
+
+        if not isinstance(resultado_json[campo], str):
+            return False, f"Campo {campo} não é string"
+
+        if len(resultado_json[campo].strip()) == 0:
+            return False, f"Campo {campo} está vazio"
+
+    return True, ""
+
+# ======================================================================
+# Resilient JSON Extraction (Regex Fallback Strategy)
+# ======================================================================
+
+def extrair_json_com_regex(
+    texto_resposta: str
+) -> Optional[dict]:
+    """
+    Attempts to extract valid JSON from LLM output using fallback strategies.
+
+    Handles:
+    - JSON wrapped in markdown blocks (```json ... ```)
+    - JSON with leading/trailing explanatory text
+    - Valid JSON with formatting noise
+    """
+
+    # ------------------------------------------------------------------
+    # 1. Attempt to extract JSON block via regex
+    # ------------------------------------------------------------------
+    match = RE_JSON_OBJETO.search(texto_resposta)
+
+    if match:
+        try:
+            json_str = match.group(0)
+            return json.loads(json_str)
+        except json.JSONDecodeError:
+            pass
+
+    # ------------------------------------------------------------------
+    # 2. Attempt to remove markdown fences
+    # ------------------------------------------------------------------
+    texto_limpo = texto_resposta.strip()
+
+    if texto_limpo.startswith("```json"):
+        texto_limpo = texto_limpo[7:]
+
+    if texto_limpo.startswith("```"):
+        texto_limpo = texto_limpo[3:]
+
+    if texto_limpo.endswith("```"):
+        texto_limpo = texto_limpo[:-3]
+
+    texto_limpo = texto_limpo.strip()
+
+    try:
+        return json.loads(texto_limpo)
+    except json.JSONDecodeError:
+        pass
+
+    return None
+
+# ======================================================================
+# Bedrock Prompt Builder (Few-Shot Enhanced - v5.1)
+# ======================================================================
+
+# Static prompt prefixes (system block): instructions, few-shot
+# examples and output format. Per-message data goes in the user
+# message built by construir_prompt_bedrock. Both are below the
+# minimum cacheable length (~380 and ~105 tokens), so they are only
+# cached once grown past PROMPT_CACHE_MIN_TOKENS.
+
+PROMPT_SISTEMA_PROFUNDO = """Você é um sistema técnico especializado em detecção de fraudes digitais, engenharia social e golpes financeiros.
+
+Analise o texto enviado com profundidade máxima, considerando:
+- Intenção implícita e manipulação psicológica
+- Coerência narrativa e contradições internas
+- Pressão emocional e temporal
+- Padrões de urgência artificial
+- Perfil psicológico do emissor
+- Probabilidade real de fraude
+
+EXEMPLOS DE RESPOSTA CORRETA:
+
+Entrada: "MÃE! ME SEQUESTRARAM! NÃO CHAMA POLÍCIA! TRANSFERE R$ 5000 AGORA!"
+Saída: {"probabilidade_golpe":98,"categoria_principal":"ENGENHARIA_SOCIAL","subtipo":"falso sequestro","nivel_manipulacao_psicologica":9,"intencao_detectada":"extorsão via pânico familiar","explicacao_tecnica":"proibição de contato com autoridades + urgência extrema + vínculo familiar"}
+
+Entrada: "Recebi mensagem pedindo PIX. Isso é golpe?"
+Saída: {"probabilidade_golpe":5,"categoria_principal":"OUTRO","subtipo":"consulta investigativa","nivel_manipulacao_psicologica":0,"intencao_detectada":"usuário verificando suspeita","explicacao_tecnica":"contexto de dúvida explícita, sem padrão de fraude"}
+
+Responda EXCLUSIVAMENTE em JSON válido (sem comentários, sem markdown):
+
+{
+  "probabilidade_golpe": 0-100,
+  "categoria_principal": "PHISHING|ENGENHARIA_SOCIAL|FINANCEIRO|MALWARE|CRYPTO|TRABALHO|ECOMMERCE|OUTRO",
+  "subtipo": "descrição curta do subtipo",
+  "nivel_manipulacao_psicologica": 0-10,
+  "intencao_detectada": "descrição técnica da intenção",
+  "explicacao_tecnica": "explicação técnica concisa"
+}"""
+
+PROMPT_SISTEMA_BASICO = """Você é um detector técnico de fraudes. Responda APENAS em JSON válido, sem texto adicional, sem markdown.
+
+Formato obrigatório:
+{
+  "probabilidade_golpe": <numero entre 0 e 100>,
+  "categoria_principal": "<PHISHING|ENGENHARIA_SOCIAL|FINANCEIRO|MALWARE|OUTRO>",
+  "subtipo": "<string curta>",
+  "nivel_manipulacao_psicologica": <numero entre 0 e 10>,
+  "intencao_detectada": "<string>",
+  "explicacao_tecnica": "<string>"
+}"""
+
+
+def construir_prompt_bedrock(
+    texto: str,
+    score_heuristico: int,
+    categorias: List[str],
+    sinais: Dict[str, float],
+    nivel_analise: str = "basico"
+) -> Tuple[str, str]:
+    """
+    Builds structured prompt for Claude via Bedrock.
+
+    Returns (system prefix, user message): the prefix is static per
+    analysis level (prompt-cacheable once long enough); only the short
+    user message varies per message.
+
+    - Supports basic mode (concise evaluation)
+    - Supports deep mode with few-shot examples (Sonnet)
+    """
+
+    sinais_str = ", ".join(
+        [f"{k}={v:.1f}" for k, v in sinais.items() if v != 0]
+    )
+
+    categorias_str = ", ".join(categorias) if categorias else "Nenhuma"
+
+    # ------------------------------------------------------------------
+    # Deep analysis mode (Few-Shot)
+    # ------------------------------------------------------------------
+    if nivel_analise == "profundo":
+
+        mensagem = f"""Texto a analisar:
+\"\"\"
+{texto[:800]}
+\"\"\"
+
+Score heurístico preliminar: {score_heuristico}
+Categorias detectadas: {categorias_str}
+Sinais semânticos: {sinais_str}
+
+Responda apenas o JSON, sem texto adicional."""
+
+        return PROMPT_SISTEMA_PROFUNDO, mensagem
+
+    # ------------------------------------------------------------------
+    # Basic analysis mode
+    # ------------------------------------------------------------------
+    mensagem = f"""Texto a analisar:
+\"\"\"{texto[:500]}\"\"\"
+
+Score heurístico: {score_heuristico}
+Categorias: {categorias_str}"""
+
+    return PROMPT_SISTEMA_BASICO, mensagem
+
+
+# Minimum cacheable prefix per model (shorter prefixes are never cached)
+PROMPT_CACHE_MIN_TOKENS = {"haiku": 2048, "sonnet": 1024}
+
+
+def estimar_tokens_prompt(texto: str) -> int:
+    """
+    Lower-bound token estimate (~4 characters per token; Portuguese
+    text usually tokenizes denser, so real counts are higher).
+    """
+
+    return len(texto) // 4
+
+
+def bloco_sistema_bedrock(
+    prompt_sistema: str,
+    modelo: str
+) -> List[Dict[str, Any]]:
+    """
+    System content block, marked as a prompt cache breakpoint when
+    caching is enabled and the prefix can reach the model's minimum.
+    """
+
+    bloco: Dict[str, Any] = {"type": "text", "text": prompt_sistema}
+
+    if (
+        BEDROCK_PROMPT_CACHE_ENABLED and
+        estimar_tokens_prompt(prompt_sistema) >= PROMPT_CACHE_MIN_TOKENS.get(modelo, 0)
+    ):
+        bloco["cache_control"] = {"type": "ephemeral"}
+
+    return [bloco]
+
+# ======================================================================
+# Bedrock Circuit Breaker
+# ======================================================================
+
+class DisjuntorBedrock:
+    """
+    Closed / open / half-open circuit breaker for Bedrock calls.
+
+    - Closed: calls go through; outcomes (failure or slow call) are kept
+      in a sliding window, and the circuit opens when the failure rate
+      reaches the threshold
+    - Open: no calls (heuristic-only) until the open period ends
+    - Half-open: a single probe call; success closes, failure reopens
+
+    With DISJUNTOR_COMPARTILHADO, opening is published in the cache table
+    and other containers adopt it on their next sync.
+    """
+
+    FECHADO = "fechado"
+    ABERTO = "aberto"
+    SEMIABERTO = "semiaberto"
+
+    CHAVE_COMPARTILHADA = "DISJUNTOR#bedrock"
+
+    METRICA_TRANSICAO = {
+        ABERTO: "circuit_opened",
+        SEMIABERTO: "circuit_half_opened",
+        FECHADO: "circuit_closed"
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.estado = self.FECHADO
+        self._resultados: deque = deque(maxlen=max(1, DISJUNTOR_JANELA))
+        self._aberto_ate = 0.0  # epoch seconds
+        self._sonda_em_andamento = False
+        self._proxima_sync = 0.0
+
+    # ------------------------------------------------------------------
+    # State
+    # ------------------------------------------------------------------
+
+    def _transicionar(self, novo: str, motivo: str):
+        anterior, self.estado = self.estado, novo
+
+        logger.warning(
+            f"bedrock_circuit_transition "
+            f"| from={anterior} | to={novo} | reason={motivo}"
+        )
+        AGREGADOR_METRICAS.somar({self.METRICA_TRANSICAO[novo]: 1})
+
+    def _abrir(self, motivo: str, ate: Optional[float] = None):
+        self._aberto_ate = ate or time.time() + DISJUNTOR_ABERTO_SEGUNDOS
+        self._sonda_em_andamento = False
+        self._resultados.clear()
+        self._transicionar(self.ABERTO, motivo)
 
-        if not isinstance(resultado_json[campo], str):
-            return False, f"Campo {campo} não é string"
+        if DISJUNTOR_COMPARTILHADO and ate is None:
+            self._publicar()
 
-        if len(resultado_json[campo].strip()) == 0:
-            return False, f"Campo {campo} está vazio"
+    def _atualizar(self):
+        """
+        Open -> half-open once the open period is over; adopts an open
+        circuit published by another container (closed state only).
+        """
 
-    return True, ""
+        agora = time.time()
 
-# ======================================================================
-# Resilient JSON Extraction (Regex Fallback Strategy)
-# ======================================================================
+        if self.estado == self.ABERTO and agora >= self._aberto_ate:
+            self._transicionar(self.SEMIABERTO, "open_period_elapsed")
 
-def extrair_json_com_regex(
-    texto_resposta: str
-) -> Optional[dict]:
-    """
-    Attempts to extract valid JSON from LLM output using fallback strategies.
+        elif (
+            self.estado == self.FECHADO and
+            DISJUNTOR_COMPARTILHADO and
+            agora >= self._proxima_sync
+        ):
+            self._proxima_sync = agora + DISJUNTOR_SYNC_SEGUNDOS
+            aberto_ate = self._ler_compartilhado()
 
-    Handles:
-    - JSON wrapped in markdown blocks (```json ... ```)
-    - JSON with leading/trailing explanatory text
-    - Valid JSON with formatting noise
-    """
+            if aberto_ate > agora:
+                self._abrir("shared_state", ate=aberto_ate)
 
     # ------------------------------------------------------------------
-    # 1. Attempt to extract JSON block via regex
+    # Cross-container state
     # ------------------------------------------------------------------
-    match = re.search(r'\{.*\}', texto_resposta, re.DOTALL)
 
-    if match:
+    def _publicar(self):
         try:
-            json_str = match.group(0)
-            return json.loads(json_str)
-        except json.JSONDecodeError:
-            pass
+            cache_table.put_item(Item={
+                "pk": self.CHAVE_COMPARTILHADA,
+                "aberto_ate": int(self._aberto_ate),
+                "ttl": int(self._aberto_ate) + 60
+            })
+        except Exception as e:
+            logger.warning(f"circuit_publish_failed | error={e}")
+
+    def _ler_compartilhado(self) -> float:
+        try:
+            item = cache_table.get_item(
+                Key={"pk": self.CHAVE_COMPARTILHADA}
+            ).get("Item")
+        except Exception as e:
+            logger.warning(f"circuit_sync_failed | error={e}")
+            return 0.0
+
+        return float(item["aberto_ate"]) if item else 0.0
 
     # ------------------------------------------------------------------
-    # 2. Attempt to remove markdown fences
+    # Public API
     # ------------------------------------------------------------------
-    texto_limpo = texto_resposta.strip()
-
-    if texto_limpo.startswith("```json"):
-        texto_limpo = texto_limpo[7:]
 
-    if texto_limpo.startswith("```"):
-        texto_limpo = texto_limpo[3:]
+    def disponivel(self) -> bool:
+        """
+        Whether Bedrock may be called at all (no probe is reserved).
+        """
 
-    if texto_limpo.endswith("```"):
-        texto_limpo = texto_limpo[:-3]
+        if not DISJUNTOR_ENABLED:
+            return True
 
-    texto_limpo = texto_limpo.strip()
+        with self._lock:
+            self._atualizar()
 
-    try:
-        return json.loads(texto_limpo)
-    except json.JSONDecodeError:
-        pass
+            if self.estado == self.SEMIABERTO:
+                return not self._sonda_em_andamento
 
-    return None
+            return self.estado == self.FECHADO
 
-# ======================================================================
-# Bedrock Prompt Builder (Few-Shot Enhanced - v5.1)
-# ======================================================================
+    def permitir(self) -> bool:
+        """
+        Reserves a call; in half-open state only one probe at a time.
+        Every permitted call must be followed by `registrar` (or by
+        `liberar` when its error says nothing about availability).
+        """
 
-def construir_prompt_bedrock(
-    texto: str,
-    score_heuristico: int,
-    categorias: List[str],
-    sinais: Dict[str, float],
-    nivel_analise: str = "basico"
-) -> str:
-    """
-    Builds structured prompt for Claude via Bedrock.
+        if not DISJUNTOR_ENABLED:
+            return True
 
-    - Supports basic mode (concise evaluation)
-    - Supports deep mode with few-shot examples (Sonnet)
-    """
+        with self._lock:
+            self._atualizar()
 
-    sinais_str = ", ".join(
-        [f"{k}={v:.1f}" for k, v in sinais.items() if v != 0]
-    )
+            if self.estado == self.FECHADO:
+                return True
 
-    categorias_str = ", ".join(categorias) if categorias else "Nenhuma"
+            if self.estado == self.SEMIABERTO and not self._sonda_em_andamento:
+                self._sonda_em_andamento = True
+                return True
 
-    # ------------------------------------------------------------------
-    # Deep analysis mode (Few-Shot)
-    # ------------------------------------------------------------------
-    if nivel_analise == "profundo":
+            return False
 
-        prompt = f"""Você é um sistema técnico especializado em detecção de fraudes digitais, engenharia social e golpes financeiros.
+    def registrar(self, sucesso: bool, tempo_ms: float):
+        if not DISJUNTOR_ENABLED:
+            return
 
-Analise o texto abaixo com profundidade máxima, considerando:
-- Intenção implícita e manipulação psicológica
-- Coerência narrativa e contradições internas
-- Pressão emocional e temporal
-- Padrões de urgência artificial
-- Perfil psicológico do emissor
-- Probabilidade real de fraude
+        falha = not sucesso or tempo_ms > DISJUNTOR_LATENCIA_MS
 
-EXEMPLOS DE RESPOSTA CORRETA:
+        with self._lock:
+            if self.estado == self.SEMIABERTO:
+                if falha:
+                    self._abrir("probe_failed")
+                else:
+                    self._sonda_em_andamento = False
+                    self._resultados.clear()
+                    self._transicionar(self.FECHADO, "probe_succeeded")
+                return
 
-Entrada: "MÃE! ME SEQUESTRARAM! NÃO CHAMA POLÍCIA! TRANSFERE R$ 5000 AGORA!"
-Saída: {{"probabilidade_golpe":98,"categoria_principal":"ENGENHARIA_SOCIAL","subtipo":"falso sequestro","nivel_manipulacao_psicologica":9,"intencao_detectada":"extorsão via pânico familiar","explicacao_tecnica":"proibição de contato com autoridades + urgência extrema + vínculo familiar"}}
+            if self.estado != self.FECHADO:
+                return
 
-Entrada: "Recebi mensagem pedindo PIX. Isso é golpe?"
-Saída: {{"probabilidade_golpe":5,"categoria_principal":"OUTRO","subtipo":"consulta investigativa","nivel_manipulacao_psicologica":0,"intencao_detectada":"usuário verificando suspeita","explicacao_tecnica":"contexto de dúvida explícita, sem padrão de fraude"}}
+            self._resultados.append(falha)
+            total = len(self._resultados)
 
-Responda EXCLUSIVAMENTE em JSON válido (sem comentários, sem markdown):
+            if (
+                total >= DISJUNTOR_MIN_CHAMADAS and
+                sum(self._resultados) / total >= DISJUNTOR_TAXA_FALHA
+            ):
+                self._abrir(
+                    f"failure_rate_{sum(self._resultados)}/{total}"
+                )
 
-{{
-  "probabilidade_golpe": 0-100,
-  "categoria_principal": "PHISHING|ENGENHARIA_SOCIAL|FINANCEIRO|MALWARE|CRYPTO|TRABALHO|ECOMMERCE|OUTRO",
-  "subtipo": "descrição curta do subtipo",
-  "nivel_manipulacao_psicologica": 0-10,
-  "intencao_detectada": "descrição técnica da intenção",
-  "explicacao_tecnica": "explicação técnica concisa"
-}}
+    def liberar(self):
+        """
+        Ends a permitted call without recording an outcome; a half-open
+        probe slot is released for the next call.
+        """
 
-Texto a analisar:
-\"\"\"
-{texto[:800]}
-\"\"\"
+        if not DISJUNTOR_ENABLED:
+            return
 
-Score heurístico preliminar: {score_heuristico}
-Categorias detectadas: {categorias_str}
-Sinais semânticos: {sinais_str}
+        with self._lock:
+            if self.estado == self.SEMIABERTO:
+                self._sonda_em_andamento = False
 
-Responda apenas o JSON, sem texto adicional."""
 
-    # ------------------------------------------------------------------
-    # Basic analysis mode
-    # ------------------------------------------------------------------
-    else:
+DISJUNTOR_BEDROCK = DisjuntorBedrock()
 
-        prompt = f"""Você é um detector técnico de fraudes. Responda APENAS em JSON válido, sem texto adicional, sem markdown.
+# Overload / outage errors: the only ones counted as circuit failures.
+# Request errors (validation, access, model not ready) would fail the
+# same way on every retry and say nothing about Bedrock's health.
+ERROS_DISPONIBILIDADE_BEDROCK = frozenset({
+    "ThrottlingException",
+    "ServiceUnavailableException",
+    "ModelTimeoutException"
+})
 
-Formato obrigatório:
-{{
-  "probabilidade_golpe": <numero entre 0 e 100>,
-  "categoria_principal": "<PHISHING|ENGENHARIA_SOCIAL|FINANCEIRO|MALWARE|OUTRO>",
-  "subtipo": "<string curta>",
-  "nivel_manipulacao_psicologica": <numero entre 0 e 10>,
-  "intencao_detectada": "<string>",
-  "explicacao_tecnica": "<string>"
-}}
 
-Texto a analisar:
-\"\"\"{texto[:500]}\"\"\"
+def falha_disponibilidade_bedrock(erro: Exception) -> bool:
+    """
+    Whether a Bedrock call error counts as a circuit breaker failure:
+    throttling, service unavailable, model timeout, any 5xx answer, or
+    a read / connect timeout.
+    """
 
-Score heurístico: {score_heuristico}
-Categorias: {categorias_str}"""
+    if isinstance(erro, ClientError):
+        codigo = erro.response.get("Error", {}).get("Code", "")
+        status = erro.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        return codigo in ERROS_DISPONIBILIDADE_BEDROCK or status >= 500
 
-    return prompt
+    return isinstance(
+        erro, (ReadTimeoutError, ConnectTimeoutError, EndpointConnectionError)
+    )
 
 # ======================================================================
 # Bedrock Invocation Layer (Primary LLM Integration)
@@ -2331,7 +5015,8 @@ def chamar_bedrock_claude(
     categorias: List[str],
     sinais: Dict[str, float],
     modelo: str = "haiku",
-    nivel_analise: str = "basico"
+    nivel_analise: str = "basico",
+    prazo: Optional[Prazo] = None
 ) -> Optional[RespostaBedrock]:
     """
     Invokes Claude via Amazon Bedrock.
@@ -2341,10 +5026,12 @@ def chamar_bedrock_claude(
     - Regex-based JSON recovery
     - DynamoDB-based metrics tracking
     - Cost calculation per request
+    - Read timeout sized from the deadline (BEDROCK_TIMEOUT at most);
+      skipped when under a second is left
     """
 
     if not BEDROCK_ENABLED:
-        logger.info("bedrock_skipped | reason=disabled")
+        rastrear("bedrock_skipped:disabled")
         return None
 
     inicio = time.time()
@@ -2355,7 +5042,7 @@ def chamar_bedrock_claude(
         else BEDROCK_MODEL_SONNET
     )
 
-    prompt = construir_prompt_bedrock(
+    prompt_sistema, prompt = construir_prompt_bedrock(
         texto,
         score_heuristico,
         categorias,
@@ -2363,10 +5050,36 @@ def chamar_bedrock_claude(
         nivel_analise
     )
 
+    # ------------------------------------------------------------------
+    # Memo: same model + prompt already answered (no tokens billed)
+    # ------------------------------------------------------------------
+    chave_memo = None
+
+    if BEDROCK_MEMO_ENABLED:
+        chave_memo = chave_memo_bedrock(model_id, prompt_sistema + prompt)
+        memo = buscar_memo_bedrock(chave_memo)
+
+        if memo is not None:
+            AGREGADOR_METRICAS.somar({
+                "memo_hits": 1,
+                "avoided_cost_usd": memo.get("custo_usd", 0.0)
+            })
+            rastrear("bedrock_memo_hit", modelo, nivel_analise)
+
+            return RespostaBedrock(
+                **{campo: memo[campo] for campo in CAMPOS_MEMO_BEDROCK},
+                modelo_usado=modelo,
+                tokens_input=0,
+                tokens_output=0,
+                custo_usd=0.0,
+                tempo_ms=round((time.time() - inicio) * 1000, 2)
+            )
+
     payload = {
         "anthropic_version": "bedrock-2023-05-31",
         "max_tokens": BEDROCK_MAX_TOKENS,
         "temperature": 0.0,
+        "system": bloco_sistema_bedrock(prompt_sistema, modelo),
         "messages": [
             {
                 "role": "user",
@@ -2375,8 +5088,22 @@ def chamar_bedrock_claude(
         ]
     }
 
+    timeout = timeout_etapa(prazo, BEDROCK_TIMEOUT, minimo=1.0)
+
+    if timeout is None:
+        rastrear("bedrock_skipped:deadline", modelo)
+        AGREGADOR_METRICAS.somar({"deadline_skips": 1})
+        return None
+
+    if not DISJUNTOR_BEDROCK.permitir():
+        rastrear("bedrock_skipped:circuit_open", modelo)
+        AGREGADOR_METRICAS.somar({"circuit_skips": 1})
+        return None
+
+    resposta_recebida = False
+
     try:
-        response = bedrock_runtime.invoke_model(
+        response = obter_cliente_bedrock(timeout).invoke_model(
             modelId=model_id,
             body=json.dumps(payload),
             contentType="application/json",
@@ -2386,6 +5113,10 @@ def chamar_bedrock_claude(
         response_body = json.loads(response["body"].read())
         tempo_ms = (time.time() - inicio) * 1000
 
+        # The service answered: content problems below are not outages
+        resposta_recebida = True
+        DISJUNTOR_BEDROCK.registrar(True, tempo_ms)
+
         texto_resposta = response_body["content"][0]["text"]
 
         # --------------------------------------------------------------
@@ -2422,35 +5153,42 @@ def chamar_bedrock_claude(
         # --------------------------------------------------------------
         # Token Usage & Cost Calculation
         # --------------------------------------------------------------
-        tokens_input = response_body["usage"]["input_tokens"]
-        tokens_output = response_body["usage"]["output_tokens"]
+        uso = response_body["usage"]
+        tokens_input = uso["input_tokens"]
+        tokens_output = uso["output_tokens"]
+        tokens_cache_leitura = uso.get("cache_read_input_tokens") or 0
+        tokens_cache_escrita = uso.get("cache_creation_input_tokens") or 0
 
         custo = calcular_custo_bedrock(
             model_id,
             tokens_input,
-            tokens_output
+            tokens_output,
+            tokens_cache_leitura,
+            tokens_cache_escrita
+        )
+
+        # Non-blocking metrics update (write-behind)
+        incrementar_metricas_bedrock_batch(
+            modelo,
+            custo,
+            tokens_cache_leitura,
+            tokens_cache_escrita
+        )
+
+        rastrear(
+            "bedrock_success",
+            modelo,
+            nivel_analise,
+            tokens_input,
+            tokens_output,
+            custo,
+            round(tempo_ms, 2),
+            resultado_json["probabilidade_golpe"],
+            tokens_cache_leitura,
+            tokens_cache_escrita
         )
 
-        # Non-blocking metrics update
-        threading.Thread(
-            target=incrementar_metricas_bedrock_batch,
-            args=(modelo, custo),
-            daemon=True
-        ).start()
-
-        # Structured success log
-        logger.info(json.dumps({
-            "event": "bedrock_success",
-            "model": modelo,
-            "analysis_level": nivel_analise,
-            "tokens_input": tokens_input,
-            "tokens_output": tokens_output,
-            "cost_usd": custo,
-            "latency_ms": round(tempo_ms, 2),
-            "fraud_probability": resultado_json["probabilidade_golpe"]
-        }))
-
-        return RespostaBedrock(
+        resposta_bedrock = RespostaBedrock(
             probabilidade_golpe=int(resultado_json["probabilidade_golpe"]),
             categoria_principal=resultado_json["categoria_principal"],
             subtipo=resultado_json["subtipo"],
@@ -2463,14 +5201,26 @@ def chamar_bedrock_claude(
             tokens_input=tokens_input,
             tokens_output=tokens_output,
             custo_usd=custo,
-            tempo_ms=round(tempo_ms, 2)
+            tempo_ms=round(tempo_ms, 2),
+            tokens_cache_leitura=tokens_cache_leitura,
+            tokens_cache_escrita=tokens_cache_escrita
         )
 
+        if chave_memo:
+            AGREGADOR_METRICAS.somar({"memo_misses": 1})
+            salvar_memo_bedrock(chave_memo, resposta_bedrock)
+
+        return resposta_bedrock
+
     except ClientError as e:
         error_code = e.response.get("Error", {}).get("Code", "")
         logger.error(
             f"bedrock_client_error | code={error_code}"
         )
+        if falha_disponibilidade_bedrock(e):
+            DISJUNTOR_BEDROCK.registrar(False, (time.time() - inicio) * 1000)
+        else:
+            DISJUNTOR_BEDROCK.liberar()
         incrementar_metrica_bedrock("fallback_count", 1)
         return None
 
@@ -2478,6 +5228,11 @@ def chamar_bedrock_claude(
         logger.error(
             f"bedrock_unexpected_error | error={str(e)}"
         )
+        if not resposta_recebida:
+            if falha_disponibilidade_bedrock(e):
+                DISJUNTOR_BEDROCK.registrar(False, (time.time() - inicio) * 1000)
+            else:
+                DISJUNTOR_BEDROCK.liberar()
         logger.error(traceback.format_exc())
         incrementar_metrica_bedrock("fallback_count", 1)
         return None
@@ -2490,7 +5245,7 @@ def decidir_escalonamento_bedrock(
     score_heuristico: int,
     categorias_ativas: set,
     sinais: Dict[str, float],
-    texto: str
+    texto: Union[str, ContextoAnalise]
 ) -> Tuple[bool, Optional[str], Optional[str]]:
     """
     Determines whether to escalate to Bedrock (LLM)
@@ -2507,20 +5262,14 @@ def decidir_escalonamento_bedrock(
     # Safe Zone (Low Risk)
     # ------------------------------------------------------------------
     if score_heuristico < ZONA_COGNITIVA_MIN:
-        logger.info(
-            f"escalation_decision | action=skip | "
-            f"reason=safe_zone | score={score_heuristico}"
-        )
+        rastrear("escalation_skip:safe_zone", score_heuristico)
         return False, None, None
 
     # ------------------------------------------------------------------
     # Obvious Scam Zone (High Risk)
     # ------------------------------------------------------------------
     if score_heuristico >= ZONA_COGNITIVA_MAX:
-        logger.info(
-            f"escalation_decision | action=skip | "
-            f"reason=obvious_scam | score={score_heuristico}"
-        )
+        rastrear("escalation_skip:obvious_scam", score_heuristico)
         return False, None, None
 
     # ------------------------------------------------------------------
@@ -2542,11 +5291,7 @@ def decidir_escalonamento_bedrock(
         sinais.get("ameaca", 0) * 20
     )
 
-    tem_link = (
-        "http://" in texto.lower() or
-        "https://" in texto.lower() or
-        "www." in texto.lower()
-    )
+    tem_link = obter_contexto(texto).tem_link
 
     gatilho_adicional = (
         score_heuristico >= 30 or
@@ -2555,16 +5300,17 @@ def decidir_escalonamento_bedrock(
     )
 
     if not tem_categoria_critica and not gatilho_adicional:
-        logger.info(
-            "escalation_decision | action=skip | "
-            "reason=no_valid_triggers"
-        )
+        rastrear("escalation_skip:no_valid_triggers")
         return False, None, None
 
-    logger.info(
-        "escalation_decision | action=invoke_llm | "
-        f"score={score_heuristico}"
-    )
+    # ------------------------------------------------------------------
+    # Circuit Breaker (Bedrock degraded: heuristic-only)
+    # ------------------------------------------------------------------
+    if not DISJUNTOR_BEDROCK.disponivel():
+        rastrear("escalation_skip:circuit_open")
+        return False, None, None
+
+    rastrear("escalation_invoke_llm", score_heuristico)
 
     # ------------------------------------------------------------------
     # Model Selection
@@ -2582,54 +5328,275 @@ def decidir_repass_sonnet(
     resposta_haiku: RespostaBedrock
 ) -> bool:
     """
-    Determines whether a second-pass analysis with Sonnet is required
-    after an initial Haiku evaluation.
+    Determines whether a second-pass analysis with Sonnet is required
+    after an initial Haiku evaluation.
+
+    Escalation triggers:
+    - Ambiguous probability range
+    - High psychological manipulation score
+    - Strong contradiction signals detected in subtype
+    """
+
+    prob = resposta_haiku.probabilidade_golpe
+    manip = resposta_haiku.nivel_manipulacao_psicologica
+
+    # ------------------------------------------------------------------
+    # 1. Ambiguous probability range
+    # ------------------------------------------------------------------
+    if SONNET_REPASS_PROB_MIN <= prob <= SONNET_REPASS_PROB_MAX:
+        rastrear("double_pass_trigger:ambiguous_probability", prob)
+        return True
+
+    # ------------------------------------------------------------------
+    # 2. High manipulation score
+    # ------------------------------------------------------------------
+    if manip >= SONNET_REPASS_MANIPULACAO:
+        rastrear("double_pass_trigger:high_manipulation", manip)
+        return True
+
+    # ------------------------------------------------------------------
+    # 3. Strong contradiction indicator
+    # ------------------------------------------------------------------
+    subtipo_lower = resposta_haiku.subtipo.lower()
+
+    if (
+        "contradição" in subtipo_lower or
+        "inconsistência" in subtipo_lower
+    ):
+        rastrear("double_pass_trigger:contradiction_detected")
+        return True
+
+    rastrear("double_pass_skip")
+    return False
+
+
+# ----------------------------------------------------------------------
+# Speculative Double Pass (Haiku ‖ Sonnet)
+# ----------------------------------------------------------------------
+
+_EXECUTOR_BEDROCK = ThreadPoolExecutor(
+    max_workers=4,
+    thread_name_prefix="bedrock"
+)
+
+# Signals that tend to come back as a high manipulation score
+_SINAIS_PRESSAO = ("urgencia", "ameaca", "proibicao", "relacao_pessoal", "autoridade")
+
+
+class EstatisticasRepass:
+    """
+    Per-category repass rate observed on this container (Haiku answers
+    that were sent to Sonnet), Laplace-smoothed.
+    """
+
+    MIN_OBSERVACOES = 5
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._contagem: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+
+    def registrar(self, categorias: Iterable[str], repassou: bool):
+        with self._lock:
+            for categoria in categorias:
+                contagem = self._contagem[categoria]
+                contagem[0] += 1
+                contagem[1] += int(repassou)
+
+    def taxa(self, categorias: Iterable[str]) -> Optional[float]:
+        """
+        Highest smoothed rate among categories with enough history.
+        """
+
+        with self._lock:
+            taxas = [
+                (repasses + 1) / (total + 2)
+                for total, repasses in (
+                    self._contagem[c] for c in categorias
+                    if c in self._contagem
+                )
+                if total >= self.MIN_OBSERVACOES
+            ]
+
+        return max(taxas) if taxas else None
+
+
+class OrcamentoEspeculativo:
+    """
+    Daily USD budget for speculative Sonnet calls whose answer was not
+    used (per container, reset at UTC midnight).
+    """
+
+    def __init__(self, limite_usd: float):
+        self.limite_usd = limite_usd
+        self._lock = threading.Lock()
+        self._dia = None
+        self._gasto = 0.0
+
+    def _virar_dia(self):
+        hoje = datetime.now(timezone.utc).date()
+        if hoje != self._dia:
+            self._dia = hoje
+            self._gasto = 0.0
+
+    def disponivel(self) -> bool:
+        with self._lock:
+            self._virar_dia()
+            return self._gasto < self.limite_usd
+
+    def consumir(self, custo: float):
+        with self._lock:
+            self._virar_dia()
+            self._gasto += custo
+
+
+ESTATISTICAS_REPASS = EstatisticasRepass()
+ORCAMENTO_ESPECULATIVO = OrcamentoEspeculativo(BEDROCK_ESPECULATIVO_ORCAMENTO_USD)
+
+
+def prever_repass_sonnet(
+    score_heuristico: int,
+    categorias: Iterable[str],
+    sinais: Dict[str, float]
+) -> float:
+    """
+    Estimated probability that Haiku's answer will trigger a Sonnet
+    repass, from the score band, the pressure-signal profile and the
+    observed repass rate of the active categories.
+    """
+
+    meio_faixa = (ZONA_COGNITIVA_MIN + ZONA_SONNET_BASICO_MAX) / 2
+    probabilidade = 0.35 if score_heuristico >= meio_faixa else 0.2
+
+    pressao = sum(sinais.get(s, 0) for s in _SINAIS_PRESSAO)
+    if pressao >= 2.0:
+        probabilidade += 0.3
+
+    historico = ESTATISTICAS_REPASS.taxa(categorias)
+    if historico is not None:
+        probabilidade = (probabilidade + historico) / 2
+
+    return probabilidade
+
+
+def _descartar_sonnet_especulativo(futuro):
+    """
+    Done-callback of an unused speculative call: its cost is wasted.
+    """
+
+    if futuro.cancelled():
+        return
+
+    resposta = futuro.result()
+    custo = resposta.custo_usd if resposta else 0.0
+
+    ORCAMENTO_ESPECULATIVO.consumir(custo)
+    AGREGADOR_METRICAS.somar({"speculative_wasted_usd": custo})
+
+
+def analisar_double_pass(
+    texto: str,
+    score_heuristico: int,
+    categorias: List[str],
+    sinais: Dict[str, float],
+    indicadores: Dict[str, Any],
+    prazo: Optional[Prazo] = None
+) -> Optional[RespostaBedrock]:
+    """
+    Haiku first pass with Sonnet repass (see decidir_repass_sonnet).
 
-    Escalation triggers:
-    - Ambiguous probability range
-    - High psychological manipulation score
-    - Strong contradiction signals detected in subtype
+    With BEDROCK_ESPECULATIVO_ENABLED and a likely repass, Sonnet is
+    launched at the same time as Haiku: its answer is used when the
+    repass condition holds (saving Haiku's latency) and discarded
+    otherwise, within the daily speculation budget.
     """
 
-    prob = resposta_haiku.probabilidade_golpe
-    manip = resposta_haiku.nivel_manipulacao_psicologica
+    argumentos = (texto, score_heuristico, categorias, sinais)
+    futuro_sonnet = None
 
-    # ------------------------------------------------------------------
-    # 1. Ambiguous probability range
-    # ------------------------------------------------------------------
-    if SONNET_REPASS_PROB_MIN <= prob <= SONNET_REPASS_PROB_MAX:
-        logger.info(
-            f"double_pass_trigger | reason=ambiguous_probability "
-            f"| value={prob}"
+    if (
+        BEDROCK_ESPECULATIVO_ENABLED and
+        prever_repass_sonnet(score_heuristico, categorias, sinais)
+        >= BEDROCK_ESPECULATIVO_PROB_MIN and
+        ORCAMENTO_ESPECULATIVO.disponivel()
+    ):
+        rastrear("speculative_sonnet_launched")
+        futuro_sonnet = _EXECUTOR_BEDROCK.submit(
+            contextvars.copy_context().run,
+            chamar_bedrock_claude,
+            *argumentos,
+            modelo="sonnet",
+            nivel_analise="profundo",
+            prazo=prazo
         )
-        return True
 
-    # ------------------------------------------------------------------
-    # 2. High manipulation score
-    # ------------------------------------------------------------------
-    if manip >= SONNET_REPASS_MANIPULACAO:
-        logger.info(
-            f"double_pass_trigger | reason=high_manipulation "
-            f"| value={manip}"
-        )
-        return True
+    inicio = time.time()
 
-    # ------------------------------------------------------------------
-    # 3. Strong contradiction indicator
-    # ------------------------------------------------------------------
-    subtipo_lower = resposta_haiku.subtipo.lower()
+    resposta_haiku = chamar_bedrock_claude(
+        *argumentos,
+        modelo="haiku",
+        nivel_analise="basico",
+        prazo=prazo
+    )
 
-    if (
-        "contradição" in subtipo_lower or
-        "inconsistência" in subtipo_lower
-    ):
-        logger.info(
-            "double_pass_trigger | reason=contradiction_detected"
+    repass = bool(resposta_haiku) and decidir_repass_sonnet(resposta_haiku)
+
+    if resposta_haiku:
+        ESTATISTICAS_REPASS.registrar(categorias, repass)
+
+    if futuro_sonnet is None:
+        if repass:
+            return chamar_bedrock_claude(
+                *argumentos,
+                modelo="sonnet",
+                nivel_analise="profundo",
+                prazo=prazo
+            )
+        return resposta_haiku
+
+    AGREGADOR_METRICAS.somar({"speculative_calls": 1})
+
+    # A failed Haiku pass falls back to the Sonnet answer in flight
+    if repass or resposta_haiku is None:
+        try:
+            resposta_sonnet = futuro_sonnet.result(
+                timeout=prazo.restante() if prazo else None
+            )
+        except FuturoTimeout:
+            # Still billed when it lands: charge it as a wasted call
+            rastrear("speculative_sonnet_deadline")
+            indicadores["especulacao_sonnet"] = "expirada"
+            futuro_sonnet.cancel()
+            futuro_sonnet.add_done_callback(_descartar_sonnet_especulativo)
+            resposta_sonnet = None
+
+        tempo_paralelo_ms = (time.time() - inicio) * 1000
+
+        if resposta_sonnet is None:
+            return resposta_haiku
+
+        economia_ms = max(
+            0.0,
+            (resposta_haiku.tempo_ms if resposta_haiku else 0.0) +
+            resposta_sonnet.tempo_ms - tempo_paralelo_ms
         )
-        return True
 
-    logger.info("double_pass_trigger | action=skip")
-    return False
+        indicadores["especulacao_sonnet"] = "usada"
+        indicadores["especulacao_economia_ms"] = round(economia_ms, 2)
+        AGREGADOR_METRICAS.somar({
+            "speculative_hits": 1,
+            "speculative_saved_ms": round(economia_ms)
+        })
+        rastrear("speculative_sonnet_used", round(economia_ms))
+
+        return resposta_sonnet
+
+    indicadores["especulacao_sonnet"] = "descartada"
+    rastrear("speculative_sonnet_discarded")
+
+    futuro_sonnet.cancel()
+    futuro_sonnet.add_done_callback(_descartar_sonnet_especulativo)
+
+    return resposta_haiku
 
 # ======================================================================
 # Hybrid Score Fusion Engine
@@ -2688,12 +5655,7 @@ def fusao_hibrida_score(
         (score_bedrock * peso_bedrock)
     )
 
-    logger.info(
-        f"hybrid_fusion "
-        f"| heur={score_heuristico} "
-        f"| bedrock={score_bedrock} "
-        f"| fused={score_fusao}"
-    )
+    rastrear("hybrid_fusion", score_heuristico, score_bedrock, score_fusao)
 
     # ------------------------------------------------------------------
     # High Psychological Manipulation Boost
@@ -2702,9 +5664,9 @@ def fusao_hibrida_score(
         score_fusao += 10
         indicadores["ajuste_manipulacao"] = 10
 
-        logger.info(
-            f"manipulation_boost_applied "
-            f"| level={resposta_bedrock.nivel_manipulacao_psicologica}"
+        rastrear(
+            "manipulation_boost_applied",
+            resposta_bedrock.nivel_manipulacao_psicologica
         )
 
     # ------------------------------------------------------------------
@@ -2718,11 +5680,7 @@ def fusao_hibrida_score(
             score_antes - score_fusao
         )
 
-        logger.info(
-            f"low_confidence_dampening "
-            f"| before={score_antes} "
-            f"| after={score_fusao}"
-        )
+        rastrear("low_confidence_dampening", score_antes, score_fusao)
 
     # ------------------------------------------------------------------
     # Final Score Normalization
@@ -2749,8 +5707,17 @@ def fusao_hibrida_score(
 # Temporal Manipulation Detection
 # ======================================================================
 
+_TEMPORAL_PRAZOS_CURTOS = registrar_termos([
+    "hoje",
+    "agora",
+    "24h",
+    "1 hora",
+    "imediatamente"
+])
+
+
 def detectar_manipulacao_temporal(
-    texto: str,
+    texto: Union[str, ContextoAnalise],
     sinais: Dict[str, float]
 ) -> Tuple[bool, str]:
     """
@@ -2761,22 +5728,14 @@ def detectar_manipulacao_temporal(
     - Countdown language (expiration / last chance)
     """
 
-    t = texto.lower()
+    ctx = obter_contexto(texto)
 
     # ------------------------------------------------------------------
     # Urgency + Short Deadline + Threat
     # ------------------------------------------------------------------
     if sinais.get("urgencia", 0) > 0:
 
-        prazos_curtos = [
-            "hoje",
-            "agora",
-            "24h",
-            "1 hora",
-            "imediatamente"
-        ]
-
-        tem_prazo = any(p in t for p in prazos_curtos)
+        tem_prazo = _tem_algum(ctx.termos, _TEMPORAL_PRAZOS_CURTOS)
         tem_ameaca = sinais.get("ameaca", 0) > 0
 
         if tem_prazo and tem_ameaca:
@@ -2788,10 +5747,7 @@ def detectar_manipulacao_temporal(
     # ------------------------------------------------------------------
     # Explicit Expiration / Countdown Language
     # ------------------------------------------------------------------
-    if re.search(
-        r"\b(expira|vence|última chance|último dia)\b",
-        t
-    ):
+    if RE_CONTAGEM_REGRESSIVA.search(ctx.texto_lower):
         return (
             True,
             "Manipulação temporal: contagem regressiva"
@@ -2803,14 +5759,17 @@ def detectar_manipulacao_temporal(
 # Google Safe Browsing Integration
 # ======================================================================
 
-def consultar_google_safe_browsing(url: str) -> str:
+def consultar_google_safe_browsing(
+    url: str,
+    prazo: Optional[Prazo] = None
+) -> str:
     """
     Queries Google Safe Browsing API for URL threat intelligence.
 
     Returns:
         - "SAFE"       → No threat detected
         - Threat type  → e.g. MALWARE, SOCIAL_ENGINEERING
-        - "UNKNOWN"    → Request failed after retries
+        - "UNKNOWN"    → Request failed after retries, or no time left
     """
 
     api_key = GOOGLE_SAFE_BROWSING_API_KEY
@@ -2818,6 +5777,10 @@ def consultar_google_safe_browsing(url: str) -> str:
     if not api_key:
         return "SAFE"
 
+    if timeout_etapa(prazo, 3) is None:
+        rastrear("safe_browsing_skipped:deadline")
+        return "UNKNOWN"
+
     endpoint = (
         "https://safebrowsing.googleapis.com/v4/"
         f"threatMatches:find?key={api_key}"
@@ -2842,6 +5805,11 @@ def consultar_google_safe_browsing(url: str) -> str:
     }
 
     def fazer_requisicao():
+        timeout = timeout_etapa(prazo, 3)
+
+        if timeout is None:
+            raise TimeoutError("deadline reached")
+
         req = urllib.request.Request(
             endpoint,
             data=json.dumps(payload).encode("utf-8"),
@@ -2849,7 +5817,7 @@ def consultar_google_safe_browsing(url: str) -> str:
             method="POST"
         )
 
-        with urllib.request.urlopen(req, timeout=3) as response:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
             data = json.loads(
                 response.read().decode("utf-8")
             )
@@ -2866,7 +5834,8 @@ def consultar_google_safe_browsing(url: str) -> str:
     resultado = executar_com_retry(
         fazer_requisicao,
         max_tentativas=2,
-        descricao="Safe Browsing"
+        descricao="Safe Browsing",
+        prazo=prazo
     )
 
     if resultado is None:
@@ -2892,58 +5861,548 @@ def calcular_ttl() -> int:
     return int(time.time()) + TTL_SECONDS
 
 
-def buscar_cache(conteudo_hash: str) -> Optional[Dict]:
+# ----------------------------------------------------------------------
+# In-Process Verdict Cache (LRU + TTL)
+# ----------------------------------------------------------------------
+
+class CacheMemoriaLRU:
+    """
+    Bounded LRU with per-entry TTL, local to the warm container.
+
+    Serves repeated texts (viral campaigns) without a DynamoDB read.
+    Thread-safe: writes also come from the async persistence thread.
+    """
+
+    def __init__(self, max_itens: int, ttl_segundos: int):
+        self.max_itens = max_itens
+        self.ttl_segundos = ttl_segundos
+        self._itens: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+        self.expirados = 0
+
+    def obter(self, chave: str) -> Optional[Dict]:
+        with self._lock:
+            entrada = self._itens.get(chave)
+
+            if entrada is None:
+                self.falhas += 1
+                return None
+
+            expira_em, valor = entrada
+
+            if expira_em <= time.monotonic():
+                del self._itens[chave]
+                self.expirados += 1
+                self.falhas += 1
+                return None
+
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return valor
+
+    def guardar(self, chave: str, valor: Dict):
+        if self.max_itens <= 0:
+            return
+
+        with self._lock:
+            self._itens[chave] = (time.monotonic() + self.ttl_segundos, valor)
+            self._itens.move_to_end(chave)
+
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+                self.remocoes += 1
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+
+    def estatisticas(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "itens": len(self._itens),
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "remocoes": self.remocoes,
+                "expirados": self.expirados
+            }
+
+
+CACHE_MEMORIA = CacheMemoriaLRU(
+    CACHE_MEMORIA_MAX_ITENS,
+    CACHE_MEMORIA_TTL_SECONDS
+)
+
+
+def obter_estatisticas_cache_memoria() -> Dict[str, int]:
+    """
+    Size and hit/miss/eviction/expiry counters of the in-process cache.
+    """
+    return CACHE_MEMORIA.estatisticas()
+
+
+# ----------------------------------------------------------------------
+# Bedrock Response Memo
+# ----------------------------------------------------------------------
+
+MEMO_BEDROCK = CacheMemoriaLRU(
+    BEDROCK_MEMO_MAX_ITENS,
+    BEDROCK_MEMO_TTL_SECONDS
+)
+
+CAMPOS_MEMO_BEDROCK = (
+    "probabilidade_golpe",
+    "categoria_principal",
+    "subtipo",
+    "nivel_manipulacao_psicologica",
+    "intencao_detectada",
+    "explicacao_tecnica"
+)
+
+
+def chave_memo_bedrock(model_id: str, prompt: str) -> str:
+    """
+    Cache table key of a Bedrock answer: model ID + prompt hash.
+    """
+    return f"BEDROCK#{gerar_hash_texto(model_id + chr(10) + prompt)}"
+
+
+def buscar_memo_bedrock(chave: str) -> Optional[Dict[str, Any]]:
     """
-    Retrieves latest cached analysis result for given content hash.
+    Validated answer fields for this prompt (LRU first, then the cache
+    table), or None. Lookup errors are treated as misses.
     """
 
+    item = MEMO_BEDROCK.obter(chave)
+
+    if item is not None:
+        return item
+
     try:
-        response = audit_table.query(
-            KeyConditionExpression=Key("pk").eq(conteudo_hash),
-            ScanIndexForward=False,
-            Limit=1
+        item = cache_table.get_item(Key={"pk": chave}).get("Item")
+
+    except Exception as e:
+        logger.warning(f"bedrock_memo_lookup_failed | error={e}")
+        return None
+
+    if not item or item.get("ttl", 0) <= time.time():
+        return None
+
+    item = {
+        k: (float(v) if k == "custo_usd" else int(v))
+        if isinstance(v, Decimal) else v
+        for k, v in item.items()
+    }
+
+    MEMO_BEDROCK.guardar(chave, item)
+    return item
+
+
+def salvar_memo_bedrock(chave: str, resposta: RespostaBedrock):
+    """
+    Stores the validated answer in both memo tiers (write-behind).
+    """
+
+    item = {
+        campo: getattr(resposta, campo)
+        for campo in CAMPOS_MEMO_BEDROCK
+    }
+    item["custo_usd"] = resposta.custo_usd
+
+    MEMO_BEDROCK.guardar(chave, item)
+
+    FILA_ESCRITA.gravar(cache_table, {
+        **item,
+        "pk": chave,
+        "custo_usd": Decimal(str(resposta.custo_usd)),
+        "ttl": int(time.time()) + BEDROCK_MEMO_TTL_SECONDS
+    })
+
+
+# ----------------------------------------------------------------------
+# Campaign Template Canonicalization
+# ----------------------------------------------------------------------
+
+# Second-level labels under country TLDs (e.g., "golpe.com.br")
+_SEGUNDO_NIVEL_DOMINIO = {
+    "com", "net", "org", "gov", "edu", "art", "blog", "app", "mil", "jus"
+}
+
+
+def dominio_registrado(url: str) -> str:
+    """
+    Registered domain of a URL ("a.b.golpe.com.br/x" -> "golpe.com.br").
+    """
+
+    if not url.startswith(("http://", "https://")):
+        url = "http://" + url
+
+    host = (urlparse(url).hostname or "").removeprefix("www.")
+    rotulos = host.split(".")
+
+    if (
+        len(rotulos) >= 3 and
+        len(rotulos[-1]) == 2 and
+        rotulos[-2] in _SEGUNDO_NIVEL_DOMINIO
+    ):
+        return ".".join(rotulos[-3:])
+
+    return ".".join(rotulos[-2:])
+
+
+_MARCADORES_TOKEN = {
+    "BRL": "<valor>",
+    "DATA": "<data>",
+    "IDENTIFICADOR": "<id>"
+}
+
+
+def canonicalizar_texto(texto: str) -> str:
+    """
+    Reduces a message to its campaign template.
+
+    Personal names, URLs (keeping the registered domain), CPFs, phone
+    numbers, amounts, dates and long identifiers become typed
+    placeholders, so variants of the same scam share one cache key.
+
+    Amounts keep their order of magnitude ("<valor:4>" for R$ 1.000 to
+    R$ 9.999): the return-ratio rules score on them, so "invest R$ 100,
+    get R$ 110" and "invest R$ 100, get R$ 10.000" stay apart.
+    """
+
+    t = RE_NOME_APRESENTACAO.sub(
+        lambda m: m.group(0)[:m.start("nome") - m.start()] + "<nome>",
+        texto
+    ).lower()
+
+    t = RE_URL_TEMPLATE.sub(
+        lambda m: f"<url:{dominio_registrado(m.group(0))}>", t
+    )
+    t = RE_CPF.sub("<cpf>", t)
+    t = RE_TELEFONE.sub("<telefone>", t)
+
+    partes = []
+    posicao = 0
+
+    for token in tokenizar_numeros(t):
+        marcador = _MARCADORES_TOKEN.get(token.tipo)
+        if marcador:
+            if token.tipo == "BRL":
+                marcador = f"<valor:{len(str(int(token.valor)))}>"
+            partes.append(t[posicao:token.inicio])
+            partes.append(marcador)
+            posicao = token.fim
+
+    partes.append(t[posicao:])
+    return RE_ESPACOS.sub(" ", "".join(partes)).strip()
+
+
+def gerar_chave_canonica(texto: str) -> Optional[str]:
+    """
+    Cache key of the message's campaign template, or None when the
+    text has no variable parts (the exact key already covers it).
+    """
+
+    canonico = canonicalizar_texto(texto)
+
+    if "<" not in canonico or canonico == texto.lower():
+        return None
+
+    return f"CANON#{gerar_hash_texto(canonico)}"
+
+
+# ----------------------------------------------------------------------
+# Scoring Fingerprint (cache invalidation)
+# ----------------------------------------------------------------------
+
+def calcular_impressao_pontuacao() -> str:
+    """
+    Fingerprint of everything that shapes a verdict: rule pack
+    (signatures, caps, combinations), registered heuristics and the
+    tunable thresholds. Cached verdicts from another fingerprint are
+    treated as misses, so caches survive deploys that leave scoring
+    untouched. Detector logic is not covered: bump CACHE_VERSAO when
+    changing it.
+    """
+
+    conteudo = json.dumps(
+        {
+            "regras": HASH_REGRAS,
+            "heuristicas": [
+                [h.nome, h.categoria, h.peso, h.grupo]
+                for h in HEURISTICAS_REGISTRADAS
+            ],
+            "limiares": {
+                "PESO_SIGNATURE_MATCH": PESO_SIGNATURE_MATCH,
+                "PESO_PROGRESSAO_FINANCEIRA": PESO_PROGRESSAO_FINANCEIRA,
+                "PESO_VALOR_EM_JOGO": PESO_VALOR_EM_JOGO,
+                "THRESHOLD_SCAM": THRESHOLD_SCAM,
+                "THRESHOLD_SUSPEITO": THRESHOLD_SUSPEITO,
+                "MULTIPLICADOR_SEMANTICO": MULTIPLICADOR_SEMANTICO,
+                "REDUCAO_INVESTIGATIVO": REDUCAO_INVESTIGATIVO,
+                "MULTIPLICADOR_CRITICO": MULTIPLICADOR_CRITICO,
+                "ZONA_COGNITIVA_MIN": ZONA_COGNITIVA_MIN,
+                "ZONA_COGNITIVA_MAX": ZONA_COGNITIVA_MAX,
+                "ZONA_HAIKU_MAX": ZONA_HAIKU_MAX,
+                "ZONA_SONNET_BASICO_MAX": ZONA_SONNET_BASICO_MAX,
+                "PESO_HEURISTICA_ALTO": PESO_HEURISTICA_ALTO,
+                "PESO_BEDROCK_ALTO": PESO_BEDROCK_ALTO,
+                "PESO_HEURISTICA_BAIXO": PESO_HEURISTICA_BAIXO,
+                "PESO_BEDROCK_BAIXO": PESO_BEDROCK_BAIXO,
+                "DIVERGENCIA_THRESHOLD": DIVERGENCIA_THRESHOLD,
+                "SONNET_REPASS_PROB_MIN": SONNET_REPASS_PROB_MIN,
+                "SONNET_REPASS_PROB_MAX": SONNET_REPASS_PROB_MAX,
+                "SONNET_REPASS_MANIPULACAO": SONNET_REPASS_MANIPULACAO,
+                "SCORE_GOLPE_CONFIRMADO": SCORE_GOLPE_CONFIRMADO,
+                "TEXTO_LONGO_CHARS": TEXTO_LONGO_CHARS,
+                "JANELA_ANALISE_CHARS": JANELA_ANALISE_CHARS,
+                "SOBREPOSICAO_JANELA_CHARS": SOBREPOSICAO_JANELA_CHARS,
+                "MAX_JANELAS_ANALISE": MAX_JANELAS_ANALISE,
+                "VARIANTES_SIMILARIDADE_MIN": VARIANTES_SIMILARIDADE_MIN,
+                "BEDROCK_ENABLED": BEDROCK_ENABLED,
+                "BEDROCK_MODEL_HAIKU": BEDROCK_MODEL_HAIKU,
+                "BEDROCK_MODEL_SONNET": BEDROCK_MODEL_SONNET
+            }
+        },
+        sort_keys=True,
+        ensure_ascii=False
+    )
+
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()[:16]
+
+
+# All heuristics are registered by now (module import order)
+IMPRESSAO_PONTUACAO = calcular_impressao_pontuacao()
+
+
+def chave_cache_texto(conteudo_hash: str) -> str:
+    """
+    Cache table key of an exact (normalized) message text.
+    """
+    return f"TEXTO#{conteudo_hash}"
+
+
+def extrair_veredito(resultado: ResultadoAnalise) -> Dict[str, Any]:
+    """
+    Structured verdict fields stored in the cache (no rendered text).
+
+    Indicators are kept as a JSON string: they hold floats, which
+    DynamoDB only accepts as Decimal.
+    """
+
+    indicadores = resultado.indicadores_tecnicos
+
+    return {
+        "status": resultado.status,
+        "cor": resultado.cor,
+        "confianca": resultado.confianca,
+        "score_total": resultado.score_total,
+        "motivos": list(resultado.motivos),
+        "acao_recomendada": resultado.acao_recomendada,
+        "fusao_aplicada": bool(indicadores.get("fusao_aplicada")),
+        "bedrock_modelo": indicadores.get("bedrock_modelo"),
+        "indicadores": json.dumps(
+            indicadores, ensure_ascii=False, default=str
         )
+    }
+
 
-        items = response.get("Items", [])
+def formatar_resposta_whatsapp(veredito: Dict[str, Any]) -> str:
+    """
+    Renders a structured verdict as the WhatsApp reply.
+    """
 
-        if items:
-            incrementar_metrica_bedrock("cache_hits", 1)
+    resposta = (
+        f"{veredito['status']}\n\n"
+        f"🎯 Confiança: {veredito['confianca']}%\n"
+    )
 
-        return items[0] if items else None
+    if veredito.get("fusao_aplicada"):
+        resposta += "\n🤖 Análise cognitiva aplicada\n"
 
-    except Exception as e:
-        logger.error(
-            f"cache_lookup_failed | error={e}"
+    if veredito.get("motivos"):
+        resposta += (
+            "\n📌 Motivos:\n" +
+            "\n".join(
+                f"• {m}"
+                for m in veredito["motivos"][:5]
+            )
         )
+
+    resposta += (
+        f"\n\n👉 {veredito['acao_recomendada']}"
+    )
+
+    return resposta
+
+
+def _ler_cache_dynamodb(chave: str) -> Optional[Dict]:
+    """
+    Point read of one cache item (eventually consistent: half the RCU).
+    Items from another format version or past their TTL are ignored;
+    the caller re-analyzes and overwrites.
+
+    Items from another scoring fingerprint are still served, flagged
+    `obsoleto`: the caller answers with them and schedules a refresh
+    (see revalidar_cache), so a rule deploy does not turn every popular
+    message into a synchronous re-analysis.
+    """
+
+    response = cache_table.get_item(Key={"pk": chave})
+    item = response.get("Item")
+
+    if not item:
+        return None
+
+    veredito = {
+        k: int(v) if isinstance(v, Decimal) else v
+        for k, v in item.items()
+    }
+
+    if (
+        veredito.get("versao") != CACHE_VERSAO or
+        veredito.get("ttl", 0) <= time.time()
+    ):
         return None
 
+    if veredito.get("impressao") != IMPRESSAO_PONTUACAO:
+        logger.info(
+            f"cache_stale_scoring "
+            f"| key={chave[:18]} "
+            f"| item={str(veredito.get('impressao'))[:8]} "
+            f"| current={IMPRESSAO_PONTUACAO[:8]}"
+        )
+        veredito["obsoleto"] = True
+
+    CACHE_MEMORIA.guardar(chave, veredito)
+    return veredito
+
+
+def _servivel(
+    chave: str,
+    item: Dict,
+    chave_canonica: Optional[str]
+) -> bool:
+    """
+    Whether a cached item may answer this message: exact-key items
+    always, campaign-key items only for high-risk verdicts.
+    """
+
+    if chave != chave_canonica:
+        return True
+
+    return int(item.get("score_total", 0)) >= VARIANTES_SCORE_MIN
+
+
+def buscar_cache(
+    conteudo_hash: str,
+    chave_canonica: Optional[str] = None
+) -> Optional[Dict]:
+    """
+    Retrieves the cached verdict for given content hash.
+
+    The exact key is tried before the campaign (canonical) key, and
+    the in-process LRU before the cache table; table hits are kept in
+    the LRU for the next request on this container.
+
+    Campaign hits are served only for high-risk verdicts (score at or
+    above VARIANTES_SCORE_MIN, the variant index gate): a template
+    shared with a low-risk message may still hide a riskier variant.
+    """
+
+    chaves = [chave_cache_texto(conteudo_hash)]
+    if chave_canonica:
+        chaves.append(chave_canonica)
+
+    item = None
+
+    for chave in chaves:
+        item = CACHE_MEMORIA.obter(chave)
+        if item is not None and _servivel(chave, item, chave_canonica):
+            break
+        item = None
+
+    if item is None:
+        try:
+            for chave in chaves:
+                item = _ler_cache_dynamodb(chave)
+                if item is not None and _servivel(chave, item, chave_canonica):
+                    break
+                item = None
+
+        except Exception as e:
+            logger.error(
+                f"cache_lookup_failed | error={e}"
+            )
+            return None
+
+    if item is not None:
+        incrementar_metrica_bedrock("cache_hits", 1)
+
+        if chave == chave_canonica:
+            logger.info(
+                f"campaign_cache_hit | key={chave[:18]}"
+            )
+
+    return item
+
 
 def salvar_cache(
     conteudo_hash: str,
     resultado: ResultadoAnalise,
-    resposta_formatada: str,
-    resposta_bedrock: Optional[RespostaBedrock] = None
+    resposta_formatada: Optional[str] = None,
+    resposta_bedrock: Optional[RespostaBedrock] = None,
+    chave_canonica: Optional[str] = None,
+    origem: str = "whatsapp"
 ):
     """
-    Persists analysis result into DynamoDB audit table.
+    Persists the verdict into the cache table (one item per key,
+    overwritten) and the analysis record into the audit table, through
+    the write-behind queue. The in-process LRU is updated immediately.
+
+    With a campaign key, high-risk verdicts (see buscar_cache) are
+    also stored under it so later variants of the template reuse them.
     """
 
     try:
         timestamp = agora_iso()
 
+        item_cache = {
+            **extrair_veredito(resultado),
+            "versao": CACHE_VERSAO,
+            "impressao": IMPRESSAO_PONTUACAO,
+            "created_at": timestamp,
+            "ttl": int(time.time()) + CACHE_TTL_SECONDS
+        }
+
+        chaves = [chave_cache_texto(conteudo_hash)]
+        if chave_canonica and resultado.score_total >= VARIANTES_SCORE_MIN:
+            chaves.append(chave_canonica)
+
+        for chave in chaves:
+            item_chave = {"pk": chave, **item_cache}
+            CACHE_MEMORIA.guardar(chave, item_chave)
+            FILA_ESCRITA.gravar(cache_table, item_chave)
+
         item = {
             "pk": conteudo_hash,
             "sk": timestamp,
             "type": "text",
-            "source": "whatsapp",
-            "result": resposta_formatada,
+            "source": origem,
             "score": resultado.score_total,
             "status": resultado.status,
             "created_at": timestamp,
             "ttl": calcular_ttl(),
-            "version": "5.1"
+            "version": "5.1",
+            "impressao": IMPRESSAO_PONTUACAO
         }
 
+        if resposta_formatada:
+            item["result"] = resposta_formatada
+
         if resposta_bedrock:
             item["bedrock_usado"] = True
             item["bedrock_modelo"] = resposta_bedrock.modelo_usado
@@ -2954,7 +6413,7 @@ def salvar_cache(
                 str(resposta_bedrock.custo_usd)
             )
 
-        audit_table.put_item(Item=item)
+        FILA_ESCRITA.gravar(audit_table, item)
 
     except Exception as e:
         logger.error(
@@ -2962,6 +6421,89 @@ def salvar_cache(
         )
 
 
+# ----------------------------------------------------------------------
+# Stale Verdict Refresh (scoring fingerprint changed)
+# ----------------------------------------------------------------------
+
+_EXECUTOR_REVALIDACAO = ThreadPoolExecutor(
+    max_workers=1,
+    thread_name_prefix="revalidacao"
+)
+_REVALIDACOES: Dict[str, Any] = {}
+_LOCK_REVALIDACOES = threading.Lock()
+
+
+def _revalidar(
+    texto: str,
+    conteudo_hash: str,
+    chave_canonica: Optional[str]
+):
+    try:
+        resultado = analisar_mensagem_guardinia_v5_1(texto)
+
+        if resultado.confianca > 0:
+            salvar_cache(
+                conteudo_hash,
+                resultado,
+                chave_canonica=chave_canonica,
+                origem="revalidacao"
+            )
+
+        logger.info(
+            f"cache_revalidated "
+            f"| hash={conteudo_hash[:12]} "
+            f"| score={resultado.score_total}"
+        )
+
+    except Exception as e:
+        logger.error(
+            f"cache_revalidation_failed | error={e}"
+        )
+
+    finally:
+        with _LOCK_REVALIDACOES:
+            _REVALIDACOES.pop(conteudo_hash, None)
+
+
+def revalidar_cache(
+    texto: str,
+    conteudo_hash: str,
+    chave_canonica: Optional[str] = None
+):
+    """
+    Re-analyzes a message served from a stale verdict off the request
+    path. One refresh per message at a time; its cache write replaces
+    the stale item in the LRU and, on flush, in the cache table.
+    """
+
+    with _LOCK_REVALIDACOES:
+        if conteudo_hash in _REVALIDACOES:
+            return
+
+        _REVALIDACOES[conteudo_hash] = _EXECUTOR_REVALIDACAO.submit(
+            _revalidar, texto, conteudo_hash, chave_canonica
+        )
+
+    rastrear("stale_verdict_refresh_scheduled")
+
+
+def aguardar_revalidacoes(prazo_s: Optional[float] = None) -> int:
+    """
+    Waits at most `prazo_s` seconds for scheduled refreshes, so their
+    writes join this invocation's flush. Returns how many are still
+    running (they resume when the container thaws).
+    """
+
+    with _LOCK_REVALIDACOES:
+        futuros = list(_REVALIDACOES.values())
+
+    if not futuros:
+        return 0
+
+    _, atrasados = wait(futuros, timeout=prazo_s)
+    return len(atrasados)
+
+
 # ----------------------------------------------------------------------
 # Final Risk Classification
 # ----------------------------------------------------------------------
@@ -2974,7 +6516,7 @@ def classificar(score: int) -> Tuple[str, str, int, str]:
         (status_label, color, confidence, recommended_action)
     """
 
-    if score >= 120:
+    if score >= SCORE_GOLPE_CONFIRMADO:
         return (
             "🔴 GOLPE CONFIRMADO",
             "vermelho",
@@ -3014,11 +6556,350 @@ def classificar(score: int) -> Tuple[str, str, int, str]:
             "✅ Nenhum indicador de golpe detectado."
         )
 
+# ======================================================================
+# Near-Duplicate Variant Index (MinHash / LSH)
+# ======================================================================
+
+MINHASH_PERMUTACOES = 64
+LSH_BANDAS = 16           # 4 rows per band: candidates from ~0.5 Jaccard
+TAMANHO_SHINGLE = 5
+MINHASH_MAX_CHARS = 1200  # Signature cost stays bounded on long texts
+
+# Mersenne prime below 2**32: a * x + b stays within 64 bits
+_PRIMO_MINHASH = (1 << 31) - 1
+_gerador_minhash = random.Random(0x6A1D)
+_PERMUTACOES_MINHASH = tuple(
+    (
+        _gerador_minhash.randrange(1, _PRIMO_MINHASH),
+        _gerador_minhash.randrange(0, _PRIMO_MINHASH)
+    )
+    for _ in range(MINHASH_PERMUTACOES)
+)
+
+if np is not None:
+    _MINHASH_A = np.array([a for a, _ in _PERMUTACOES_MINHASH], dtype=np.uint64)[:, None]
+    _MINHASH_B = np.array([b for _, b in _PERMUTACOES_MINHASH], dtype=np.uint64)[:, None]
+
+
+def assinatura_minhash(texto: str) -> Optional[array]:
+    """
+    MinHash signature over character shingles of the message template.
+
+    The text is canonicalized and folded first, and punctuation and
+    emojis are dropped, so reworded or decorated variants of one
+    campaign keep most of their shingles.
+
+    Vectorized with numpy when installed (~1 ms per 700 characters);
+    the pure-Python fallback costs ~3-5 ms, which is why callers only
+    compute it when a verdict may be reused or indexed.
+    """
+
+    base = RE_NAO_PALAVRA.sub(
+        " ", dobrar_texto(canonicalizar_texto(texto[:MINHASH_MAX_CHARS]))
+    ).strip()
+
+    if not base:
+        return None
+
+    shingles = {
+        zlib.crc32(base[i:i + TAMANHO_SHINGLE].encode("utf-8")) % _PRIMO_MINHASH
+        for i in range(max(len(base) - TAMANHO_SHINGLE + 1, 1))
+    }
+
+    if np is not None:
+        x = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+        return array("I", (
+            (_MINHASH_A * x + _MINHASH_B) % _PRIMO_MINHASH
+        ).min(axis=1).astype(np.uint32).tobytes())
+
+    return array("I", (
+        min((a * x + b) % _PRIMO_MINHASH for x in shingles)
+        for a, b in _PERMUTACOES_MINHASH
+    ))
+
+
+def similaridade_assinaturas(a: array, b: array) -> float:
+    """
+    Estimated Jaccard similarity (fraction of equal MinHash values).
+    """
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+def chaves_bandas(assinatura: array) -> List[str]:
+    """
+    LSH bucket keys: one short digest per band of the signature.
+    """
+
+    linhas = len(assinatura) // LSH_BANDAS
+
+    return [
+        f"{banda}#" + hashlib.blake2b(
+            assinatura[banda * linhas:(banda + 1) * linhas].tobytes(),
+            digest_size=8
+        ).hexdigest()
+        for banda in range(LSH_BANDAS)
+    ]
+
+
+class IndiceVariantes:
+    """
+    Bounded in-memory LSH index of recent high-risk verdicts.
+
+    Signatures are stored as packed arrays (256 bytes each); buckets
+    map a band digest to the keys sharing it. Oldest entries are
+    evicted first.
+    """
+
+    def __init__(self, max_itens: int):
+        self.max_itens = max_itens
+        self._itens: "OrderedDict[str, Tuple[array, Dict[str, Any]]]" = OrderedDict()
+        self._baldes: Dict[str, set] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._itens)
+
+    def adicionar(
+        self,
+        chave: str,
+        assinatura: array,
+        veredito: Dict[str, Any]
+    ):
+        if self.max_itens <= 0:
+            return
+
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                return
+
+            self._itens[chave] = (assinatura, veredito)
+            for balde in chaves_bandas(assinatura):
+                self._baldes[balde].add(chave)
+
+            while len(self._itens) > self.max_itens:
+                antiga, (assinatura_antiga, _) = self._itens.popitem(last=False)
+                for balde in chaves_bandas(assinatura_antiga):
+                    chaves = self._baldes.get(balde)
+                    if chaves is not None:
+                        chaves.discard(antiga)
+                        if not chaves:
+                            del self._baldes[balde]
+
+    def buscar(
+        self,
+        assinatura: array,
+        limiar: float
+    ) -> Optional[Tuple[str, float, Dict[str, Any]]]:
+        """
+        Most similar indexed verdict at or above `limiar`, if any.
+        """
+
+        with self._lock:
+            candidatas = set()
+            for balde in chaves_bandas(assinatura):
+                candidatas |= self._baldes.get(balde, set())
+
+            melhor = None
+
+            for chave in candidatas:
+                assinatura_item, veredito = self._itens[chave]
+                similaridade = similaridade_assinaturas(assinatura, assinatura_item)
+
+                if similaridade >= limiar and (
+                    melhor is None or similaridade > melhor[1]
+                ):
+                    melhor = (chave, similaridade, veredito)
+
+            return melhor
+
+
+INDICE_VARIANTES = IndiceVariantes(VARIANTES_MAX_ITENS)
+
+
+def _buscar_variante_persistida(
+    assinatura: array
+) -> Optional[Tuple[str, float, Dict[str, Any]]]:
+    """
+    Looks the signature's buckets up in the cache table (one batch read).
+    """
+
+    try:
+        response = dynamodb.batch_get_item(
+            RequestItems={
+                CACHE_TABLE_NAME: {
+                    "Keys": [
+                        {"pk": f"LSH#{balde}"}
+                        for balde in chaves_bandas(assinatura)
+                    ]
+                }
+            }
+        )
+
+    except Exception as e:
+        logger.warning(f"variant_lookup_failed | error={e}")
+        return None
+
+    for item in response.get("Responses", {}).get(CACHE_TABLE_NAME, []):
+        if item.get("impressao") != IMPRESSAO_PONTUACAO:
+            continue
+
+        assinatura_item = array("I")
+        assinatura_item.frombytes(bytes.fromhex(item["assinatura"]))
+        veredito = {
+            k: int(v) if isinstance(v, Decimal) else v
+            for k, v in item["veredito"].items()
+        }
+
+        INDICE_VARIANTES.adicionar(item["chave"], assinatura_item, veredito)
+
+    return INDICE_VARIANTES.buscar(assinatura, VARIANTES_SIMILARIDADE_MIN)
+
+
+def buscar_variante_similar(
+    assinatura: array,
+    consultar_persistido: bool = False
+) -> Optional[Tuple[str, float, Dict[str, Any]]]:
+    """
+    Returns (key, similarity, verdict) of a near-duplicate risk verdict.
+
+    The persisted index is only read when `consultar_persistido` is set
+    (the message would otherwise be escalated to Bedrock).
+    """
+
+    variante = INDICE_VARIANTES.buscar(assinatura, VARIANTES_SIMILARIDADE_MIN)
+
+    if variante is None and consultar_persistido and VARIANTES_PERSISTIR:
+        variante = _buscar_variante_persistida(assinatura)
+
+    return variante
+
+
+def _persistir_variante(
+    chave: str,
+    assinatura: array,
+    veredito: Dict[str, Any]
+):
+    assinatura_hex = assinatura.tobytes().hex()
+    ttl = calcular_ttl()
+
+    for balde in chaves_bandas(assinatura):
+        FILA_ESCRITA.gravar(cache_table, {
+            "pk": f"LSH#{balde}",
+            "chave": chave,
+            "assinatura": assinatura_hex,
+            "veredito": veredito,
+            "impressao": IMPRESSAO_PONTUACAO,
+            "ttl": ttl
+        })
+
+
+def registrar_variante(
+    chave: str,
+    assinatura: array,
+    resultado: ResultadoAnalise
+):
+    """
+    Indexes a high-risk verdict for reuse by later near-duplicates.
+    """
+
+    veredito = {
+        "status": resultado.status,
+        "cor": resultado.cor,
+        "confianca": resultado.confianca,
+        "score_total": resultado.score_total,
+        "acao_recomendada": resultado.acao_recomendada
+    }
+
+    INDICE_VARIANTES.adicionar(chave, assinatura, veredito)
+
+    if VARIANTES_PERSISTIR:
+        _persistir_variante(chave, assinatura, veredito)
+
 # ======================================================================
 # Full Analysis Pipeline (Production-Ready)
 # ======================================================================
 
-def analisar_mensagem_guardinia_v5_1(texto: str) -> ResultadoAnalise:
+
+def analisar_mensagem_guardinia_v5_1(
+    texto: str,
+    prazo: Optional[Prazo] = None
+) -> ResultadoAnalise:
+    """
+    Complete GuardinIA hybrid analysis pipeline.
+
+    Runs inside a per-message trace: stages record reason codes
+    instead of logging, and a single structured line is emitted
+    at the end (see _analisar_mensagem). With a deadline, the LLM
+    stage is skipped when it cannot finish in time.
+    """
+
+    token = iniciar_trace()
+
+    try:
+        return _analisar_mensagem(texto, prazo)
+    finally:
+        encerrar_trace(token)
+
+
+def construir_contexto_longo(
+    texto: str
+) -> Tuple[ContextoAnalise, Dict[str, Any]]:
+    """
+    Builds the context of a long text window by window.
+
+    Reading stops as soon as the heuristic verdict of the text read so
+    far is fixed (same bound as the early exit) or MAX_JANELAS_ANALISE
+    windows were read, so latency no longer grows with text length.
+
+    Window selection follows contextos_por_janela: the leading windows
+    in order, then the last one; middle windows of texts longer than
+    MAX_JANELAS_ANALISE are never read and are reported as
+    `janelas_ignoradas` (plus a "long_text_windows_skipped" trace).
+
+    The per-window probes run with contar=False, so the skip-rate
+    counters still see one evaluation per message: the final scoring
+    pass in _analisar_mensagem.
+    """
+
+    limiar = limiar_saida_antecipada()
+    termos_avaliados = None
+
+    for ctx, lidas, total in contextos_por_janela(texto):
+
+        # Verdict only changes when the window brought new terms
+        if limiar is None or ctx.termos == termos_avaliados:
+            continue
+
+        termos_avaliados = ctx.termos
+        _, _, avaliacao = avaliar_heuristicas(
+            ctx,
+            saida_antecipada=True,
+            contar=False
+        )
+
+        if avaliacao.get("saida_antecipada"):
+            rastrear("long_text_verdict_fixed", lidas, total)
+            break
+
+    # Middle windows dropped by the window cap (not by the early stop)
+    ignoradas = max(0, total - MAX_JANELAS_ANALISE)
+
+    if ignoradas:
+        rastrear("long_text_windows_skipped", ignoradas, total)
+
+    return ctx, {
+        "janelas_lidas": lidas,
+        "janelas_total": total,
+        "janelas_ignoradas": ignoradas,
+        "caracteres_lidos": len(ctx.texto)
+    }
+
+
+def _analisar_mensagem(
+    texto: str,
+    prazo: Optional[Prazo] = None
+) -> ResultadoAnalise:
     """
     Complete GuardinIA hybrid analysis pipeline.
 
@@ -3053,20 +6934,47 @@ def analisar_mensagem_guardinia_v5_1(texto: str) -> ResultadoAnalise:
             texto_analisado=texto[:200]
         )
 
+    leitura_janelas = None
+
+    if len(texto) > TEXTO_LONGO_CHARS:
+        ctx, leitura_janelas = construir_contexto_longo(texto)
+    else:
+        ctx = construir_contexto(texto)
+
     # ------------------------------------------------------------------
     # 1. Base Heuristic Score
     # ------------------------------------------------------------------
-    score_base, motivos_base, indicadores = avaliar_heuristicas(texto)
+    score_base, motivos_base, indicadores = avaliar_heuristicas(
+        ctx,
+        saida_antecipada=SAIDA_ANTECIPADA_ENABLED
+    )
+
+    if leitura_janelas:
+        indicadores["leitura_janelas"] = leitura_janelas
     score_total, motivos = aplicar_combinacoes(
         score_base,
         motivos_base,
         indicadores
     )
 
+    # Verdict already fixed: additive stages below cannot change it
+    saida_antecipada = bool(indicadores.get("saida_antecipada"))
+
+    if saida_antecipada:
+        estagios_ignorados = [
+            "camada_semantica",
+            "indice_pressao",
+            "manipulacao_temporal"
+        ]
+        if indicadores.get("heuristicas_nao_avaliadas"):
+            estagios_ignorados.insert(0, "heuristicas_restantes")
+
+        indicadores["estagios_ignorados"] = estagios_ignorados
+
     # ------------------------------------------------------------------
     # 2. Semantic Layer
     # ------------------------------------------------------------------
-    sinais = extrair_sinais_semanticos(texto)
+    sinais = {} if saida_antecipada else extrair_sinais_semanticos(ctx)
 
     score_semantico = sum(
         v for v in sinais.values() if v > 0
@@ -3082,7 +6990,7 @@ def analisar_mensagem_guardinia_v5_1(texto: str) -> ResultadoAnalise:
     # ------------------------------------------------------------------
     # 3. Psychological Pressure Index (IPP)
     # ------------------------------------------------------------------
-    ipp = calcular_indice_pressao(texto, sinais)
+    ipp = 0 if saida_antecipada else calcular_indice_pressao(ctx, sinais)
 
     if ipp > 0:
         score_total += int(ipp)
@@ -3104,7 +7012,7 @@ def analisar_mensagem_guardinia_v5_1(texto: str) -> ResultadoAnalise:
     # ------------------------------------------------------------------
     # 4. Investigative Reduction
     # ------------------------------------------------------------------
-    if sinais.get("investigativo", 0) < 0:
+    if detectar_postura_investigativa(ctx):
         score_antes = score_total
         score_total = int(score_total * REDUCAO_INVESTIGATIVO)
 
@@ -3116,45 +7024,9 @@ def analisar_mensagem_guardinia_v5_1(texto: str) -> ResultadoAnalise:
     # ------------------------------------------------------------------
     # 5. Structured Legitimate Billing Reduction
     # ------------------------------------------------------------------
-    t = texto.lower()
-
-    possui_valor = bool(
-        re.search(r'r\$\s?\d+[.,]?\d*', t)
-    )
-
-    possui_parcela_ou_contrato = bool(
-        re.search(r'parcela\s?\d+', t) or
-        re.search(r'n[úu]mero\s?\d+', t) or
-        re.search(r'\b\d{8,}\b', t)
-    )
-
-    possui_solicitacao_sensivel = any(
-        x in t for x in [
-            "senha",
-            "token",
-            "código",
-            "codigo",
-            "confirme seus dados"
-        ]
-    )
-
-    possui_ameaca_forte = any(
-        x in t for x in [
-            "bloqueado imediatamente",
-            "prisão",
-            "último aviso",
-            "suspensão imediata"
-        ]
-    )
-
-    if (
-        possui_valor and
-        possui_parcela_ou_contrato and
-        not possui_solicitacao_sensivel and
-        not possui_ameaca_forte
-    ):
+    if possui_cobranca_estruturada(ctx):
         score_antes = score_total
-        score_total = int(score_total * 0.55)
+        score_total = int(score_total * FATOR_COBRANCA_ESTRUTURADA)
 
         indicadores["reducao_cobranca_estruturada"] = (
             score_antes - score_total
@@ -3202,8 +7074,38 @@ def analisar_mensagem_guardinia_v5_1(texto: str) -> ResultadoAnalise:
         score_heuristico_final,
         categorias_ativas,
         sinais,
-        texto
+        ctx
+    )
+
+    # Near-duplicate of a recent high-risk verdict: reuse it. The
+    # signature is only computed when a reuse can save a Bedrock call
+    # or the verdict is already in the indexed (high-risk) range
+    assinatura = (
+        assinatura_minhash(texto)
+        if VARIANTES_ENABLED and (
+            deve_chamar or score_heuristico_final >= VARIANTES_SCORE_MIN
+        )
+        else None
     )
+    variante = (
+        buscar_variante_similar(assinatura, consultar_persistido=deve_chamar)
+        if assinatura is not None else None
+    )
+
+    if variante:
+        chave_variante, similaridade, veredito_variante = variante
+
+        indicadores["variante_chave"] = chave_variante
+        indicadores["variante_similaridade"] = round(similaridade, 3)
+        rastrear(
+            "variant_verdict_reused",
+            chave_variante[:12],
+            round(similaridade, 2)
+        )
+
+        if deve_chamar:
+            indicadores["bedrock_evitado_variante"] = True
+            deve_chamar = False
 
     resposta_bedrock = None
 
@@ -3211,27 +7113,14 @@ def analisar_mensagem_guardinia_v5_1(texto: str) -> ResultadoAnalise:
         categorias_lista = list(categorias_ativas)
 
         if modelo == "haiku":
-            resposta_bedrock = chamar_bedrock_claude(
+            resposta_bedrock = analisar_double_pass(
                 texto,
                 score_heuristico_final,
                 categorias_lista,
                 sinais,
-                modelo="haiku",
-                nivel_analise="basico"
+                indicadores,
+                prazo
             )
-
-            if (
-                resposta_bedrock and
-                decidir_repass_sonnet(resposta_bedrock)
-            ):
-                resposta_bedrock = chamar_bedrock_claude(
-                    texto,
-                    score_heuristico_final,
-                    categorias_lista,
-                    sinais,
-                    modelo="sonnet",
-                    nivel_analise="profundo"
-                )
         else:
             resposta_bedrock = chamar_bedrock_claude(
                 texto,
@@ -3239,9 +7128,13 @@ def analisar_mensagem_guardinia_v5_1(texto: str) -> ResultadoAnalise:
                 categorias_lista,
                 sinais,
                 modelo,
-                nivel
+                nivel,
+                prazo=prazo
             )
 
+        if resposta_bedrock is None and prazo is not None and prazo.esgotado():
+            indicadores["prazo_esgotado"] = True
+
         if resposta_bedrock:
             score_total = fusao_hibrida_score(
                 score_heuristico_final,
@@ -3260,13 +7153,22 @@ def analisar_mensagem_guardinia_v5_1(texto: str) -> ResultadoAnalise:
     # 8. Temporal Manipulation Adjustment
     # ------------------------------------------------------------------
     tem_manipulacao_temporal, _ = (
-        detectar_manipulacao_temporal(texto, sinais)
+        (False, "") if saida_antecipada
+        else detectar_manipulacao_temporal(ctx, sinais)
     )
 
     if tem_manipulacao_temporal:
         score_total += 12
         indicadores["manipulacao_temporal"] = True
 
+    # Reused verdict is final: it already went through every stage
+    if variante:
+        score_total = max(score_total, veredito_variante["score_total"])
+        motivos.append(
+            f"Variante de campanha já analisada "
+            f"({similaridade:.0%} de similaridade)"
+        )
+
     score_total = min(score_total, 200)
 
     # ------------------------------------------------------------------
@@ -3287,11 +7189,16 @@ def analisar_mensagem_guardinia_v5_1(texto: str) -> ResultadoAnalise:
             resposta_bedrock.modelo_usado
             if resposta_bedrock else None
         ),
+        "bedrock_custo_usd": (
+            resposta_bedrock.custo_usd
+            if resposta_bedrock else 0
+        ),
         "latency_ms": round(tempo_total, 2),
-        "classification": status
-    }))
+        "classification": status,
+        **resumir_trace()
+    }, default=str))
 
-    return ResultadoAnalise(
+    resultado = ResultadoAnalise(
         status=status,
         cor=cor,
         confianca=confianca,
@@ -3302,6 +7209,20 @@ def analisar_mensagem_guardinia_v5_1(texto: str) -> ResultadoAnalise:
         texto_analisado=texto[:500]
     )
 
+    # Only first-hand verdicts are indexed (no chaining of reuses)
+    if (
+        VARIANTES_ENABLED and
+        not variante and
+        score_total >= VARIANTES_SCORE_MIN
+    ):
+        if assinatura is None:
+            assinatura = assinatura_minhash(texto)
+
+        if assinatura is not None:
+            registrar_variante(gerar_hash_texto(texto), assinatura, resultado)
+
+    return resultado
+
 # ======================================================================
 # WhatsApp Utilities (Greeting Detection + Messaging)
 # ======================================================================
@@ -3315,8 +7236,8 @@ def eh_saudacao_inteligente(texto: str) -> bool:
     t = texto.strip().lower()
 
     # Remove pontuação leve
-    t = re.sub(r'[!?.]+', '', t)
-    t = re.sub(r'\s+', ' ', t)
+    t = RE_PONTUACAO_LEVE.sub('', t)
+    t = RE_ESPACOS.sub(' ', t)
 
     palavras = t.split()
 
@@ -3546,7 +7467,10 @@ def resposta_orientativa_padrao() -> str:
 # Message Processing Orchestrator
 # ======================================================================
 
-def processar_mensagem(texto_original: str) -> str:
+def processar_mensagem(
+    texto_original: str,
+    prazo: Optional[Prazo] = None
+) -> str:
     """
     Main orchestration layer for incoming WhatsApp messages.
 
@@ -3581,15 +7505,17 @@ def processar_mensagem(texto_original: str) -> str:
     # Cache lookup
     # ------------------------------------------------------------------
     conteudo_hash = gerar_hash_texto(texto_limpo)
-    cache = buscar_cache(conteudo_hash)
+    chave_canonica = gerar_chave_canonica(texto_limpo)
+    cache = buscar_cache(conteudo_hash, chave_canonica)
 
     if cache:
-        resultado_cache = cache.get("result", "")
-        if resultado_cache:
-            return (
-                f"{resultado_cache}\n\n"
-                "ℹ️ Resultado em cache."
-            )
+        if cache.get("obsoleto"):
+            revalidar_cache(texto_limpo, conteudo_hash, chave_canonica)
+
+        return (
+            f"{formatar_resposta_whatsapp(cache)}\n\n"
+            "ℹ️ Resultado em cache."
+        )
 
     # ------------------------------------------------------------------
     # URL reputation check (Google Safe Browsing)
@@ -3600,7 +7526,7 @@ def processar_mensagem(texto_original: str) -> str:
         urls_maliciosas = []
 
         for url in urls:
-            reputacao = consultar_google_safe_browsing(url)
+            reputacao = consultar_google_safe_browsing(url, prazo)
 
             if reputacao in [
                 "MALWARE",
@@ -3620,7 +7546,7 @@ def processar_mensagem(texto_original: str) -> str:
     # ------------------------------------------------------------------
     # Core Hybrid Analysis
     # ------------------------------------------------------------------
-    resultado = analisar_mensagem_guardinia_v5_1(texto_limpo)
+    resultado = analisar_mensagem_guardinia_v5_1(texto_limpo, prazo)
 
     # ------------------------------------------------------------------
     # Protective Light Layer (Portfolio Safe Mode)
@@ -3654,40 +7580,20 @@ def processar_mensagem(texto_original: str) -> str:
     # ------------------------------------------------------------------
     # Response Formatting
     # ------------------------------------------------------------------
-    resposta_formatada = (
-        f"{resultado.status}\n\n"
-        f"🎯 Confiança: {resultado.confianca}%\n"
-    )
-
-    if resultado.indicadores_tecnicos.get("fusao_aplicada"):
-        resposta_formatada += "\n🤖 Análise cognitiva aplicada\n"
-
-    if resultado.motivos:
-        resposta_formatada += (
-            "\n📌 Motivos:\n" +
-            "\n".join(
-                f"• {m}"
-                for m in resultado.motivos[:5]
-            )
-        )
-
-    resposta_formatada += (
-        f"\n\n👉 {resultado.acao_recomendada}"
+    resposta_formatada = formatar_resposta_whatsapp(
+        extrair_veredito(resultado)
     )
 
     # ------------------------------------------------------------------
-    # Async cache persistence (non-blocking)
+    # Cache persistence (write-behind, flushed by lambda_handler)
     # ------------------------------------------------------------------
-    threading.Thread(
-        target=salvar_cache,
-        args=(
-            conteudo_hash,
-            resultado,
-            resposta_formatada,
-            None
-        ),
-        daemon=True
-    ).start()
+    salvar_cache(
+        conteudo_hash,
+        resultado,
+        resposta_formatada,
+        None,
+        chave_canonica
+    )
 
     return resposta_formatada
 
@@ -3756,17 +7662,46 @@ def verificar_rate_limit(
 # Web System Endpoint (GuardinIA v5.1)
 # ======================================================================
 
-def processar_sistema_web(body: dict) -> dict:
+def montar_resposta_web(
+    veredito: Dict[str, Any],
+    indicadores: Dict[str, Any],
+    cache_hit: bool
+) -> Dict[str, Any]:
+    """
+    JSON body of the web route for a fresh or cached verdict.
+    """
+
+    return {
+        "status": veredito["status"],
+        "cor": veredito["cor"],
+        "confianca": veredito["confianca"],
+        "motivos": veredito["motivos"][:10],
+        "acao_recomendada": veredito["acao_recomendada"],
+        "score": veredito["score_total"],
+        "indicadores": indicadores,
+        "cache_hit": cache_hit,
+        "versao": "5.1_production_ready"
+    }
+
+
+def processar_sistema_web(
+    body: dict,
+    prazo: Optional[Prazo] = None
+) -> dict:
     """
     HTTP interface for the GuardinIA analysis engine.
 
     Expected input:
         {
-            "mensagem": "<texto a ser analisado>"
+            "mensagem": "<texto a ser analisado>",
+            "ignorar_cache": false   (optional: force a fresh analysis;
+                                      true, "true", "1" or "yes")
         }
 
     Returns:
-        JSON response with structured risk analysis.
+        JSON response with structured risk analysis. Shares the verdict
+        cache with the WhatsApp route; `cache_hit` tells whether the
+        result was served from it.
     """
 
     logger.info("web_system_invocation | version=5.1")
@@ -3792,22 +7727,53 @@ def processar_sistema_web(body: dict) -> dict:
             texto_limpo = texto_limpo[:5000]
 
         # --------------------------------------------------------------
-        # Core analysis
+        # Cache lookup (same keys as the WhatsApp route)
         # --------------------------------------------------------------
-        resultado = analisar_mensagem_guardinia_v5_1(
-            texto_limpo
+        conteudo_hash = gerar_hash_texto(texto_limpo)
+        chave_canonica = gerar_chave_canonica(texto_limpo)
+
+        # Explicit parse: query-string style "false" must not bypass it
+        ignorar_cache = str(body.get("ignorar_cache", "")).strip().lower() in (
+            "1", "true", "yes"
         )
 
-        resposta = {
-            "status": resultado.status,
-            "cor": resultado.cor,
-            "confianca": resultado.confianca,
-            "motivos": resultado.motivos[:10],
-            "acao_recomendada": resultado.acao_recomendada,
-            "score": resultado.score_total,
-            "indicadores": resultado.indicadores_tecnicos,
-            "versao": "5.1_production_ready"
-        }
+        cache = None
+        if not ignorar_cache:
+            cache = buscar_cache(conteudo_hash, chave_canonica)
+
+        if cache:
+            if cache.get("obsoleto"):
+                revalidar_cache(texto_limpo, conteudo_hash, chave_canonica)
+
+            resposta = montar_resposta_web(
+                cache,
+                json.loads(cache.get("indicadores") or "{}"),
+                cache_hit=True
+            )
+
+        else:
+            # ----------------------------------------------------------
+            # Core analysis
+            # ----------------------------------------------------------
+            resultado = analisar_mensagem_guardinia_v5_1(
+                texto_limpo,
+                prazo
+            )
+
+            resposta = montar_resposta_web(
+                extrair_veredito(resultado),
+                resultado.indicadores_tecnicos,
+                cache_hit=False
+            )
+
+            # Valid analyses only (input errors are not cached)
+            if resultado.confianca > 0:
+                salvar_cache(
+                    conteudo_hash,
+                    resultado,
+                    chave_canonica=chave_canonica,
+                    origem="web"
+                )
 
         return {
             "statusCode": 200,
@@ -3884,12 +7850,14 @@ def verificar_integridade_sistema():
         logger.info(f"heuristics_count={len(HEURISTICAS_REGISTRADAS)}")
         logger.info(f"bedrock_enabled={BEDROCK_ENABLED}")
         logger.info(f"zona_cognitiva={ZONA_COGNITIVA_MIN}-{ZONA_COGNITIVA_MAX}")
+        logger.info(f"scoring_fingerprint={IMPRESSAO_PONTUACAO}")
         logger.info("double_pass_enabled=true")
         logger.info("anti_hallucination_enabled=true")
         logger.info("cognitive_divergence_detection_enabled=true")
         logger.info("=" * 70)
 
 
+compilar_automato_termos()
 verificar_integridade_sistema()
 
 # ======================================================================
@@ -3963,6 +7931,8 @@ def lambda_handler(event, context):
                                 if msg.get("type") == "image":
                                     logger.info(f"whatsapp_image_received | from={mascarar_telefone(telefone)}")
                                     
+                                    prazo = Prazo.da_invocacao(context)
+
                                     try:
                                         image_id = msg.get("image", {}).get("id")
                                         if not image_id:
@@ -3972,8 +7942,13 @@ def lambda_handler(event, context):
                                         media_url = f"https://graph.facebook.com/v18.0/{image_id}"
                                         headers_download = {"Authorization": f"Bearer {META_TOKEN}"}
                                         
+                                        timeout = timeout_etapa(prazo, 10, minimo=1.0)
+                                        if timeout is None:
+                                            enviar_mensagem_whatsapp(telefone, "❌ Tempo esgotado ao processar imagem. Tente novamente.")
+                                            continue
+                                        
                                         req = urllib.request.Request(media_url, headers=headers_download)
-                                        with urllib.request.urlopen(req, timeout=10) as response:
+                                        with urllib.request.urlopen(req, timeout=timeout) as response:
                                             media_info = json.loads(response.read().decode("utf-8"))
                                         
                                         image_url = media_info.get("url")
@@ -3981,12 +7956,22 @@ def lambda_handler(event, context):
                                             enviar_mensagem_whatsapp(telefone, "❌ Erro ao obter imagem.")
                                             continue
                                         
+                                        timeout = timeout_etapa(prazo, 10, minimo=1.0)
+                                        if timeout is None:
+                                            enviar_mensagem_whatsapp(telefone, "❌ Tempo esgotado ao processar imagem. Tente novamente.")
+                                            continue
+                                        
                                         req_img = urllib.request.Request(image_url, headers=headers_download)
-                                        with urllib.request.urlopen(req_img, timeout=10) as response_img:
+                                        with urllib.request.urlopen(req_img, timeout=timeout) as response_img:
                                             imagem_bytes = response_img.read()
                                         
                                         enviar_mensagem_whatsapp(telefone, "🔍 Analisando imagem...")
                                         
+                                        # OCR needs a couple of seconds: leave it out rather than time out the batch
+                                        if timeout_etapa(prazo, 10, minimo=2.0) is None:
+                                            enviar_mensagem_whatsapp(telefone, "❌ Tempo esgotado ao processar imagem. Tente novamente.")
+                                            continue
+                                        
                                         response_textract = textract.detect_document_text(Document={"Bytes": imagem_bytes})
                                         
                                         texto_extraido = ""
@@ -4000,7 +7985,7 @@ def lambda_handler(event, context):
                                             enviar_mensagem_whatsapp(telefone, "❌ Não consegui extrair texto da imagem.")
                                             continue
                                         
-                                        resultado = analisar_mensagem_guardinia_v5_1(texto_extraido)
+                                        resultado = analisar_mensagem_guardinia_v5_1(texto_extraido, prazo)
                                         
                                         resposta_formatada = f"{resultado.status}\n\n🎯 Confiança: {resultado.confianca}%\n"
                                         
@@ -4026,7 +8011,10 @@ def lambda_handler(event, context):
                                     if texto_original:
                                         logger.info(f"whatsapp_text_received | from={mascarar_telefone(telefone)} | length={len(texto_original)}")
                                         
-                                        resposta = processar_mensagem(texto_original)
+                                        resposta = processar_mensagem(
+                                            texto_original,
+                                            Prazo.da_invocacao(context)
+                                        )
                                         enviar_mensagem_whatsapp(telefone, resposta)
                 
                 except Exception as e:
@@ -4080,7 +8068,10 @@ def lambda_handler(event, context):
         # ==============================================================
         if eh_sistema_web and method == "POST":
             logger.info("route=web_system")
-            return processar_sistema_web(body)
+            return processar_sistema_web(
+                body,
+                Prazo.da_invocacao(context)
+            )
 
         # ==============================================================
         # Webhook Verification (Meta Challenge)
@@ -4126,6 +8117,15 @@ def lambda_handler(event, context):
             )
         }
 
+    finally:
+        # Queued cache/audit/metric writes must land before the
+        # container is frozen; stale-verdict refreshes get half of
+        # the flush budget to queue theirs first
+        prazo_s = prazo_descarga(context)
+        aguardar_revalidacoes(prazo_s / 2 if prazo_s is not None else None)
+        AGREGADOR_METRICAS.descarregar()
+        FILA_ESCRITA.descarregar(prazo_s=prazo_descarga(context))
+
 # ======================================================================
 # GuardinIA – Production Ready v5.1 COMPLETO
 # ======================================================================
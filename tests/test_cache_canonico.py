@@ -0,0 +1,31 @@
+import lambda_handler as L
+
+
+BAIXO = "invista R$ 100 no pix hoje e receba R$ 110 de lucro garantido em 24 horas"
+ALTO = "invista R$ 100 no pix hoje e receba R$ 10.000 de lucro garantido em 24 horas"
+
+
+def test_valores_de_ordens_diferentes_nao_colidem():
+    assert L.gerar_chave_canonica(BAIXO) != L.gerar_chave_canonica(ALTO)
+
+
+def test_variantes_do_mesmo_modelo_colidem():
+    outra = "invista R$ 300 no pix hoje e receba R$ 990 de lucro garantido em 24 horas"
+    assert L.gerar_chave_canonica(outra) == L.gerar_chave_canonica(BAIXO)
+
+
+def test_veredito_de_baixo_risco_nao_vale_para_variantes(monkeypatch):
+    monkeypatch.setattr(L, "_ler_cache_dynamodb", lambda chave: None)
+    chave = "CANON#teste-baixo-risco"
+    L.CACHE_MEMORIA.guardar(chave, {"pk": chave, "score_total": L.VARIANTES_SCORE_MIN - 1})
+
+    assert L.buscar_cache("hash-sem-entrada", chave) is None
+
+
+def test_veredito_de_alto_risco_vale_para_variantes(monkeypatch):
+    monkeypatch.setattr(L, "_ler_cache_dynamodb", lambda chave: None)
+    chave = "CANON#teste-alto-risco"
+    item = {"pk": chave, "score_total": L.VARIANTES_SCORE_MIN}
+    L.CACHE_MEMORIA.guardar(chave, item)
+
+    assert L.buscar_cache("hash-sem-entrada", chave) == item
@@ -0,0 +1,67 @@
+import time
+
+import lambda_handler as L
+
+
+class TabelaFalsa:
+    name = "guardinia_cache"
+
+    def __init__(self, item):
+        self.item = item
+
+    def get_item(self, Key):
+        return {"Item": dict(self.item, pk=Key["pk"])}
+
+
+def _item(**extra):
+    return {
+        "status": "🔴 GOLPE CONFIRMADO",
+        "cor": "vermelho",
+        "confianca": 95,
+        "score_total": 200,
+        "motivos": [],
+        "acao_recomendada": "",
+        "indicadores": "{}",
+        "versao": L.CACHE_VERSAO,
+        "impressao": L.IMPRESSAO_PONTUACAO,
+        "ttl": int(time.time()) + 600,
+        **extra
+    }
+
+
+def test_impressao_atual_nao_e_obsoleta(monkeypatch):
+    monkeypatch.setattr(L, "cache_table", TabelaFalsa(_item()))
+
+    item = L._ler_cache_dynamodb("TEXTO#atual")
+
+    assert item["score_total"] == 200
+    assert not item.get("obsoleto")
+
+
+def test_impressao_antiga_e_servida_como_obsoleta(monkeypatch):
+    monkeypatch.setattr(L, "cache_table", TabelaFalsa(_item(impressao="regras-antigas")))
+
+    item = L._ler_cache_dynamodb("TEXTO#antiga")
+
+    assert item["obsoleto"] is True
+
+
+def test_versao_ou_ttl_expirados_sao_ignorados(monkeypatch):
+    monkeypatch.setattr(L, "cache_table", TabelaFalsa(_item(versao=-1)))
+    assert L._ler_cache_dynamodb("TEXTO#versao") is None
+
+    monkeypatch.setattr(L, "cache_table", TabelaFalsa(_item(ttl=1)))
+    assert L._ler_cache_dynamodb("TEXTO#ttl") is None
+
+
+def test_veredito_obsoleto_agenda_revalidacao(monkeypatch):
+    monkeypatch.setattr(L, "cache_table", TabelaFalsa(_item(impressao="regras-antigas")))
+    salvos = []
+    monkeypatch.setattr(L, "salvar_cache", lambda h, r, **k: salvos.append((h, r)))
+
+    texto = "sua conta foi bloqueada, envie sua senha para desbloquear"
+    resposta = L.processar_sistema_web({"mensagem": texto})
+
+    assert resposta["statusCode"] == 200
+    assert L.aguardar_revalidacoes(5) == 0
+    assert [h for h, _ in salvos] == [L.gerar_hash_texto(L.normalizar_texto(texto))]
@@ -0,0 +1,101 @@
+import time
+
+import pytest
+from botocore.exceptions import ClientError, ReadTimeoutError
+
+import lambda_handler as L
+
+
+def _erro(codigo, status=400):
+    return ClientError(
+        {"Error": {"Code": codigo}, "ResponseMetadata": {"HTTPStatusCode": status}},
+        "InvokeModel"
+    )
+
+
+@pytest.fixture
+def disjuntor(monkeypatch):
+    monkeypatch.setattr(L, "DISJUNTOR_ENABLED", True)
+    monkeypatch.setattr(L, "DISJUNTOR_COMPARTILHADO", False)
+    monkeypatch.setattr(L, "DISJUNTOR_MIN_CHAMADAS", 4)
+    monkeypatch.setattr(L, "DISJUNTOR_TAXA_FALHA", 0.5)
+    monkeypatch.setattr(L, "DISJUNTOR_ABERTO_SEGUNDOS", 30)
+    return L.DisjuntorBedrock()
+
+
+def test_transicoes_fechado_aberto_semiaberto(disjuntor):
+    for sucesso in (True, False, True, False):
+        assert disjuntor.permitir()
+        disjuntor.registrar(sucesso, 100)
+
+    assert disjuntor.estado == disjuntor.ABERTO
+    assert not disjuntor.permitir()
+
+    # Open period over: one probe at a time
+    disjuntor._aberto_ate = time.time() - 1
+    assert disjuntor.permitir()
+    assert disjuntor.estado == disjuntor.SEMIABERTO
+    assert not disjuntor.permitir()
+
+    disjuntor.registrar(False, 100)
+    assert disjuntor.estado == disjuntor.ABERTO
+
+    disjuntor._aberto_ate = time.time() - 1
+    assert disjuntor.permitir()
+    disjuntor.registrar(True, 100)
+    assert disjuntor.estado == disjuntor.FECHADO
+    assert disjuntor.permitir()
+
+
+def test_chamada_lenta_conta_como_falha(disjuntor):
+    for _ in range(4):
+        disjuntor.permitir()
+        disjuntor.registrar(True, L.DISJUNTOR_LATENCIA_MS + 1)
+
+    assert disjuntor.estado == disjuntor.ABERTO
+
+
+def test_liberar_devolve_a_sonda(disjuntor):
+    disjuntor._abrir("teste")
+    disjuntor._aberto_ate = time.time() - 1
+
+    assert disjuntor.permitir()
+    disjuntor.liberar()
+
+    assert disjuntor.estado == disjuntor.SEMIABERTO
+    assert disjuntor.permitir()
+
+
+@pytest.mark.parametrize("erro, conta", [
+    (_erro("ThrottlingException"), True),
+    (_erro("ServiceUnavailableException", 503), True),
+    (_erro("ModelTimeoutException", 408), True),
+    (_erro("InternalServerException", 500), True),
+    (ReadTimeoutError(endpoint_url="https://bedrock"), True),
+    (_erro("ValidationException"), False),
+    (_erro("AccessDeniedException", 403), False),
+    (_erro("ResourceNotFoundException", 404), False),
+    (ValueError("payload"), False),
+])
+def test_erros_que_contam_como_falha(erro, conta):
+    assert L.falha_disponibilidade_bedrock(erro) is conta
+
+
+def test_erro_de_requisicao_nao_abre_o_circuito(monkeypatch, disjuntor):
+    chamadas = []
+
+    class Cliente:
+        def invoke_model(self, **kwargs):
+            chamadas.append(kwargs["modelId"])
+            raise _erro("ValidationException")
+
+    monkeypatch.setattr(L, "DISJUNTOR_BEDROCK", disjuntor)
+    monkeypatch.setattr(L, "BEDROCK_ENABLED", True)
+    monkeypatch.setattr(L, "BEDROCK_MEMO_ENABLED", False)
+    monkeypatch.setattr(L, "obter_cliente_bedrock", lambda timeout: Cliente())
+
+    for _ in range(6):
+        assert L.chamar_bedrock_claude("texto", 70, ["PHISHING"], {}, modelo="haiku") is None
+
+    assert len(chamadas) == 6
+    assert disjuntor.estado == disjuntor.FECHADO
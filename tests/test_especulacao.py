@@ -0,0 +1,42 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import lambda_handler as L
+
+
+def test_sonnet_expirado_e_cobrado_como_desperdicio(monkeypatch):
+    sonnet_terminou = threading.Event()
+
+    def chamar(*args, modelo, **kwargs):
+        if modelo == "haiku":
+            return None
+        time.sleep(0.2)
+        sonnet_terminou.set()
+        return SimpleNamespace(custo_usd=0.01, tempo_ms=200.0)
+
+    monkeypatch.setattr(L, "BEDROCK_ESPECULATIVO_ENABLED", True)
+    monkeypatch.setattr(L, "prever_repass_sonnet", lambda *a: 1.0)
+    monkeypatch.setattr(L, "chamar_bedrock_claude", chamar)
+    monkeypatch.setattr(L, "ORCAMENTO_ESPECULATIVO", L.OrcamentoEspeculativo(1.0))
+    antes = L.AGREGADOR_METRICAS.instantaneo()
+
+    indicadores = {}
+    resposta = L.analisar_double_pass(
+        "texto", 70, ["PHISHING"], {}, indicadores, prazo=L.Prazo(0.05)
+    )
+
+    assert resposta is None
+    assert indicadores["especulacao_sonnet"] == "expirada"
+
+    assert sonnet_terminou.wait(2)
+    time.sleep(0.05)
+
+    assert L.ORCAMENTO_ESPECULATIVO._gasto == pytest.approx(0.01)
+    desperdicio = [
+        campos.get("speculative_wasted_usd", 0.0) - antes.get(pk, {}).get("speculative_wasted_usd", 0.0)
+        for pk, campos in L.AGREGADOR_METRICAS.instantaneo().items()
+    ]
+    assert sum(desperdicio) == pytest.approx(0.01)
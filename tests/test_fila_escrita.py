@@ -0,0 +1,130 @@
+import json
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+import lambda_handler as L
+
+
+class DynamoFalso:
+    def __init__(self):
+        self.lotes = []
+
+    def batch_write_item(self, RequestItems):
+        self.lotes.append(RequestItems)
+        return {"UnprocessedItems": {}}
+
+
+class TabelaFalsa:
+    def __init__(self, name):
+        self.name = name
+        self.incrementos = []
+
+    def get_item(self, Key):
+        return {}
+
+    def update_item(self, **kwargs):
+        self.incrementos.append(kwargs)
+
+
+class ContextoFalso:
+    def get_remaining_time_in_millis(self):
+        return 10000
+
+
+def test_fila_descarregada_ao_sair_do_handler(monkeypatch):
+    dynamo = DynamoFalso()
+    metricas = TabelaFalsa("guardinia_metrics")
+    monkeypatch.setattr(L, "dynamodb", dynamo)
+    monkeypatch.setattr(L, "cache_table", TabelaFalsa("guardinia_cache"))
+    monkeypatch.setattr(L, "audit_table", TabelaFalsa("guardinia_audit_logs"))
+    monkeypatch.setattr(L, "metrics_table", metricas)
+
+    evento = {
+        "httpMethod": "POST",
+        "body": json.dumps({"mensagem": "sua conta foi bloqueada, clique no link e informe a senha"})
+    }
+    resposta = L.lambda_handler(evento, ContextoFalso())
+
+    assert resposta["statusCode"] == 200
+    assert len(L.FILA_ESCRITA) == 0
+
+    gravados = {
+        nome: [p["PutRequest"]["Item"]["pk"] for p in pedidos]
+        for lote in dynamo.lotes
+        for nome, pedidos in lote.items()
+    }
+    assert any(pk.startswith("TEXTO#") for pk in gravados["guardinia_cache"])
+    assert gravados["guardinia_audit_logs"]
+    assert metricas.incrementos
+
+
+class DynamoFalhando:
+    def __init__(self, erro):
+        self.erro = erro
+        self.chamadas = 0
+
+    def batch_write_item(self, RequestItems):
+        self.chamadas += 1
+        raise self.erro
+
+
+def erro_cliente(codigo, status=400):
+    return ClientError(
+        {"Error": {"Code": codigo}, "ResponseMetadata": {"HTTPStatusCode": status}},
+        "BatchWriteItem"
+    )
+
+
+def test_erro_permanente_descarta_escrita(monkeypatch):
+    monkeypatch.setattr(L, "dynamodb", DynamoFalhando(erro_cliente("ValidationException")))
+    fila = L.FilaEscrita(max_itens=100, workers=1)
+    fila.gravar(TabelaFalsa("guardinia_cache"), {"pk": "A", "sk": "1"})
+
+    assert fila.descarregar(prazo_s=5) == 0
+    assert len(fila) == 0
+
+
+def test_throttling_reenfileirado_ate_o_limite(monkeypatch):
+    dynamo = DynamoFalhando(erro_cliente("ProvisionedThroughputExceededException"))
+    monkeypatch.setattr(L, "dynamodb", dynamo)
+    fila = L.FilaEscrita(max_itens=100, workers=1)
+    fila.gravar(TabelaFalsa("guardinia_cache"), {"pk": "A", "sk": "1"})
+
+    for _ in range(L.FILA_ESCRITA_TENTATIVAS_ITEM - 1):
+        assert fila.descarregar(prazo_s=5) == 1
+
+    assert fila.descarregar(prazo_s=5) == 0
+    assert dynamo.chamadas == L.FILA_ESCRITA_TENTATIVAS_ITEM
+
+
+def test_incremento_com_erro_permanente_descartado():
+    class TabelaNegada(TabelaFalsa):
+        def update_item(self, **kwargs):
+            raise erro_cliente("AccessDeniedException")
+
+    fila = L.FilaEscrita(max_itens=100, workers=1)
+    fila.incrementar(TabelaNegada("guardinia_metrics"), {"pk": "M", "sk": "bedrock"}, {"chamadas": 1})
+
+    assert fila.descarregar(prazo_s=5) == 0
+
+
+def test_fila_cheia_descarrega_com_prazo(monkeypatch):
+    liberar = threading.Event()
+
+    class DynamoLento(DynamoFalso):
+        def batch_write_item(self, RequestItems):
+            liberar.wait(5)
+            return super().batch_write_item(RequestItems)
+
+    monkeypatch.setattr(L, "dynamodb", DynamoLento())
+    monkeypatch.setattr(L, "FILA_ESCRITA_PRAZO_INLINE_MS", 50)
+    fila = L.FilaEscrita(max_itens=1, workers=1)
+
+    inicio = time.monotonic()
+    fila.gravar(TabelaFalsa("guardinia_cache"), {"pk": "A", "sk": "1"})
+    decorrido = time.monotonic() - inicio
+
+    liberar.set()
+    assert decorrido < 1
@@ -0,0 +1,33 @@
+import lambda_handler as L
+
+
+def _texto_longo(janelas):
+    # Each window brings a new term, so every window gets a probe
+    trechos = ["urgente", "pix", "senha", "bloqueio", "banco", "link",
+               "premio", "whatsapp", "boleto", "cpf", "conta", "codigo"]
+    partes = []
+    for i in range(janelas):
+        termo = trechos[i % len(trechos)]
+        partes.append((f"bom dia a todos, reunião sobre {termo}. " * 60)[:L.JANELA_ANALISE_CHARS])
+    return "".join(partes)
+
+
+def test_janelas_nao_inflam_contadores():
+    texto = _texto_longo(L.MAX_JANELAS_ANALISE + 3)
+    total_antes = L._TOTAL_AVALIACOES
+    execucoes_antes = [h.execucoes for h in L.HEURISTICAS_REGISTRADAS]
+
+    _, leitura = L.construir_contexto_longo(texto)
+
+    assert L._TOTAL_AVALIACOES == total_antes
+    assert [h.execucoes for h in L.HEURISTICAS_REGISTRADAS] == execucoes_antes
+    assert leitura["janelas_ignoradas"] == leitura["janelas_total"] - L.MAX_JANELAS_ANALISE
+
+
+def test_mensagem_longa_conta_uma_avaliacao():
+    texto = _texto_longo(L.MAX_JANELAS_ANALISE + 3)
+    total_antes = L._TOTAL_AVALIACOES
+
+    L.analisar_mensagem_guardinia_v5_1(texto)
+
+    assert L._TOTAL_AVALIACOES == total_antes + 1
@@ -0,0 +1,45 @@
+import glob
+import json
+import os
+
+import pytest
+
+import lambda_handler as L
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _mensagens():
+    mensagens = []
+    for arquivo in sorted(glob.glob(os.path.join(RAIZ, "benchmark", "*.json"))):
+        with open(arquivo, encoding="utf-8") as f:
+            mensagens += [d["mensagem"] for d in json.load(f)]
+    return mensagens
+
+
+def _escalar(textos):
+    heuristicos, totais = [], []
+    for texto in textos:
+        score, motivos, indicadores = L.avaliar_heuristicas(texto)
+        total, _ = L.aplicar_combinacoes(score, motivos, indicadores)
+        heuristicos.append(score)
+        totais.append(total)
+    return heuristicos, totais
+
+
+@pytest.mark.parametrize("vetorizado", [True, False])
+def test_lote_equivale_ao_escalar(monkeypatch, vetorizado):
+    if vetorizado:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(L, "np", None)
+
+    textos = _mensagens()
+    assert textos
+
+    lote = L.avaliar_heuristicas_lote(textos)
+    heuristicos, totais = _escalar(textos)
+
+    assert list(lote["score_heuristico"]) == pytest.approx(heuristicos)
+    assert list(lote["score_total"]) == pytest.approx(totais)
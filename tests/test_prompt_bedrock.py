@@ -0,0 +1,22 @@
+import lambda_handler as L
+
+
+def test_prefixo_curto_nao_e_marcado_para_cache(monkeypatch):
+    monkeypatch.setattr(L, "BEDROCK_PROMPT_CACHE_ENABLED", True)
+
+    for modelo, prefixo in (
+        ("sonnet", L.PROMPT_SISTEMA_PROFUNDO),
+        ("haiku", L.PROMPT_SISTEMA_BASICO)
+    ):
+        assert "cache_control" not in L.bloco_sistema_bedrock(prefixo, modelo)[0]
+
+
+def test_prefixo_longo_e_marcado_quando_habilitado(monkeypatch):
+    prefixo = "x" * (L.PROMPT_CACHE_MIN_TOKENS["sonnet"] * 4)
+
+    monkeypatch.setattr(L, "BEDROCK_PROMPT_CACHE_ENABLED", True)
+    assert L.bloco_sistema_bedrock(prefixo, "sonnet")[0]["cache_control"] == {"type": "ephemeral"}
+    assert "cache_control" not in L.bloco_sistema_bedrock(prefixo, "haiku")[0]
+
+    monkeypatch.setattr(L, "BEDROCK_PROMPT_CACHE_ENABLED", False)
+    assert "cache_control" not in L.bloco_sistema_bedrock(prefixo, "sonnet")[0]
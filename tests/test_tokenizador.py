@@ -0,0 +1,40 @@
+import lambda_handler as L
+
+
+def _tipos(texto):
+    return [(t.tipo, t.valor) for t in L.tokenizar_numeros(texto.lower())]
+
+
+def test_valor_brl_com_milhar():
+    assert ("BRL", 3500.0) in _tipos("pague R$3.500 hoje")
+
+
+def test_valor_brl_com_centavos():
+    assert ("BRL", 1847.0) in _tipos("total: R$1.847,00")
+
+
+def test_multiplicador_e_percentual():
+    tipos = dict(_tipos("retorno de 2x em 30 dias, rende 15%"))
+    assert tipos["MULTIPLICADOR"] == 2.0
+    assert tipos["PERCENTUAL"] == 15.0
+
+
+def test_converter_numero_br():
+    assert L.converter_numero_br("3.500") == 3500.0
+    assert L.converter_numero_br("1.234,56") == 1234.56
+    assert L.converter_numero_br("3,5") == 3.5
+
+
+def test_retorno_irreal_com_valores_brl():
+    ctx = L.construir_contexto(
+        "invista R$3.500 no pix hoje e receba R$35.000 de lucro"
+    )
+    assert L.detectar_retorno_financeiro_irreal(ctx)
+
+
+def test_retorno_irreal_com_multiplicador():
+    for texto in (
+        "faça um pix de R$ 200 e vai receber 3x o valor",
+        "faça um pix de R$ 200 e vai receber o dobro"
+    ):
+        assert L.detectar_retorno_financeiro_irreal(L.construir_contexto(texto)), texto
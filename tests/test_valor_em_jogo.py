@@ -0,0 +1,51 @@
+import pytest
+
+import lambda_handler as L
+
+
+GOLPES = [
+    ("Parabéns! Seu número foi sorteado no Programa Pix Premiado do Banco Central. "
+     "Você ganhou R$1.847,00. Para receber, confirme seus dados em: bcpix-premiado.net/resgate",
+     L.SCORE_GOLPE_CONFIRMADO),
+    ("Boa tarde! Vi seu perfil no LinkedIn e temos uma vaga home office de R$4.500/mês, 4h por dia, "
+     "sem experiência necessária. Para participar da seleção, acesse: vagas-remotas.info/cadastro "
+     "e pague a taxa de R$47 de análise curricular.",
+     L.SCORE_GOLPE_CONFIRMADO),
+    ("Ei, tudo bem? Comecei a investir com uma consultora que me rendeu R$3.200 em 10 dias. Ela ainda "
+     "tem vagas, mas fecha sexta-feira. Quer o contato dela? É garantido, sem risco, 30% ao mês.",
+     L.SCORE_GOLPE_CONFIRMADO),
+    ("RECEITA FEDERAL DO BRASIL — NOTIFICAÇÃO URGENTE: Consta em nossos registros uma inconsistência "
+     "na sua declaração do IR 2024. Para evitar multa de R$2.350, acesse: "
+     "receita-federal-regularizar.com em até 48 horas.",
+     80),
+    ("⚠️ SERASA: Seu CPF será NEGATIVADO em 2 horas por dívida de R$7.830. Último aviso! Regularize "
+     "AGORA: serasa-cpf-urgente.net/limpar — após prazo não é possível reverter",
+     80),
+]
+
+
+@pytest.mark.parametrize("texto, minimo", GOLPES)
+def test_golpes_com_valor_em_jogo(texto, minimo):
+    assert L.analisar_mensagem_guardinia_v5_1(texto).score_total >= minimo
+
+
+@pytest.mark.parametrize("texto", [
+    "Você ganhou R$10 de cashback na sua próxima compra no app iFood!",
+    "Vivo: Sua fatura de R$109,90 vence em 5 dias (20/11). Pague pelo app Vivo, agências ou internet banking.",
+    "Mercado Pago: Você recebeu R$312,00 de Mariana Souza Lima. Saldo atualizado: R$847,50.",
+    "Mãe, pode me mandar R$150 de pix? Esqueci a carteira em casa. Já devolvo amanhã.",
+])
+def test_mensagens_legitimas_com_valor(texto):
+    assert L.analisar_mensagem_guardinia_v5_1(texto).score_total < 50
+
+
+def test_padroes():
+    ctx = L.construir_contexto("pague a taxa de R$ 29,90 para liberar seu prêmio")
+    assert L.detectar_valor_em_jogo(ctx) == {"FINANCEIRO": L.PESO_VALOR_EM_JOGO,
+                                             "ENGENHARIA_SOCIAL": L.PESO_VALOR_EM_JOGO}
+
+    ctx = L.construir_contexto("plataforma rendendo 15% ao dia, entre hoje")
+    assert L.detectar_valor_em_jogo(ctx) == {"FINANCEIRO": L.PESO_VALOR_EM_JOGO}
+
+    ctx = L.construir_contexto("rende 100% do CDI, sem taxa de manutenção")
+    assert L.detectar_valor_em_jogo(ctx) is False
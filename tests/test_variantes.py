@@ -0,0 +1,36 @@
+import lambda_handler as L
+
+
+def _contar_assinaturas(monkeypatch):
+    chamadas = []
+    original = L.assinatura_minhash
+
+    def contar(texto):
+        chamadas.append(texto)
+        return original(texto)
+
+    monkeypatch.setattr(L, "assinatura_minhash", contar)
+    return chamadas
+
+
+def test_mensagem_de_baixo_risco_nao_calcula_assinatura(monkeypatch):
+    chamadas = _contar_assinaturas(monkeypatch)
+
+    resultado = L.analisar_mensagem_guardinia_v5_1(
+        "oi, tudo bem? a reunião de amanhã foi remarcada para as 15h"
+    )
+
+    assert resultado.score_total < L.VARIANTES_SCORE_MIN
+    assert chamadas == []
+
+
+def test_veredito_de_alto_risco_e_indexado(monkeypatch):
+    chamadas = _contar_assinaturas(monkeypatch)
+    texto = "invista R$ 100 no pix hoje e receba R$ 10.000 de lucro garantido em 24 horas"
+
+    resultado = L.analisar_mensagem_guardinia_v5_1(texto)
+    assinatura = L.assinatura_minhash(texto)
+
+    assert resultado.score_total >= L.VARIANTES_SCORE_MIN
+    assert len(chamadas) == 2
+    assert L.INDICE_VARIANTES.buscar(assinatura, L.VARIANTES_SIMILARIDADE_MIN)
@@ -0,0 +1,29 @@
+import pytest
+
+import lambda_handler as L
+
+
+@pytest.mark.parametrize("valor, consulta", [
+    (None, True),
+    (False, True),
+    ("false", True),
+    ("0", True),
+    ("", True),
+    (True, False),
+    ("true", False),
+    ("1", False),
+    ("YES", False),
+])
+def test_ignorar_cache(monkeypatch, valor, consulta):
+    consultas = []
+    monkeypatch.setattr(L, "buscar_cache", lambda *a: consultas.append(a))
+    monkeypatch.setattr(L, "salvar_cache", lambda *a, **k: None)
+
+    body = {"mensagem": "oi, a reunião foi remarcada para as 15h"}
+    if valor is not None:
+        body["ignorar_cache"] = valor
+
+    resposta = L.processar_sistema_web(body)
+
+    assert resposta["statusCode"] == 200
+    assert bool(consultas) is consulta